@@ -0,0 +1,363 @@
+"""Cat-alysts: streaming alert rules evaluated on each new pool or burn row.
+
+Rules read shared rolling state (one ``RollingMean`` per column/window, no
+matter how many rules use it), so each row costs O(1) per state plus O(1)
+per rule. A rule notifies once when it starts firing and stays quiet until
+it has cleared and its cooldown has passed, so a sustained or flapping drop
+is one alert, not one per second.
+
+Rules come from ``DEFAULT_RULES`` or a JSON list of the same shape in the
+file named by ``QPOOL_ALERT_RULES``.
+
+Rules are evaluated inside the history store's ingest, so sinks are not
+called there: alerts go on a bounded outbox that one background thread
+delivers, and a slow or failing sink only delays or loses its own alerts.
+Failures are logged and counted per sink (``sink_stats()``).
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import requests
+
+from blockstats import MONERO_BLOCK_TIME
+
+log = logging.getLogger(__name__)
+
+OUTBOX_SIZE = 1000  # alerts waiting for delivery before new ones are dropped
+
+DEFAULT_RULES = [
+    {"type": "hashrate_drop", "name": "Pool hashrate drop", "drop": 0.5, "window_hours": 6},
+    {"type": "no_block", "name": "Block drought", "factor": 3},
+    {"type": "network_spike", "name": "Network hashrate spike", "rise": 0.3, "window_hours": 6},
+    {"type": "burn", "name": "Big burn", "min_qubic": 1e9},
+]
+
+
+class RollingMean:
+    """Time-windowed mean with amortized O(1) updates."""
+
+    def __init__(self, window):
+        self.window = pd.Timedelta(window).value
+        self.values = deque()
+        self.total = 0.0
+
+    def update(self, ts, value):
+        if not np.isnan(value):
+            self.values.append((ts, value))
+            self.total += value
+        while self.values and self.values[0][0] <= ts - self.window:
+            self.total -= self.values.popleft()[1]
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else np.nan
+
+
+class Rule:
+    kind = "pool"
+
+    def __init__(self, name, cooldown_minutes=30, **params):
+        self.name = name
+        self.params = params
+        self.cooldown = pd.Timedelta(minutes=cooldown_minutes).value
+        self.active = False
+        self.last_alert = None
+
+    def states(self):
+        """(column, window) pairs of rolling means this rule needs."""
+        return []
+
+    def check(self, row, state):
+        """Return a message while the condition holds, otherwise None."""
+        raise NotImplementedError
+
+    def dedup_key(self, row):
+        return self.name
+
+
+class HashrateDrop(Rule):
+    def states(self):
+        return [("pool_hashrate", f"{self.params.get('window_hours', 6)}h")]
+
+    def check(self, row, state):
+        mean = state[self.states()[0]].mean
+        drop = self.params.get("drop", 0.5)
+        if mean > 0 and row["pool_hashrate"] < (1 - drop) * mean:
+            return f"Pool hashrate {row['pool_hashrate'] / 1e6:,.1f} MH/s is {1 - row['pool_hashrate'] / mean:.0%} below its {self.states()[0][1]} mean"
+
+
+class NetworkSpike(Rule):
+    def states(self):
+        return [("network_hashrate", f"{self.params.get('window_hours', 6)}h")]
+
+    def check(self, row, state):
+        mean = state[self.states()[0]].mean
+        rise = self.params.get("rise", 0.3)
+        if mean > 0 and row["network_hashrate"] > (1 + rise) * mean:
+            return f"Network hashrate {row['network_hashrate'] / 1e9:,.2f} GH/s is {row['network_hashrate'] / mean - 1:.0%} above its {self.states()[0][1]} mean"
+
+
+class NoBlock(Rule):
+    """No block for ``minutes``, or for ``factor`` times the expected interval at the current pool share."""
+
+    def check(self, row, state):
+        last_block = state.get("last_block")
+        if last_block is None:
+            return None
+        waited = (row["timestamp"] - last_block) / 60e9
+        if "minutes" in self.params:
+            limit = self.params["minutes"]
+        elif row["pool_hashrate"] > 0:
+            expected = MONERO_BLOCK_TIME * row["network_hashrate"] / row["pool_hashrate"] / 60
+            limit = self.params.get("factor", 3) * expected
+        else:
+            return None
+        if waited > limit:
+            return f"No block for {waited:,.0f} min (limit {limit:,.0f} min)"
+
+
+class BurnOver(Rule):
+    kind = "burn"
+
+    def check(self, row, state):
+        if row["qubic_amount"] >= self.params.get("min_qubic", 1e9):
+            return f"{row['qubic_amount']:,.0f} QUBIC burned"
+
+    def dedup_key(self, row):
+        return f"{self.name}:{row.get('tx', row['timestamp'])}"
+
+
+RULE_TYPES = {
+    "hashrate_drop": HashrateDrop,
+    "network_spike": NetworkSpike,
+    "no_block": NoBlock,
+    "burn": BurnOver,
+}
+
+
+def build_rules(config):
+    return [RULE_TYPES[spec["type"]](**{k: v for k, v in spec.items() if k != "type"}) for spec in config]
+
+
+def load_rules(path=None):
+    path = path or os.environ.get("QPOOL_ALERT_RULES")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return build_rules(json.load(f))
+    return build_rules(DEFAULT_RULES)
+
+
+class FileSink:
+    """Append alerts as JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alert):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(alert, default=str) + "\n")
+
+
+class SQLiteSink:
+    """Store alerts in SQLite; the primary key drops duplicates across restarts."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alerts (key TEXT PRIMARY KEY, rule TEXT, timestamp TEXT, message TEXT)"
+        )
+
+    def send(self, alert):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO alerts VALUES (?, ?, ?, ?)",
+                (f"{alert['key']}@{alert['timestamp']}", alert["rule"], str(alert["timestamp"]), alert["message"]),
+            )
+
+
+class WebhookSink:
+    """POST alerts as JSON to a webhook (or a local stand-in)."""
+
+    def __init__(self, url, timeout=2):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        requests.post(self.url, data=json.dumps(alert, default=str), timeout=self.timeout)
+
+
+def sinks_from_env():
+    """Sinks configured through QPOOL_ALERT_FILE, QPOOL_ALERT_DB and QPOOL_ALERT_WEBHOOK."""
+    sinks = []
+    if os.environ.get("QPOOL_ALERT_FILE"):
+        sinks.append(FileSink(os.environ["QPOOL_ALERT_FILE"]))
+    if os.environ.get("QPOOL_ALERT_DB"):
+        sinks.append(SQLiteSink(os.environ["QPOOL_ALERT_DB"]))
+    if os.environ.get("QPOOL_ALERT_WEBHOOK"):
+        sinks.append(WebhookSink(os.environ["QPOOL_ALERT_WEBHOOK"]))
+    return sinks
+
+
+class AlertEngine:
+    """Evaluates every rule on each ingested row and queues new alerts for the sinks."""
+
+    def __init__(self, rules, sinks=(), recent=100, outbox_size=OUTBOX_SIZE):
+        self.rules = rules
+        self.sinks = list(sinks)
+        # False on replicas that only mirror another's history: alerts still show, the writer sends them
+        self.deliver = True
+        self.recent = deque(maxlen=recent)
+        self.rows_seen = 0
+        self._lock = threading.Lock()
+        self._burn_keys = None
+        self._windows = {key for rule in rules for key in rule.states()}
+        self._max_window = max((pd.Timedelta(w) for _, w in self._windows), default=pd.Timedelta(0))
+        self._reset_state()
+        self.sent = [0] * len(self.sinks)
+        self.failures = [0] * len(self.sinks)
+        self.last_errors = [None] * len(self.sinks)
+        self.dropped = 0  # alerts not queued because the outbox was full
+        self._outbox = queue.Queue(maxsize=outbox_size)
+        self._sender = None
+
+    def _reset_state(self):
+        self.state = {key: RollingMean(key[1]) for key in self._windows}
+        self.state["last_block"] = None
+        for rule in self.rules:
+            rule.active = False
+            rule.last_alert = None
+
+    def _update_state(self, row):
+        for key, rolling in self.state.items():
+            if isinstance(key, tuple):
+                rolling.update(row["timestamp"], row[key[0]])
+        if row.get("block_found"):
+            self.state["last_block"] = row["timestamp"]
+
+    def prime(self, df):
+        """Start rolling and rule state afresh from history, without raising alerts for past rows."""
+        with self._lock:
+            # A later initial ingest (restore, re-sync) replaces the history the old state came from
+            self._reset_state()
+            if df.empty:
+                return
+            tail = df[df["timestamp"] > df["timestamp"].iloc[-1] - self._max_window]
+            for row in _rows(tail):
+                self._update_state(row)
+            blocks = df.loc[df["block_found"], "timestamp"]
+            if not blocks.empty:
+                self.state["last_block"] = blocks.iloc[-1].value
+
+    def process(self, df):
+        """Evaluate pool rules on new rows (a prepared frame); returns the alerts raised."""
+        raised = []
+        with self._lock:
+            pool_rules = [r for r in self.rules if r.kind == "pool"]
+            for row in _rows(df):
+                self._update_state(row)
+                self.rows_seen += 1
+                for rule in pool_rules:
+                    message = rule.check(row, self.state)
+                    if message and not rule.active and (
+                        rule.last_alert is None or row["timestamp"] - rule.last_alert >= rule.cooldown
+                    ):
+                        rule.last_alert = row["timestamp"]
+                        raised.append(self._emit(rule, row, message))
+                    rule.active = bool(message)
+        return raised
+
+    def on_ingest(self, df, initial):
+        """HistoryStore listener: prime on the first bulk load, evaluate afterwards."""
+        if initial:
+            self.prime(df)
+        else:
+            self.process(df)
+
+    def process_burns(self, df):
+        """Evaluate burn rules; each transaction alerts at most once.
+
+        The first call only records the burns already on file.
+        """
+        raised = []
+        with self._lock:
+            burn_rules = [r for r in self.rules if r.kind == "burn"]
+            if self._burn_keys is None:
+                self._burn_keys = {rule.dedup_key(row) for row in _rows(df) for rule in burn_rules}
+                return raised
+            for row in _rows(df):
+                for rule in burn_rules:
+                    key = rule.dedup_key(row)
+                    if key in self._burn_keys:
+                        continue
+                    message = rule.check(row, self.state)
+                    if message:
+                        self._burn_keys.add(key)
+                        raised.append(self._emit(rule, row, message))
+        return raised
+
+    def _emit(self, rule, row, message):
+        alert = {
+            "key": rule.dedup_key(row),
+            "rule": rule.name,
+            "timestamp": pd.Timestamp(row["timestamp"]),
+            "message": message,
+        }
+        self.recent.appendleft(alert)
+        if self.deliver and self.sinks:
+            self._queue(alert)
+        return alert
+
+    def _queue(self, alert):
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send_loop, name="alert-sinks", daemon=True)
+            self._sender.start()
+        try:
+            self._outbox.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+            log.warning("alert outbox full, dropped %s", alert["key"])
+
+    def _send_loop(self):
+        while True:
+            alert = self._outbox.get()
+            for i, sink in enumerate(self.sinks):
+                try:
+                    sink.send(alert)
+                    self.sent[i] += 1
+                except Exception as e:
+                    # A broken sink must not stop the others
+                    self.failures[i] += 1
+                    self.last_errors[i] = f"{e.__class__.__name__}: {e}"
+                    log.exception("alert sink %r failed", sink)
+            self._outbox.task_done()
+
+    def flush(self):
+        """Wait until every queued alert has been offered to the sinks."""
+        if self._sender is not None:
+            self._outbox.join()
+
+    def sink_stats(self):
+        """One row per sink: alerts sent, failures and the last error."""
+        return pd.DataFrame({
+            'sink': [type(sink).__name__ for sink in self.sinks],
+            'sent': self.sent,
+            'failed': self.failures,
+            'last_error': self.last_errors,
+        })
+
+
+def _rows(df):
+    """Iterate rows as plain dicts with int64 nanosecond timestamps (cheaper than iterrows)."""
+    cols = {c: df[c].to_numpy() for c in df.columns if c != "timestamp"}
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]").astype("int64")
+    for i in range(len(df)):
+        row = {c: v[i] for c, v in cols.items()}
+        row["timestamp"] = ts[i]
+        yield row
@@ -0,0 +1,274 @@
+"""Embedded SQL store for ad-hoc range queries over pool and burn history.
+
+Uses DuckDB when it is installed and falls back to the standard-library
+SQLite otherwise. Timestamps are stored as indexed integer epoch seconds, so
+bucketing ("hourly mean hashrate", "burns per week") is pushed down to the
+engine and only aggregated rows come back. Each row also keeps its
+nanosecond timestamp as ``key``: appends skip rows already stored by key,
+so rows sharing a second are never dropped.
+
+A DuckDB file can only be open in one process at a time; a replica that
+finds it locked keeps its own in-memory database instead. An in-memory
+database (that one, or a follower replica's) keeps only the pool rows
+within ``retention`` of the newest, as the history store keeps its raw
+rows, so it doesn't grow for as long as the process runs. Replicas sharing
+a SQLite file append in one write transaction each, so they don't store
+the same rows twice.
+
+Benchmark against the pandas path with ``python analytics.py --bench``.
+"""
+import argparse
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+POOL_COLUMNS = ['pool_hashrate', 'network_hashrate', 'pool_blocks_found', 'blocks_delta', 'qubic_epoch']
+BURN_COLUMNS = ['qubic_amount', 'usdt_value']
+
+HOUR = 3600
+DAY = 86400
+WEEK = 7 * DAY
+MONDAY_OFFSET = 4 * DAY  # 1970-01-01 was a Thursday
+
+
+def bucket_expr(seconds, offset=0):
+    """SQL for flooring ``ts`` to a bucket; works unchanged on SQLite and DuckDB."""
+    return f"(ts - ((ts - {offset}) % {seconds}))"
+
+
+class AnalyticsDB:
+    def __init__(self, path=":memory:", backend=None, retention=None):
+        self.backend = backend or ("duckdb" if duckdb is not None else "sqlite")
+        self.path = path
+        self.retention = pd.Timedelta(retention) if retention is not None else None
+        if self.backend == "duckdb":
+            try:
+                self.conn = duckdb.connect(path)
+            except duckdb.IOException:
+                # Another replica holds the file
+                self.path = ":memory:"
+                self.conn = duckdb.connect(self.path)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        cols = ", ".join(f"{c} DOUBLE" for c in POOL_COLUMNS)
+        burn_cols = ", ".join(f"{c} DOUBLE" for c in BURN_COLUMNS)
+        with self._lock:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS pool (ts BIGINT, key BIGINT, {cols})")
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS burns (ts BIGINT, key BIGINT, {burn_cols})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pool_ts ON pool (ts)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pool_key ON pool (key)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS burns_key ON burns (key)")
+            # Covering index: blocks per epoch is answered from the index alone
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pool_epoch ON pool (qubic_epoch, pool_blocks_found)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS burns_ts ON burns (ts)")
+
+    def _last_key(self, table):
+        return self.conn.execute(f"SELECT MAX(key) FROM {table}").fetchone()[0]
+
+    def _append(self, table, columns, df, replace=False):
+        """Insert rows from the table's last key on; returns the number inserted.
+
+        Rows at exactly the last key are replaced rather than skipped: a batch
+        that reaches back to it (the whole burn file, say) holds all of them.
+        With ``replace``, stored rows from the batch's first key on are
+        deleted first, so a batch that rewrites the history is taken whole.
+        """
+        if df.empty:
+            return 0
+        ts = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]')
+        frame = pd.DataFrame({'ts': ts.astype('datetime64[s]').astype('int64'), 'key': ts.astype('int64')})
+        for col in columns:
+            frame[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64') if col in df.columns else np.nan
+        with self._lock:
+            self.conn.execute("BEGIN TRANSACTION" if self.backend == "duckdb" else "BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    self.conn.execute(f"DELETE FROM {table} WHERE key >= ?", (int(frame['key'].iloc[0]),))
+                last = self._last_key(table)
+                if last is not None:
+                    frame = frame[frame['key'] >= last]
+                    if len(frame) and frame['key'].iloc[0] == last:
+                        self.conn.execute(f"DELETE FROM {table} WHERE key = ?", (int(last),))
+                if len(frame):
+                    self._insert(table, frame)
+                    if table == "pool" and self.retained:
+                        self.conn.execute("DELETE FROM pool WHERE key < ?",
+                                          (int(frame['key'].iloc[-1] - self.retention.value),))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return len(frame)
+
+    @property
+    def retained(self):
+        """Whether old pool rows are dropped: an in-memory database with a ``retention``."""
+        return self.retention is not None and self.path == ":memory:"
+
+    def _insert(self, table, frame):
+        if self.backend == "duckdb":
+            self.conn.register("incoming", frame)
+            self.conn.execute(f"INSERT INTO {table} SELECT * FROM incoming")
+            self.conn.unregister("incoming")
+        else:
+            placeholders = ", ".join("?" * len(frame.columns))
+            rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+            self.conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+    def append_pool(self, df, replace=False):
+        return self._append("pool", POOL_COLUMNS, df, replace)
+
+    def append_burns(self, df):
+        return self._append("burns", BURN_COLUMNS, df)
+
+    def on_ingest(self, df, initial):
+        """HistoryStore listener; an initial ingest (restore, re-sync) replaces the rows it covers."""
+        self.append_pool(df, replace=initial)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            cur = self.conn.execute(sql, params)
+            cols = [d[0] for d in cur.description]
+            return pd.DataFrame(cur.fetchall(), columns=cols)
+
+    def _range(self, start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(int(pd.Timestamp(start).timestamp()))
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(int(pd.Timestamp(end).timestamp()))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def blocks_per_epoch(self):
+        """Max cumulative block count per epoch, as ``app`` derives blocks per epoch from."""
+        df = self.query(
+            "SELECT qubic_epoch, MAX(pool_blocks_found) AS pool_blocks_found FROM pool "
+            "WHERE qubic_epoch IS NOT NULL GROUP BY qubic_epoch ORDER BY qubic_epoch"
+        )
+        df['qubic_epoch'] = df['qubic_epoch'].astype('int64')
+        return df.set_index('qubic_epoch')['pool_blocks_found']
+
+    def hashrate_mean(self, seconds=HOUR, start=None, end=None, offset=0):
+        where, params = self._range(start, end)
+        bucket = bucket_expr(seconds, offset)
+        df = self.query(
+            f"SELECT {bucket} AS bucket, AVG(pool_hashrate) AS pool_hashrate, AVG(network_hashrate) AS network_hashrate "
+            f"FROM pool{where} GROUP BY bucket ORDER BY bucket", params
+        )
+        return _with_time_index(df)
+
+    def blocks_per_bucket(self, seconds=HOUR, start=None, end=None, offset=0):
+        where, params = self._range(start, end)
+        bucket = bucket_expr(seconds, offset)
+        df = self.query(
+            f"SELECT {bucket} AS bucket, SUM(blocks_delta) AS blocks FROM pool{where} "
+            f"{'AND' if where else 'WHERE'} blocks_delta > 0 GROUP BY bucket ORDER BY bucket", params
+        )
+        return _with_time_index(df)
+
+    def window_summary(self, start, end=None):
+        """Mean pool hashrate and blocks found in [start, end], as the top-row cards show them."""
+        where, params = self._range(start, end)
+        row = self.query(
+            f"SELECT AVG(pool_hashrate) AS pool_hashrate, COALESCE(SUM(CASE WHEN blocks_delta > 0 THEN blocks_delta END), 0) "
+            f"AS blocks, COUNT(*) AS rows FROM pool{where}", params
+        ).iloc[0]
+        return {'pool_hashrate': row['pool_hashrate'], 'blocks': int(row['blocks']), 'rows': int(row['rows'])}
+
+    def burns_per_week(self, start=None, end=None):
+        where, params = self._range(start, end)
+        bucket = bucket_expr(WEEK, MONDAY_OFFSET)
+        df = self.query(
+            f"SELECT {bucket} AS bucket, SUM(qubic_amount) AS qubic_amount, SUM(usdt_value) AS usdt_value, "
+            f"COUNT(*) AS burns FROM burns{where} GROUP BY bucket ORDER BY bucket", params
+        )
+        return _with_time_index(df)
+
+    def burn_totals(self):
+        row = self.query("SELECT SUM(qubic_amount) AS qubic, SUM(usdt_value) AS usdt FROM burns").iloc[0]
+        return row['qubic'] or 0, row['usdt'] or 0
+
+
+def _with_time_index(df):
+    df['bucket'] = pd.to_datetime(df['bucket'], unit='s')
+    return df.set_index('bucket')
+
+
+def synthetic_pool(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-05-18', periods=n, freq='s'),
+        'pool_hashrate': rng.normal(2e8, 2e7, n),
+        'network_hashrate': rng.normal(5e9, 1e8, n),
+        'pool_blocks_found': np.cumsum(rng.random(n) < 1e-3),
+        'blocks_delta': (rng.random(n) < 1e-3).astype(float),
+        'qubic_epoch': 160 + np.arange(n) // (7 * DAY),
+    })
+
+
+def bench(sizes=(1_000_000, 10_000_000), backend=None, repeat=5):
+    """Query latency of the SQL path vs the pandas groupbys app.py used to run.
+
+    Each query runs once untimed (caches, lazy imports, DuckDB's first-query
+    setup), then the best of ``repeat`` runs is reported. Returns one dict
+    per case with both timings in milliseconds.
+    """
+    results = []
+    for n in sizes:
+        df = synthetic_pool(n)
+        db = AnalyticsDB(backend=backend)
+        db.append_pool(df)
+        cases = {
+            "hourly mean hashrate": (
+                lambda: df.groupby(df['timestamp'].dt.floor('h'))[['pool_hashrate', 'network_hashrate']].mean(),
+                lambda: db.hashrate_mean(HOUR),
+            ),
+            "blocks per epoch": (
+                lambda: df.groupby('qubic_epoch')['pool_blocks_found'].max(),
+                db.blocks_per_epoch,
+            ),
+            "last-24h hourly mean": (
+                lambda: (lambda w: w.groupby(w['timestamp'].dt.floor('h'))['pool_hashrate'].mean())(
+                    df[df['timestamp'] >= df['timestamp'].iloc[-1] - pd.Timedelta(hours=24)]),
+                lambda: db.hashrate_mean(HOUR, start=df['timestamp'].iloc[-1] - pd.Timedelta(hours=24)),
+            ),
+            "last-24h summary": (
+                lambda: (lambda w: (w['pool_hashrate'].mean(), w.loc[w['blocks_delta'] > 0, 'blocks_delta'].sum()))(
+                    df[df['timestamp'] >= df['timestamp'].iloc[-1] - pd.Timedelta(hours=24)]),
+                lambda: db.window_summary(df['timestamp'].iloc[-1] - pd.Timedelta(hours=24)),
+            ),
+        }
+        for name, (pandas_fn, sql_fn) in cases.items():
+            timings = []
+            for fn in (pandas_fn, sql_fn):
+                fn()
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - start)
+                timings.append(best * 1000)
+            results.append({'rows': n, 'case': name, 'pandas_ms': timings[0], 'sql_ms': timings[1], 'backend': db.backend})
+            print(f"{n:>11,} rows  {name:<22} pandas {timings[0]:9.1f} ms   {db.backend} {timings[1]:9.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pool analytics store utilities.")
+    parser.add_argument("--bench", action="store_true", help="compare SQL and pandas aggregation latency")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--backend", choices=["duckdb", "sqlite"])
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.rows, args.backend)
@@ -7,12 +7,58 @@ import ccxt
 import numpy as np
 from datetime import datetime, timedelta
 from plotly.subplots import make_subplots
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import base64
+import os
 import random
+import alerts
+import analytics
+import blockstats
+import charts
+import correlation
+import estimators
+import export
+import fetch
+import heatmap
+import history
+import ohlcv
+import profiling
+import projection
+import quality
+import replay
+import snapshot
+import revenue
+import sharedcache
+import sources
+import stream
+import tokens
 
 # Configuration
-GITHUB_RAW_URL = "http://66.179.92.83/data/qpool_V1.csv"
+GITHUB_RAW_URL = os.environ.get("QPOOL_POOL_URL", "http://66.179.92.83/data/qpool_V1.csv")
+BURN_DATA_URL = os.environ.get("QPOOL_BURN_URL", "http://66.179.92.83/data/qubic_burns.csv")
 REFRESH_INTERVAL = 1  # seconds
+CHART_WINDOW_HOURS = 24  # initial x-range of the time series charts
+# When set, the collector pushes rows to this port (see stream.py) and sessions stop polling
+PUSH_PORT = int(os.environ.get("QPOOL_PUSH_PORT", "0"))
+PUSH_HOST = os.environ.get("QPOOL_PUSH_HOST", "127.0.0.1")  # interface the push endpoint binds to
+SOURCE_WAIT = 2  # seconds the first load waits for other pools; later reruns draw their last snapshot
+TOKEN_WAIT = 2  # seconds a rerun waits for stale token prices before drawing the cached ones
+# When set (":memory:" or a file path), aggregations run as SQL in analytics.py
+ANALYTICS_DB = os.environ.get("QPOOL_ANALYTICS_DB")
+# When set (a history CSV), its rows are replayed through the live pipeline instead of fetched
+REPLAY_PATH = os.environ.get("QPOOL_REPLAY")
+REPLAY_SPEED = float(os.environ.get("QPOOL_REPLAY_SPEED", str(replay.SPEED)))  # times real time
+# Processed state is checkpointed here and restored on startup; set to "" to disable (always off in replay)
+SNAPSHOT_PATH = os.environ.get("QPOOL_SNAPSHOT", "data/snapshot.qps") if not REPLAY_PATH else ""
+# When set (a directory such as /dev/shm/qpool, or redis://...), replicas share one ingest pipeline
+SHARED_CACHE = os.environ.get("QPOOL_SHARED_CACHE")
+OHLCV_DB = os.environ.get("QPOOL_OHLCV_DB", "data/ohlcv.sqlite")
+CANDLE_REFRESH = 300  # seconds between exchange candle top-ups
+SNAPSHOT_INTERVAL = float(os.environ.get("QPOOL_SNAPSHOT_INTERVAL", "60"))  # seconds between checkpoints
+# When set, /export streams history ranges over HTTP on this port (see export.py)
+EXPORT_PORT = int(os.environ.get("QPOOL_EXPORT_PORT", "0"))
+EXPORT_HOST = os.environ.get("QPOOL_EXPORT_HOST", "127.0.0.1")  # interface the export endpoint binds to
+EXPORT_URL = os.environ.get("QPOOL_EXPORT_URL", f"http://localhost:{EXPORT_PORT}")  # as browsers reach it
 
 # Encode the cat image to base64
 cat_image_path = "data/matilda.jpg"
@@ -40,6 +86,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Off by default: ?profile=1 profiles one rerun, QPOOL_PROFILE=1 samples reruns (see profiling.py)
+rerun_profiler = profiling.begin(st.query_params)
+
 
 
 # Custom CSS
@@ -126,30 +175,211 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner="Loading data...")
+prepare_frame = history.prepare_frame
+
+@st.cache_resource
+def pool_feed():
+    """Last good pool snapshot, revalidated in the background every REFRESH_INTERVAL."""
+    fetcher = fetch.Fetcher(GITHUB_RAW_URL)
+    store = history_store()
+
+    def load():
+        # Only the rows the store doesn't hold yet (from its last one, so matches() still sees it)
+        # are kept between polls; a rewritten upstream is kept whole to rebuild from
+        df = prepare_frame(fetcher.read_frame())
+        return history.time_slice(df, start=store.last_timestamp) if store.matches(df) else df
+    # A restored history is served right away while the first download runs in the background
+    initial = store.last_row() if store.last_timestamp is not None else None
+    return fetch.StaleWhileRevalidate(load, ttl=REFRESH_INTERVAL, initial=initial)
+
+def read_feed(feed, label):
+    """Value of a stale-while-revalidate feed; only the very first load blocks the page."""
+    if not feed.has_value:
+        with st.spinner(f"Loading {label}..."):
+            value = feed.get()
+    else:
+        value = feed.get()
+    if feed.last_error is not None:
+        st.warning(f"Upstream {label} unavailable ({feed.last_error}); showing the snapshot from {feed.age:.0f}s ago.")
+    return value
+
 def load_data():
     """Load and preprocess CSV data."""
     try:
-        df = pd.read_csv(f"{GITHUB_RAW_URL}?t={int(time.time())}")
-        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-        if df['timestamp'].isna().any():
-            raise ValueError("Invalid timestamp values in CSV")
-        df.sort_values('timestamp', inplace=True)
-        df['pool_hashrate_mhs'] = df['pool_hashrate'] / 1e6
-        df['network_hashrate_ghs'] = df['network_hashrate'] / 1e9
-        df['block_found'] = df['pool_blocks_found'].diff().fillna(0) > 0
-        # Ensure price columns are numeric
-        for col in ['qubic_usdt', 'close']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
         # Log data summary for debugging
         # st.write(f"Data loaded: {len(df)} rows, Columns: {list(df.columns)}")
         # st.write(f"NaN in close: {df['close'].isna().sum()}, qubic_usdt: {df['qubic_usdt'].isna().sum()}")
-        return df
+        return read_feed(pool_feed(), "data")
     except Exception as e:
         st.error(f"Data loading error: {str(e)}")
         return pd.DataFrame()
 
+@st.cache_resource
+def history_store():
+    """Process-wide, memory-bounded pool history shared by every session."""
+    store = history.HistoryStore()
+    store.gate = quality_gate()
+    store.subscribe(alert_engine().on_ingest)
+    store.subscribe(block_stats().on_ingest)
+    store.subscribe(week_heatmap().on_ingest)
+    store.subscribe(hourly_series().on_ingest)
+    store.subscribe(smoother().on_ingest)
+    store.subscribe(revenue_ledger().on_ingest)
+    if ANALYTICS_DB:
+        store.subscribe(analytics_db().on_ingest)
+    if SNAPSHOT_PATH:
+        snapshot.restore(store, restored_snapshot())
+        # Replicas sharing the path leave it to the writer
+        snapshot.Checkpointer(store, SNAPSHOT_PATH, SNAPSHOT_INTERVAL, feeds={"burns": burn_feed()}, enabled=is_writer)
+    return store
+
+@st.cache_resource
+def quality_gate():
+    """Vectorized checks that flag or quarantine bad pool rows before they reach the history."""
+    return quality.QualityGate()
+
+@st.cache_resource
+def restored_snapshot():
+    """State checkpointed by the previous process, or None."""
+    return snapshot.load(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+
+@st.cache_resource
+def candle_feed():
+    """Exchange candles for QUBIC and XMR from the local cache, topped up in the background."""
+    cache = ohlcv.OHLCVCache(OHLCV_DB)
+
+    def update():
+        # Other replicas read the candles the writer stores
+        if is_writer():
+            cache.update_all()
+        return cache.frames()
+    return fetch.StaleWhileRevalidate(update, ttl=CANDLE_REFRESH, initial=cache.frames())
+
+@st.cache_resource
+def source_registry():
+    """Configured pool feeds (QPOOL_SOURCES), fetched in parallel with per-source caching."""
+    # The dashboard's own feed is read from the history store rather than downloaded twice
+    return sources.SourceRegistry(sources.load_sources(default_url=GITHUB_RAW_URL), prepare_frame,
+                                  stores={GITHUB_RAW_URL: history_store()})
+
+@st.cache_resource
+def token_registry():
+    """Configured Qubic tokens (QPOOL_TOKENS), priced in batched ticker calls with per-token TTLs."""
+    return tokens.TokenRegistry(tokens.load_tokens())
+
+@st.cache_resource
+def analytics_db():
+    """Embedded SQL copy of the pool and burn history (DuckDB, else SQLite)."""
+    # Only the writer replica keeps the file; the others fill their own copy from their store,
+    # keeping as many days as the store keeps raw
+    return analytics.AnalyticsDB(ANALYTICS_DB if is_writer() else ":memory:",
+                                 retention=pd.Timedelta(days=history_store().raw_days))
+
+@st.cache_resource
+def block_stats():
+    """Block interval histograms, overall and per epoch, updated as rows arrive."""
+    return blockstats.BlockStats()
+
+@st.cache_resource
+def week_heatmap():
+    """Blocks and hashrate by UTC hour and weekday, updated as rows arrive."""
+    return heatmap.WeekHeatmap()
+
+@st.cache_resource
+def hourly_series():
+    """Hourly pool hashrate and prices for the correlation view, updated as rows arrive."""
+    return correlation.HourlySeries()
+
+@st.cache_resource
+def smoother():
+    """EWMA, rolling-median and Kalman estimates of hashrate and pool share, updated as rows arrive."""
+    return estimators.Smoother()
+
+@st.cache_resource
+def revenue_ledger():
+    """XMR and USD value of found blocks per hour, day and epoch, updated as rows arrive."""
+    return revenue.RevenueLedger()
+
+@st.cache_resource
+def alert_engine():
+    """Cat-alysts rule engine, evaluated once per ingested row for the whole process."""
+    engine = alerts.AlertEngine(alerts.load_rules(), alerts.sinks_from_env())
+    # Replayed history raises alerts on the page but never sends them
+    engine.deliver = not REPLAY_PATH
+    return engine
+
+@st.cache_resource
+def row_broker():
+    """Rows the collector pushes to PUSH_PORT (or the replay publishes); the port is bound once per process."""
+    if REPLAY_PATH:
+        return replayer().broker
+    broker = stream.RowBroker()
+    stream.serve(broker, host=PUSH_HOST, port=PUSH_PORT)
+    return broker
+
+@st.cache_resource(show_spinner="Loading data...")
+def live_feed():
+    """History fetched once per process, then kept current by rows the collector pushes (or a replay)."""
+    store = history_store()
+    broker = row_broker()
+    if REPLAY_PATH:
+        feed = stream.LiveFeed(broker, store, prepare_frame)
+        replayer().start()
+        return feed
+    fetcher = fetch.Fetcher(GITHUB_RAW_URL)
+
+    def resync():
+        ingest_checked(store, prepare_frame(fetcher.read_frame()))
+    # Rows pushed while the history downloads are picked up from the broker afterwards.
+    # If the download fails nothing is cached and the next rerun tries again
+    seq = broker.seq
+    resync()
+    return stream.LiveFeed(broker, store, prepare_frame, resync=resync, seq=seq)
+
+@st.cache_resource
+def export_server():
+    """HTTP export endpoint over the shared history and the latest burns."""
+    feed = burn_feed()
+    return export.serve(history_store(), lambda: feed.value if feed.has_value else pd.DataFrame(),
+                        host=EXPORT_HOST, port=EXPORT_PORT)
+
+@st.cache_resource
+def replayer():
+    """Recorded rows from QPOOL_REPLAY, published at QPOOL_REPLAY_SPEED once the live feed starts."""
+    return replay.Replayer(replay.read_history(REPLAY_PATH), REPLAY_SPEED)
+
+@st.cache_resource
+def shared_backend():
+    """Cross-replica cache backend (QPOOL_SHARED_CACHE); the replica holding its writer lock is the writer."""
+    backend = sharedcache.open_backend(SHARED_CACHE)
+    backend.try_acquire()
+    return backend
+
+def is_writer():
+    """Whether this replica writes shared files (snapshot, analytics DB, candle cache); always without a shared cache."""
+    return not SHARED_CACHE or shared_backend().is_writer
+
+@st.cache_resource(show_spinner="Loading data...")
+def shared_cache():
+    """History channel between replicas; the writer fetches and publishes, the others sync from it."""
+    backend = shared_backend()
+    store, feed = history_store(), pool_feed()
+    channel = sharedcache.HistoryChannel(backend, store)
+
+    def refresh():
+        ingest_checked(store, feed.get())
+        channel.publish()
+    publisher = sharedcache.Publisher(backend, "history", refresh, interval=REFRESH_INTERVAL)
+    publisher.step()
+    publisher.start()
+    return channel
+
+def ingest_checked(store, df):
+    """Ingest ``df``, rebuilding the store first if upstream no longer matches it (e.g. a stale snapshot)."""
+    if not store.matches(df):
+        store.reset()
+    store.ingest(df)
+
 def format_hashrate(h):
     """Format hashrate values for display."""
     if pd.isna(h):
@@ -166,6 +396,14 @@ def format_timespan(delta):
     if delta.days > 0: return f"{delta.days}d {delta.seconds//3600}h ago"
     return f"{delta.seconds//3600}h {(delta.seconds%3600)//60}m ago"
 
+def format_interval(seconds):
+    """Format a duration in seconds for display."""
+    if pd.isna(seconds):
+        return "N/A"
+    if seconds >= 86400: return f"{seconds // 86400:.0f}d {seconds % 86400 / 3600:.0f}h"
+    if seconds >= 3600: return f"{seconds // 3600:.0f}h {seconds % 3600 / 60:.0f}m"
+    return f"{seconds / 60:.1f} min"
+
 def downsample(df, interval='5T'):
     """Downsample DataFrame while preserving key points (ATH, blocks)."""
     if df.empty:
@@ -194,15 +432,126 @@ def downsample(df, interval='5T'):
     df_combined['block_found'] = df_combined['pool_blocks_found'].diff().fillna(0) > 0
 
     return df_combined
+
+HEATMAP_METRICS = {
+    'Blocks found': ('blocks', 'blocks', ',.0f'),
+    'Blocks per hour': ('blocks_per_hour', 'blocks/h', '.3f'),
+    'Mean hashrate': ('hashrate', 'MH/s', ',.2f'),
+}
+
+CHART_COLUMNS = ['timestamp', 'pool_hashrate', 'pool_hashrate_mhs', 'network_hashrate', 'network_hashrate_ghs',
+                 'pool_blocks_found', 'block_found', 'qubic_usdt', 'close']
+
+def data_version(df):
+    """Cheap identity of a loaded frame: row count and last timestamp."""
+    if df.empty:
+        return (0, None)
+    return (len(df), df['timestamp'].iloc[-1].value)
+
+# Figures and chart frames are computed once per data version for the whole
+# process, but st.cache_data hands every caller its own copy, so a session
+# changing one (say, update_layout on a figure) never changes what other
+# viewers see. Arguments prefixed with "_" are not hashed: the version key
+# stands in for the data, so entries only change when new rows arrive.
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_chart_frame(version):
+    """Downsampled chart frame, clipped so it is safe for log axes."""
+    df_chart = downsample(history_store().window(columns=CHART_COLUMNS))
+
+    # Sanitaze for log
+    df_chart['pool_hashrate_mhs'] = df_chart['pool_hashrate_mhs'].clip(lower=1e-1)
+    df_chart['network_hashrate_ghs'] = df_chart['network_hashrate_ghs'].clip(lower=1e-1)
+    return df_chart
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_hashrate_figure(version, window_hours, use_log_scale, _df_chart, _ath_val):
+    return charts.build_hashrate_figure(_df_chart, use_log_scale, _ath_val, window_hours)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_share_figure(version, window_hours, _df_chart, _smoothed):
+    return charts.build_share_figure(_df_chart, _smoothed, window_hours)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_price_figure(version, window_hours, _df_chart):
+    return charts.build_price_figure(_df_chart)
+
+@st.cache_data(max_entries=6, show_spinner=False)
+def cached_revenue_figure(version, period):
+    return charts.build_revenue_figure(revenue_ledger().series(period), period)
+
+@st.cache_data(max_entries=6, show_spinner=False)
+def cached_heatmap_figure(version, label):
+    metric, unit, fmt = HEATMAP_METRICS[label]
+    grid = week_heatmap().grid(metric)
+    if metric == 'hashrate':
+        grid = grid / 1e6
+    return charts.build_heatmap_figure(grid, label, unit, fmt)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_epoch_blocks(version):
+    """Block counter at the end of every epoch in the history."""
+    df = history_store().window(columns=['qubic_epoch', 'pool_blocks_found'])
+    return df.groupby('qubic_epoch')['pool_blocks_found'].max()
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def cached_projection(version, _now, _epoch, _blocks_so_far):
+    """Monte Carlo projection of this epoch's blocks from the smoothed share, and its fan chart."""
+    smoothed = smoother().latest()
+    if not smoothed:
+        return None, None
+    now = _now
+    # No epoch is longer than EPOCH_LENGTH, so its rows are all in this window
+    _df = history_store().window(start=now - projection.EPOCH_LENGTH, columns=['timestamp', 'qubic_epoch', 'blocks_delta'])
+    # Seeded by the data version, so every rerun and session between two rows shows the same bands
+    result = projection.project(smoothed['share'], projection.share_dispersion(smoother().frame()), now,
+                                _blocks_so_far, seed=version[1] % 2**32)
+    if result is None:
+        return None, None
+    epoch_rows = _df[_df['qubic_epoch'] == _epoch]
+    found = epoch_rows['blocks_delta'].cumsum() + (_blocks_so_far - epoch_rows['blocks_delta'].sum())
+    start = pd.DataFrame({'timestamp': epoch_rows['timestamp'].iloc[:1], 'blocks': found.iloc[:1] - epoch_rows['blocks_delta'].iloc[:1]})
+    steps = pd.DataFrame({'timestamp': epoch_rows['timestamp'], 'blocks': found})[epoch_rows['blocks_delta'].to_numpy() > 0]
+    actual = pd.concat([start, steps, pd.DataFrame({'timestamp': [now], 'blocks': [_blocks_so_far]})], ignore_index=True)
+    return result, charts.build_projection_figure(result['fan'], actual)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def cached_pools_figure(versions, _frames):
+    """Hashrate of every pool on a shared time axis; ``versions`` changes when any source has new rows."""
+    merged = sources.merge_on_time(_frames, 'pool_hashrate')
+    return charts.build_pools_figure(merged) if not merged.empty else None
+
+@st.cache_data(max_entries=6, show_spinner=False)
+def cached_correlation(version, window_label, _candles):
+    """Correlation analysis of the hourly series for one window; ``version`` changes once an hour."""
+    hours = hourly_series().frame(correlation.candle_prices(_candles))
+    result = correlation.analyze(hours, correlation.WINDOWS[window_label])
+    return result, charts.build_correlation_figures(result, window_label)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_candle_figure(version, _candles):
+    return charts.build_candle_figure(_candles)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_burn_figure(version, since, _df_burn):
+    return charts.build_burn_figure(_df_burn[_df_burn['timestamp'] > since])
     
-@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner="Loading burn data...")
+def prepare_burns(df):
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['qubic_amount'] = pd.to_numeric(df['qubic_amount'], errors='coerce')
+    df['usdt_value'] = pd.to_numeric(df['usdt_value'], errors='coerce')
+    return df.sort_values('timestamp')
+
+@st.cache_resource
+def burn_feed():
+    fetcher = fetch.Fetcher(BURN_DATA_URL)
+    state = restored_snapshot()
+    initial = state["extra"].get("burns") if state else None
+    return fetch.StaleWhileRevalidate(lambda: prepare_burns(fetcher.read_frame()), ttl=REFRESH_INTERVAL, initial=initial)
+
 def load_burn_data():
     try:
-        df = pd.read_csv("http://66.179.92.83/data/qubic_burns.csv")
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['qubic_amount'] = pd.to_numeric(df['qubic_amount'], errors='coerce')
-        df['usdt_value'] = pd.to_numeric(df['usdt_value'], errors='coerce')
-        return df.sort_values('timestamp')
+        # Copy: the burn table below renames columns in place
+        return read_feed(burn_feed(), "burn data").copy()
     except Exception as e:
         st.error(f"Failed to load burn data: {str(e)}")
         return pd.DataFrame()
@@ -295,7 +644,22 @@ def generate_funny_pool_stats(df: pd.DataFrame):
 
 
 # Load data
-df = load_data()
+if PUSH_PORT or REPLAY_PATH:
+    try:
+        live_feed().pull()
+    except Exception as e:
+        st.error(f"Data loading error: {str(e)}")
+elif SHARED_CACHE:
+    # The writer replica ingests in its publisher thread; others pick up what it published
+    channel = shared_cache()
+    alert_engine().deliver = is_writer()
+    if not is_writer() and channel.sync() is None:
+        ingest_checked(history_store(), load_data())
+else:
+    ingest_checked(history_store(), load_data())
+# The page draws from the last day of rows; longer views read their own window of the store
+df = history_store().window(start=history_store().last_timestamp - timedelta(hours=24)) \
+    if history_store().last_timestamp is not None else pd.DataFrame()
 
 st.markdown("""
 <div style="text-align: left; margin-bottom: 2rem;">
@@ -306,19 +670,30 @@ st.markdown("""
 
 # Metric Cards (Top Row)
 if not df.empty:
+    version = data_version(df)
     latest = df.iloc[-1]
-    six_hr = df[df['timestamp'] >= (df['timestamp'].max() - timedelta(hours=6))]
-    day_av = df[df['timestamp'] >= (df['timestamp'].max() - timedelta(hours=24))]
-    mean_hash_6h = six_hr['pool_hashrate'].mean() / 1e6 if not six_hr.empty else 0
-    mean_hash_24h = day_av['pool_hashrate'].mean() / 1e6 if not day_av.empty else 0
-    ath_val = df['pool_hashrate'][:-1].max() if len(df) > 1 else latest['pool_hashrate']
-    ath_time = df[df['pool_hashrate'] == ath_val]['timestamp'].iloc[0].strftime('%Y-%m-%d') if not df.empty else "N/A"
-    last_block = df[df['block_found']]['timestamp'].iloc[-1] if df['block_found'].any() else None
+    ath_row = history_store().ath_row.iloc[0]
+    # Windows are positional slices of the sorted frame, not filtered copies
+    six_hr = history.time_slice(df, start=latest['timestamp'] - timedelta(hours=6))
+    day_av = history.time_slice(df, start=latest['timestamp'] - timedelta(hours=24))
+    if ANALYTICS_DB:
+        summary_6h = analytics_db().window_summary(latest['timestamp'] - timedelta(hours=6))
+        summary_24h = analytics_db().window_summary(latest['timestamp'] - timedelta(hours=24))
+        mean_hash_6h = summary_6h['pool_hashrate'] / 1e6 if summary_6h['rows'] else 0
+        mean_hash_24h = summary_24h['pool_hashrate'] / 1e6 if summary_24h['rows'] else 0
+    else:
+        mean_hash_6h = six_hr['pool_hashrate'].mean() / 1e6 if not six_hr.empty else 0
+        mean_hash_24h = day_av['pool_hashrate'].mean() / 1e6 if not day_av.empty else 0
+    ath_val = ath_row['pool_hashrate']
+    ath_time = ath_row['timestamp'].strftime('%Y-%m-%d')
+    # Full interval distribution and the exponential expectation at the current pool share
+    interval_stats = block_stats().summary(latest['pool_hashrate'], latest['network_hashrate'])
+    last_block = interval_stats['last_block']
     time_since_block = format_timespan(latest['timestamp'] - last_block) if last_block else "No block"
     
     # Count blocks in the last 24 hours
-    blocks_last_24h = df[df['timestamp'] >= (df['timestamp'].max() - timedelta(hours=24))]
-    blocks_24h_count = blocks_last_24h['block_found'].sum()
+    blocks_last_24h = day_av
+    blocks_24h_count = summary_24h['blocks'] if ANALYTICS_DB else blocks_last_24h['block_found'].sum()
     # Calculate mean time between blocks (in minutes) for the last 24h
     block_times = blocks_last_24h[blocks_last_24h['block_found']]['timestamp']
     if len(block_times) > 1:
@@ -328,7 +703,11 @@ if not df.empty:
         mean_block_time_min = None
 
     # Get max blocks found per epoch
-    epoch_blocks = df.groupby('qubic_epoch')['pool_blocks_found'].max()
+    epoch_blocks = analytics_db().blocks_per_epoch() if ANALYTICS_DB and not analytics_db().retained else None
+    if epoch_blocks is None or epoch_blocks.empty:
+        # A new analytics DB can still be empty on first start, and an in-memory one lacks older
+        # epochs; the store (rollups included) always has them
+        epoch_blocks = cached_epoch_blocks(version)
     
     # Calculate number of blocks per epoch by diff
     blocks_per_epoch = epoch_blocks.diff().fillna(epoch_blocks.iloc[0]).astype(int)
@@ -337,9 +716,6 @@ if not df.empty:
     current_epoch = epoch_blocks.index[-1]
     previous_epoch = epoch_blocks.index[-2] if len(epoch_blocks) > 1 else None
 
-    # Calculate delta in blocks found
-    df["blocks_delta"] = df["pool_blocks_found"].diff().fillna(0)
-    
     if latest['pool_blocks_found'] == 100:
         st.balloons()
         st.markdown("""
@@ -375,7 +751,9 @@ if not df.empty:
             """, unsafe_allow_html=True)
     
     #tab1, tab2, tab3, tab4 = st.tabs(["Pool Stats", "QUBIC/XMR", "Token Burns", "Hall of Fame"])
-    tab1, tab2, tab3 = st.tabs(["Pool Stats", "QUBIC/XMR", "Token Burns"])
+    multi_pool = len(source_registry().sources) > 1
+    tabs = st.tabs(["Pool Stats", "QUBIC/XMR", "Token Burns", "Tokens"] + (["Pools"] if multi_pool else []))
+    tab1, tab2, tab3, tab4 = tabs[:4]
     with tab1: 
         col1, col2 = st.columns([1,3])
         with col1:
@@ -402,7 +780,15 @@ if not df.empty:
                 st.markdown(f"""
                 <div class="metric-card">
                     <div class="metric-title">Previous epoch ({previous_epoch}) </div>
-                    <div class="metric-value">{blocks_per_epoch.loc[previous_epoch]}</div>
+                    <div class="metric-value">{blocks_per_epoch.loc[previous_epoch] if previous_epoch is not None else 'N/A'}</div>
+                </div>
+                """, unsafe_allow_html=True)
+            epoch_projection, projection_fig = cached_projection(version, latest['timestamp'], current_epoch, int(blocks_per_epoch.loc[current_epoch]))
+            if epoch_projection is not None:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">Epoch {current_epoch} projection (P10 / P50 / P90)</div>
+                    <div class="metric-value">{epoch_projection['p10']} / {epoch_projection['p50']} / {epoch_projection['p90']}</div>
                 </div>
                 """, unsafe_allow_html=True)
             st.markdown(f"""
@@ -412,6 +798,14 @@ if not df.empty:
                     {f"{mean_block_time_min:.1f} min" if mean_block_time_min else "N/A"}
                 </div>
             </div>
+            <div class="metric-card">
+                <div class="metric-title">Block Interval P50 / P90 (all time)</div>
+                <div class="metric-value">{format_interval(interval_stats['p50'])} / {format_interval(interval_stats['p90'])}</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-title">Expected Time to Block</div>
+                <div class="metric-value">{format_interval(interval_stats['expected'])}</div>
+            </div>
             """, unsafe_allow_html=True)
             st.markdown(f"""
                 <div class="metric-card">
@@ -449,102 +843,64 @@ if not df.empty:
             use_log_scale = st.toggle("Use Log Scale", value=False)
             
             if not df.empty:
-                df_chart = downsample(df)
-
-                # Sanitaze for log
-                df_chart['pool_hashrate_mhs'] = df_chart['pool_hashrate_mhs'].clip(lower=1e-1)
-                df_chart['network_hashrate_ghs'] = df_chart['network_hashrate_ghs'].clip(lower=1e-1)
-
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=df_chart['timestamp'],
-                    y=df_chart['pool_hashrate_mhs'],
-                    name='Pool Hashrate (MH/s)',
-                    line=dict(color='#4cc9f0'),
-                    hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Pool: %{y:.2f} MH/s<extra></extra>'
-                ))
-                fig.add_trace(go.Scatter(
-                    x=df_chart['timestamp'],
-                    y=df_chart['network_hashrate_ghs'],
-                    name='Network Hashrate (GH/s)',
-                    line=dict(color='#f72585', dash='dot'),
-                    yaxis='y2',
-                    hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Network: %{y:.2f} GH/s<extra></extra>'
-                ))
-
-                
-
-                blocks = df_chart[df_chart['block_found']]
-                fig.add_trace(go.Scatter(
-                    x=blocks['timestamp'],
-                    y=blocks['pool_hashrate_mhs'],
-                    mode='markers',
-                    name='Block Found',
-                    marker=dict(symbol='star', size=12, color='gold', line=dict(width=1, color='black')),
-                    hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Block Found<extra></extra>'
-                ))
-                
-                # Convert to MH/s
-                ath_val_mhs = ath_val / 1e6
-                
-                if not use_log_scale:
-                    fig.add_hline(
-                        y=ath_val_mhs,
-                        line_dash="longdash",
-                        line_color="gold",
-                        annotation_text=f"ATH: {ath_val_mhs:,.0f} MH/s",
-                        annotation_position="top left",
-                        annotation_font_color="gold"
-                    )
-
-                # Calculate the time range for the last 24 hours
-                end_time = df_chart['timestamp'].max()
-                start_time = end_time - timedelta(hours=24)
-            
-                fig.update_layout(
-                    xaxis=dict(
-                        title='Time',
-                        gridcolor='rgba(255,255,255,0.1)',
-                        range=[start_time, end_time],
-                        rangeslider=dict(visible=True, thickness=0.1),
-                        rangeselector=dict(
-                            buttons=list([
-                                dict(count=1, label="1h", step="hour", stepmode="backward"),
-                                dict(count=6, label="6h", step="hour", stepmode="backward"),
-                                dict(count=12, label="12h", step="hour", stepmode="backward"),
-                                dict(count=24, label="24h", step="hour", stepmode="backward"),
-                                dict(step="all", label="All")
-                            ]),
-                            bgcolor='rgba(32, 46, 60, 0.9)',
-                            font=dict(color='white'),
-                            activecolor='#4cc9f0'
-                        ),
-                        type='date'
-                    ),
-                    yaxis=dict(
-                        title='Pool Hashrate (MH/s)',
-                        gridcolor='rgba(255,255,255,0.1)',
-                        type='log' if use_log_scale else 'linear'
-                    ),
-                    yaxis2=dict(
-                        title='Network Hashrate (GH/s)',
-                        overlaying='y',
-                        side='right',
-                        gridcolor='rgba(255,255,255,0.1)',
-                        type='log' if use_log_scale else 'linear'
-                    ),
-                    margin=dict(t=5, b=10, l=10, r=10),
-                    height=400,
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=True,
-                    legend=dict(x=0.5, y=1, orientation='h'),
-                    hovermode='x unified'
-                )
+                df_chart = cached_chart_frame(version)
+                fig = cached_hashrate_figure(version, CHART_WINDOW_HOURS, use_log_scale, df_chart, ath_val)
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("No hashrate data available.")
+
+            smoothed = smoother().latest()
+            if smoothed:
+                col2d, col2e = st.columns(2)
+                with col2d:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-title">Pool Share of Network (smoothed)</div>
+                        <div class="metric-value">{smoothed['share'] * 100:.2f}%</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                with col2e:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-title">Expected Blocks / Day</div>
+                        <div class="metric-value">{smoothed['blocks_per_day']:.1f}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                fig_share = cached_share_figure(version, CHART_WINDOW_HOURS, df_chart, smoother().frame())
+                st.plotly_chart(fig_share, use_container_width=True)
+
+            recent_alerts = list(alert_engine().recent)
+            with st.expander(f"🐾 Cat-alysts ({len(recent_alerts)})", expanded=False):
+                if recent_alerts:
+                    st.dataframe(pd.DataFrame(recent_alerts)[['timestamp', 'rule', 'message']], use_container_width=True, hide_index=True)
+                else:
+                    st.caption("All quiet. Alerts for hashrate drops, block droughts, network spikes and big burns show up here.")
+            with st.expander("⏱️ Block intervals per epoch", expanded=False):
+                per_epoch = block_stats().per_epoch()
+                if not per_epoch.empty:
+                    st.dataframe(per_epoch[['count', 'mean', 'p10', 'p50', 'p90', 'max']].div(60).round(1)
+                                 .assign(count=per_epoch['count']).rename(columns=lambda c: c if c == 'count' else f"{c} (min)"),
+                                 use_container_width=True)
+                else:
+                    st.caption("No block intervals yet.")
+            with st.expander("🗓️ Blocks and hashrate by hour and weekday", expanded=False):
+                heat_label = st.radio("Show", list(HEATMAP_METRICS), horizontal=True, key="heatmap_metric")
+                st.plotly_chart(cached_heatmap_figure(week_heatmap().version, heat_label), use_container_width=True)
+                st.caption("All history, UTC. Blocks per hour and mean hashrate are over the time the feed covered each cell.")
+            if projection_fig is not None:
+                with st.expander("🔮 Epoch projection", expanded=False):
+                    st.plotly_chart(projection_fig, use_container_width=True)
+                    st.caption(f"{projection.PATHS:,} simulated paths to the epoch turnover ({epoch_projection['end']:%a %d %b %H:%M} UTC) "
+                               "at the smoothed pool share, each path keeping a share drawn from the last week's day-to-day spread. Mean "
+                               f"{epoch_projection['mean']:.1f} blocks.")
+            # Toast alerts this session hasn't seen yet. Burn and pool alerts interleave out of
+            # timestamp order, so each is known by its key and time rather than by the newest seen
+            current = {(alert['key'], alert['timestamp']) for alert in recent_alerts}
+            seen = st.session_state.setdefault('alerts_seen', current)  # don't replay old alerts on first view
+            for alert in reversed(recent_alerts):
+                if (alert['key'], alert['timestamp']) not in seen:
+                    st.toast(f"🐾 {alert['rule']}: {alert['message']}")
+            st.session_state.alerts_seen = current
             
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -570,72 +926,71 @@ if not df.empty:
                     # Price Chart with Stacked Subplots
                     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
                     if not df_chart.empty:
-                        # Create price chart
-                        fig_prices = go.Figure()
-                        
-                        # Add XMR price
-                        fig_prices.add_trace(go.Scatter(
-                            x=df_chart['timestamp'],
-                            y=df_chart['close'],
-                            mode='lines',
-                            name='XMR Price (USD)',
-                            line=dict(color='limegreen', width=2),
-                            yaxis='y1'
-                        ))
-                        
-                        # Add QUBIC price (on secondary axis)
-                        fig_prices.add_trace(go.Scatter(
-                            x=df_chart['timestamp'],
-                            y=df_chart['qubic_usdt'],
-                            mode='lines',
-                            name='QUBIC Price (USD)',
-                            line=dict(color='magenta', width=2),
-                            yaxis='y2'
-                        ))
-                        
-                        # Calculate the time range for the last 24 hours
-                        end_time = df_chart['timestamp'].max()
-                        start_time = end_time - timedelta(hours=24)
-                        
-                        # Layout with dual y-axes, range slider, and range selector
-                        fig_prices.update_layout(
-                            title='XMR & QUBIC Prices (24h)',
-                            yaxis=dict(
-                                title='XMR Price (USD)',
-                                tickformat='$.2f',
-                                side='left',
-                                showgrid=False
-                            ),
-                            yaxis2=dict(
-                                title='QUBIC Price (USD)',
-                                tickformat='$.9f',
-                                overlaying='y',
-                                side='right',
-                                showgrid=False
-                            ),
-                            legend=dict(
-                                orientation='h',
-                                yanchor='bottom',
-                                y=1.02,
-                                xanchor='right',
-                                x=1
-                            ),
-                            margin=dict(l=40, r=40, t=40, b=40),
-                            height=350,
-                            plot_bgcolor='rgba(0,0,0,0)',
-                            paper_bgcolor='rgba(0,0,0,0)',
-                            font=dict(color='white')
-                        )
+                        fig_prices = cached_price_figure(version, CHART_WINDOW_HOURS, df_chart)
                         
                         st.plotly_chart(fig_prices, use_container_width=True)
                     else:
                         st.warning("No price data available to display.")
                     st.markdown('</div>', unsafe_allow_html=True)                    
+
+                    candles = candle_feed().get()
+                    if any(not c.empty for c in candles.values()):
+                        st.markdown(f"**Market history (daily candles, {ohlcv.EXCHANGE_ID.upper()})**")
+                        candle_version = tuple((symbol, len(c), c['timestamp'].iloc[-1].value if len(c) else None) for symbol, c in candles.items())
+                        st.plotly_chart(cached_candle_figure(candle_version, candles), use_container_width=True)
+                    elif candle_feed().last_error is not None:
+                        st.caption(f"Exchange price history unavailable: {candle_feed().last_error}")
+                    else:
+                        st.caption("Backfilling exchange price history...")
+
+                    # Blocks valued at the nearest XMR price (exchange candles fill gaps in the pool feed)
+                    if not candles.get('XMR/USDT', pd.DataFrame()).empty:
+                        revenue_ledger().add_prices(candles['XMR/USDT'])
+                    ledger = revenue_ledger()
+                    rev_day = ledger.since(latest['timestamp'] - timedelta(hours=24))
+                    rev_epoch = ledger.epoch(current_epoch)
+                    rev_all = ledger.totals_all()
+                    st.markdown("**💰 Block revenue**")
+                    colr1, colr2, colr3 = st.columns(3)
+                    for col, title, rev in ((colr1, "Last 24h", rev_day), (colr2, f"Epoch {current_epoch}", rev_epoch), (colr3, "All time", rev_all)):
+                        with col:
+                            st.markdown(f"""
+                            <div class="metric-card">
+                                <div class="metric-title">Revenue {title} ({rev['blocks']:.0f} blocks)</div>
+                                <div class="metric-value">${rev['usd']:,.0f} · {rev['xmr']:,.2f} XMR</div>
+                            </div>
+                            """, unsafe_allow_html=True)
+                    if rev_all['unpriced_blocks']:
+                        st.caption(f"{rev_all['unpriced_blocks']:.0f} blocks have no XMR price nearby yet and count as $0.")
+                    period = st.radio("Revenue per", ["hour", "day", "epoch"], index=1, horizontal=True)
+                    if rev_all['blocks']:
+                        st.plotly_chart(cached_revenue_figure(ledger.version, period), use_container_width=True)
+
+                    with st.expander("🔗 Price and hashrate correlation", expanded=False):
+                        window_label = st.radio("Window", list(correlation.WINDOWS), index=1, horizontal=True, key="correlation_window")
+                        hours_version = (hourly_series().version, tuple((symbol, len(c)) for symbol, c in candles.items()))
+                        corr_result, (fig_rolling, fig_lags) = cached_correlation(hours_version, window_label, candles)
+                        if corr_result['best'].empty:
+                            st.caption("Not enough hourly history with prices yet.")
+                        else:
+                            st.plotly_chart(fig_rolling, use_container_width=True)
+                            st.plotly_chart(fig_lags, use_container_width=True)
+                            st.dataframe(corr_result['best'], hide_index=True, use_container_width=True,
+                                         column_config={'lag_hours': st.column_config.NumberColumn("strongest lag (h)"),
+                                                        'corr': st.column_config.NumberColumn("correlation", format="%.2f"),
+                                                        'corr_at_0': st.column_config.NumberColumn("at lag 0", format="%.2f")})
+                        st.caption("Hourly log changes. Pool prices missing from the feed are filled from exchange candles.")
     with tab3:
         df_burn = load_burn_data()
         if not df_burn.empty:
-            total_qubic_burned = df_burn['qubic_amount'].sum()
-            total_usdt_burned = df_burn['usdt_value'].sum()
+            alert_engine().process_burns(df_burn)
+        if not df_burn.empty:
+            if ANALYTICS_DB:
+                analytics_db().append_burns(df_burn)
+                total_qubic_burned, total_usdt_burned = analytics_db().burn_totals()
+            else:
+                total_qubic_burned = df_burn['qubic_amount'].sum()
+                total_usdt_burned = df_burn['usdt_value'].sum()
             last_burn = df_burn.iloc[-1]
             
             st.markdown("### 🔥 Token Burn Summary")
@@ -663,26 +1018,9 @@ if not df.empty:
                 """, unsafe_allow_html=True)
     
             st.markdown("### 📈 Burn History (Last 30 Days)")
-            recent_burns = df_burn[df_burn['timestamp'] > (datetime.now() - timedelta(days=30))]
-    
-            fig_burn = go.Figure()
-            fig_burn.add_trace(go.Bar(
-                x=recent_burns['timestamp'],
-                y=recent_burns['qubic_amount'],
-                name='QUBIC Burned',
-                marker_color='crimson',
-                hovertemplate='%{x|%Y-%m-%d %H:%M}<br>%{y:,.0f} QUBIC<extra></extra>'
-            ))
-    
-            fig_burn.update_layout(
-                xaxis_title="Date",
-                yaxis_title="QUBIC Burned",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                margin=dict(l=20, r=20, t=30, b=30),
-                height=300
-            )
+            # Cutoff moves hourly so the cached figure is reused in between
+            burn_since = pd.Timestamp(datetime.now()).floor('h') - timedelta(days=30)
+            fig_burn = cached_burn_figure(data_version(df_burn), burn_since, df_burn)
             st.plotly_chart(fig_burn, use_container_width=True)
                 
             latest_qubic_price = df_chart['qubic_usdt'].iloc[-1] if not df_chart.empty else 0
@@ -707,12 +1045,79 @@ if not df.empty:
         else:
             st.warning("No token burn data available.")
 
+    with tab4:
+        token_registry().fetch_all(wait=TOKEN_WAIT)
+        st.dataframe(
+            token_registry().table(),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'symbol': "Token",
+                'name': "Name",
+                'exchange': "Exchange",
+                'market': "Market",
+                'price': st.column_config.NumberColumn("Price", format="%.8g"),
+                'change_24h_pct': st.column_config.NumberColumn("24h %", format="%.2f%%"),
+                'volume_24h': st.column_config.NumberColumn("24h Volume (quote)", format="compact"),
+                'age_s': st.column_config.NumberColumn("Age (s)", format="%.0f"),
+                'status': "Status",
+            }
+        )
+
+    if multi_pool:
+        with tabs[4]:
+            pool_frames = source_registry().fetch_all(wait=SOURCE_WAIT)
+            totals = sources.aggregate_metrics(pool_frames)
+            colp1, colp2, colp3 = st.columns(3)
+            with colp1:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">Pools Reporting</div>
+                    <div class="metric-value">{totals['pools']} / {len(source_registry().sources)}</div>
+                </div>
+                """, unsafe_allow_html=True)
+            with colp2:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">Combined Hashrate</div>
+                    <div class="metric-value">{format_hashrate(totals['pool_hashrate'])}</div>
+                </div>
+                """, unsafe_allow_html=True)
+            with colp3:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">Combined Blocks Found</div>
+                    <div class="metric-value">{totals['pool_blocks_found']}</div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            fig_pools = cached_pools_figure(source_registry().versions(), pool_frames)
+            if fig_pools is not None:
+                st.plotly_chart(fig_pools, use_container_width=True)
+            else:
+                st.info("Waiting for the first pool snapshots...")
+            with st.expander("Source status"):
+                st.dataframe(source_registry().status(), use_container_width=True, hide_index=True)
+
+
+if PUSH_PORT or REPLAY_PATH:
+    @st.fragment(run_every=0.5)
+    def follow_live_feed():
+        """Rerun the page as soon as the broker holds rows this session hasn't drawn."""
+        seq = row_broker().seq
+        if st.session_state.setdefault("feed_seq", seq) != seq:
+            st.session_state.feed_seq = seq
+            st.rerun()
+
+    follow_live_feed()
 
 bcol1, bcol2 = st.columns(2)
 with bcol1:
     # Manual Refresh Button
     if st.button("🔄 Refresh Data", key="refresh"):
         st.cache_data.clear()
+        pool_feed().invalidate()
+        burn_feed().invalidate()
         st.rerun()
 
 with bcol2:
@@ -757,6 +1162,66 @@ with bcol2:
             </a>
         """, unsafe_allow_html=True)
 
+with st.expander("⬇️ Export history"):
+    if df.empty:
+        st.info("No history loaded yet.")
+    else:
+        ecol1, ecol2, ecol3 = st.columns([1, 2, 1])
+        dataset = ecol1.selectbox("Data", export.DATASETS, format_func={'pool': "Pool stats", 'burns': "Token burns"}.get)
+        first_day, last_day = history_store().first_timestamp.date(), history_store().last_timestamp.date()
+        burns = load_burn_data() if dataset == 'burns' else pd.DataFrame()
+        if not burns.empty:
+            first_day, last_day = burns['timestamp'].iloc[0].date(), burns['timestamp'].iloc[-1].date()
+        days = ecol2.date_input("Range", (max(first_day, last_day - timedelta(days=7)), last_day),
+                                min_value=first_day, max_value=last_day)
+        fmt = ecol3.radio("Format", list(export.FORMATS) if export.pa is not None else ["csv"], horizontal=True)
+        if len(days) == 2:
+            start, end = pd.Timestamp(days[0]), pd.Timestamp(days[1]) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+            # Encoded only on click, chunk by chunk; the export API streams without holding the file at all
+            st.download_button(
+                "Download", lambda: b"".join(export.export(dataset, history_store(), load_burn_data(), start, end, fmt)),
+                file_name=export.file_name(dataset, start, end, fmt), mime=export.FORMATS[fmt])
+            if EXPORT_PORT:
+                export_server()
+                st.link_button("Stream from the export API", f"{EXPORT_URL}/export?dataset={dataset}&format={fmt}"
+                               f"&start={start.isoformat()}&end={end.isoformat()}")
+
+with st.expander("🩺 Diagnostics"):
+    mem = history_store().stats()
+    st.markdown(f"""
+    **History in memory:** {mem['memory_mb']:.1f} MB of {mem['ceiling_mb']:.0f} MB ceiling  
+    **Raw rows:** {mem['raw_rows']:,} ({mem['raw_days']:.1f} of {mem['raw_days_target']:.0f} days) · **Rollup rows:** {mem['rollup_rows']:,}  
+    **Raw tier:** {mem['raw_mb']:.1f} MB as change points ({mem['raw_dense_mb']:.1f} MB dense)
+    """)
+    if mem['raw_days'] < 0.9 * mem['raw_days_target'] and mem['rollup_rows']:
+        st.caption("Memory ceiling reached: the raw window has been shortened to stay under it.")
+    dq = quality_gate().summary()
+    st.markdown(f"""
+    **Data quality:** {dq['rows']:,} rows checked · {dq['quarantined']:,} quarantined ({dq['quarantine_rate']:.2%}) · {dq['gaps']:,} gaps ({dq['gap_hours']:.1f} h)  
+    **Quarantined:** {dq['duplicate']:,} duplicates ({dq['duplicate_rate']:.3%}) · {dq['spike']:,} hashrate spikes · {dq['invalid']:,} invalid · {dq['counter']:,} block counter / {dq['height']:,} height regressions · **Stuck network feed:** {dq['stuck']:,} rows
+    """)
+    if dq['quarantined']:
+        st.dataframe(quality_gate().recent(), hide_index=True, use_container_width=True,
+                     column_order=['timestamp', 'reason', 'pool_hashrate', 'network_hashrate', 'network_height', 'pool_blocks_found'])
+    engine = alert_engine()
+    if engine.sinks:
+        sinks = engine.sink_stats()
+        st.markdown(f"**Alert delivery:** {int(sinks['sent'].sum()):,} sent · {int(sinks['failed'].sum()):,} failed"
+                    f" · {engine.dropped:,} dropped (outbox full)")
+        if sinks['failed'].any():
+            st.dataframe(sinks, hide_index=True, use_container_width=True)
+    if REPLAY_PATH:
+        progress, rate = replayer().stats(), replay.throughput(live_feed(), replayer())
+        st.markdown(f"""
+        **Replay:** {progress['published']:,} of {progress['total']:,} rows from `{REPLAY_PATH}`, at {progress['position']} ({progress['speed']:,.0f}× of {REPLAY_SPEED:,.0f}×)  
+        **Pipeline:** {rate['rows_per_sec']:,.0f} rows/s sustained · capacity {rate['capacity']:,.0f} rows/s ({rate['busy']:.0%} busy)
+        """)
+    if "last_profile" in st.session_state:
+        profile_path, profile_top = st.session_state.last_profile
+        st.markdown(f"**Last profiled rerun:** `{profile_path}`")
+        st.dataframe(profile_top, hide_index=True, use_container_width=True,
+                     column_config={'own_s': st.column_config.NumberColumn("own (s)", format="%.4f"),
+                                    'cumulative_s': st.column_config.NumberColumn("cumulative (s)", format="%.4f")})
 
 # Footer
 st.markdown("""
@@ -766,3 +1231,7 @@ st.markdown("""
 💌 <strong>Inspired by:</strong> <a href="https://qubic-xmr.vercel.app/" target="_blank">qubic-xmr.vercel.app</a>
 </div>
 """, unsafe_allow_html=True)
+
+if rerun_profiler is not None:
+    # Shown in the Diagnostics expander from the next rerun on
+    st.session_state.last_profile = profiling.finish(rerun_profiler, get_script_run_ctx().session_id)
@@ -0,0 +1,141 @@
+"""Incremental block-interval statistics.
+
+Inter-block intervals go into a fixed log-spaced histogram (1 s to 60 days,
+``BINS_PER_DECADE`` bins per decade, so percentiles are within about 5%),
+one for all history and one per epoch. Memory and query cost depend only on
+the number of bins, never on how many blocks have been seen, and new rows
+are added as a ``HistoryStore`` listener without rescanning old blocks.
+
+Expected time to the next block assumes exponential inter-arrival times:
+at pool share ``s`` of the network, blocks arrive every
+``MONERO_BLOCK_TIME / s`` seconds on average, independent of how long the
+pool has already waited.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+MONERO_BLOCK_TIME = 120  # seconds
+MIN_INTERVAL = 1.0          # seconds
+MAX_INTERVAL = 60 * 86400.0
+BINS_PER_DECADE = 50
+
+
+class LogHistogram:
+    """Counts on log-spaced bins; quantiles interpolate geometrically inside a bin."""
+
+    def __init__(self, lo=MIN_INTERVAL, hi=MAX_INTERVAL, bins_per_decade=BINS_PER_DECADE):
+        self.log_lo = np.log10(lo)
+        self.step = 1 / bins_per_decade
+        n = int(np.ceil((np.log10(hi) - self.log_lo) * bins_per_decade))
+        self.edges = 10 ** (self.log_lo + self.step * np.arange(n + 1))
+        self.counts = np.zeros(n, dtype=np.int64)
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        idx = ((np.log10(np.clip(values, self.edges[0], self.edges[-1])) - self.log_lo) / self.step).astype(int)
+        np.add.at(self.counts, np.clip(idx, 0, len(self.counts) - 1), 1)
+        self.total += values.sum()
+        self.max = max(self.max, values.max())
+
+    def mean(self):
+        n = self.count
+        return self.total / n if n else np.nan
+
+    def quantile(self, q):
+        n = self.count
+        if not n:
+            return np.nan
+        cum = np.cumsum(self.counts)
+        target = q * n
+        i = int(np.searchsorted(cum, target, side='left'))
+        i = min(i, len(self.counts) - 1)
+        before = cum[i - 1] if i else 0
+        frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        return float(self.edges[i] * (self.edges[i + 1] / self.edges[i]) ** frac)
+
+    def summary(self):
+        """Count, mean and P10/P50/P90/P99 in seconds."""
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'p10': self.quantile(0.1),
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max if self.count else np.nan,
+        }
+
+
+def expected_interval(pool_hashrate, network_hashrate):
+    """Mean seconds between pool blocks at the given hashrates."""
+    if not pool_hashrate or pool_hashrate <= 0 or not network_hashrate:
+        return np.nan
+    return MONERO_BLOCK_TIME * network_hashrate / pool_hashrate
+
+
+def block_probability(pool_hashrate, network_hashrate, seconds):
+    """Chance the pool finds at least one block in the next ``seconds``."""
+    mean = expected_interval(pool_hashrate, network_hashrate)
+    return 1 - np.exp(-seconds / mean) if mean == mean else np.nan
+
+
+class BlockStats:
+    """Block interval distributions, overall and per epoch, fed by ``HistoryStore``."""
+
+    def __init__(self):
+        self.overall = LogHistogram()
+        self.epochs = {}
+        self.last_block = None  # int64 ns timestamp
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.overall = LogHistogram()
+            self.epochs = {}
+            self.last_block = None
+
+    def on_ingest(self, df, initial):
+        """HistoryStore listener: add the intervals ending at blocks in ``df``."""
+        if initial:
+            self.reset()
+        blocks = df[df['blocks_delta'] > 0] if 'blocks_delta' in df.columns else df.iloc[:0]
+        if blocks.empty:
+            return
+        ts = blocks['timestamp'].to_numpy().view('int64')
+        epochs = blocks['qubic_epoch'].to_numpy() if 'qubic_epoch' in blocks.columns else None
+        with self._lock:
+            prev = np.concatenate([[self.last_block], ts[:-1]]) if self.last_block is not None else ts[:-1]
+            ends = ts if self.last_block is not None else ts[1:]
+            intervals = (ends - prev) / 1e9
+            self.overall.add(intervals)
+            if epochs is not None:
+                ending_epochs = epochs if self.last_block is not None else epochs[1:]
+                for epoch in pd.unique(ending_epochs):
+                    if pd.isna(epoch):
+                        continue
+                    hist = self.epochs.setdefault(int(epoch), LogHistogram())
+                    hist.add(intervals[ending_epochs == epoch])
+            self.last_block = int(ts[-1])
+
+    def summary(self, pool_hashrate=None, network_hashrate=None):
+        """Everything the dashboard shows, as plain numbers (seconds)."""
+        with self._lock:
+            out = self.overall.summary()
+            out['last_block'] = pd.Timestamp(self.last_block) if self.last_block is not None else None
+        out['expected'] = expected_interval(pool_hashrate, network_hashrate)
+        return out
+
+    def per_epoch(self):
+        with self._lock:
+            rows = {epoch: hist.summary() for epoch, hist in sorted(self.epochs.items())}
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis('qubic_epoch')
@@ -0,0 +1,237 @@
+"""Change-point (run-length) storage for near-constant pool snapshots.
+
+Consecutive collector rows are mostly identical: hashrates, height, block
+count and the pool config only change every few rows or never. A
+``ChangePointFrame`` keeps timestamps dense and, per column, only the row
+positions where the value changed and the new values. Dense columns for a
+time window are rebuilt on demand with ``np.repeat`` over the runs that
+overlap it, so decoding costs O(rows in the window). Storage is lossless:
+a decoded frame equals the one that was appended.
+
+Batches needn't agree on columns or dtypes: a column's stored values are
+widened to hold every batch (int64 then float64 becomes float64, mixed
+kinds become object), a column missing from a batch is NaN (None for
+object columns) for its rows, and a column first seen in a later batch is
+NaN for the rows before it.
+"""
+import numpy as np
+import pandas as pd
+
+
+class _Buffer:
+    """Append-only NumPy array with amortized O(1) growth."""
+
+    def __init__(self, dtype):
+        self.data = np.empty(16, dtype=dtype)
+        self.n = 0
+
+    def extend(self, values):
+        need = self.n + len(values)
+        if need > len(self.data):
+            grown = np.empty(max(need, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+        self.data[self.n:need] = values
+        self.n = need
+
+    @classmethod
+    def of(cls, values):
+        buf = cls(values.dtype)
+        buf.extend(values)
+        return buf
+
+    def view(self):
+        return self.data[:self.n]
+
+    def astype(self, dtype):
+        self.data = self.data.astype(dtype)
+
+    def keep_from(self, i):
+        self.data = self.data[i:self.n].copy()
+        self.n -= i
+
+    @property
+    def nbytes(self):
+        if self.data.dtype == object:
+            # The values themselves, not just the pointers to them
+            return int(pd.Series(self.view()).memory_usage(index=False, deep=True))
+        return self.n * self.data.itemsize
+
+
+def _common_dtype(a, b):
+    """A dtype that holds values of both ``a`` and ``b`` without truncating either."""
+    if a == b:
+        return a
+    if a.kind in 'iuf' and b.kind in 'iuf':
+        return np.result_type(a, b, np.float64) if 'f' in (a.kind, b.kind) else np.result_type(a, b)
+    return np.dtype(object)
+
+
+def _missing(dtype, n):
+    """``n`` missing values, and the dtype that can hold them alongside ``dtype``."""
+    if dtype.kind in 'iuf':
+        return np.full(n, np.nan), _common_dtype(dtype, np.dtype(np.float64))
+    return np.full(n, None, dtype=object), np.dtype(object)
+
+
+def _changed(values, previous):
+    """Mask of rows whose value differs from the row before (NaN equals NaN)."""
+    prior = np.concatenate([[previous], values[:-1]]) if previous is not None else None
+    if prior is None:
+        mask = np.ones(len(values), dtype=bool)
+        mask[1:] = values[1:] != values[:-1]
+        if values.dtype.kind == 'f':
+            mask[1:] &= ~(np.isnan(values[1:]) & np.isnan(values[:-1]))
+        return mask
+    mask = values != prior.astype(values.dtype, copy=False)
+    if values.dtype.kind == 'f':
+        mask &= ~(np.isnan(values) & np.isnan(prior.astype(float)))
+    return mask
+
+
+class ChangePointFrame:
+    """Timestamp-sorted rows stored as per-column change points."""
+
+    def __init__(self):
+        self.ts = _Buffer('int64')
+        self.offset = 0      # absolute position of the first held row
+        self.columns = {}    # name -> (starts, values): absolute row where each run begins, and its value
+        self.order = []
+
+    def __len__(self):
+        return self.ts.n
+
+    @property
+    def empty(self):
+        return self.ts.n == 0
+
+    @property
+    def first_timestamp(self):
+        return pd.Timestamp(self.ts.data[0]) if self.ts.n else None
+
+    @property
+    def last_timestamp(self):
+        return pd.Timestamp(self.ts.data[self.ts.n - 1]) if self.ts.n else None
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + sum(s.nbytes + v.nbytes for s, v in self.columns.values())
+
+    def dense_nbytes(self):
+        """What the same rows take as a plain DataFrame."""
+        return self.ts.nbytes + sum(len(self) * v.data.itemsize for _, v in self.columns.values())
+
+    def arrays(self):
+        """Copies of the held arrays: ``(ts, {name: (starts, values)})``, for saving."""
+        return self.ts.view().copy(), {name: (s.view().copy(), v.view().copy()) for name, (s, v) in self.columns.items()}
+
+    @classmethod
+    def from_arrays(cls, offset, order, ts, columns):
+        """Rebuild a frame from ``arrays()`` and its ``offset``/``order``."""
+        frame = cls()
+        frame.offset = offset
+        frame.order = list(order)
+        frame.ts = _Buffer.of(np.asarray(ts, dtype='int64'))
+        frame.columns = {name: (_Buffer.of(np.asarray(starts, dtype='int64')), _Buffer.of(values))
+                         for name, (starts, values) in columns.items()}
+        return frame
+
+    def append(self, df):
+        """Add rows (a frame sorted by timestamp, all after the held ones)."""
+        if df.empty:
+            return
+        base = self.offset + self.ts.n
+        self.order += [c for c in df.columns if c not in self.order]
+        for name in self.order:
+            if name == 'timestamp':
+                continue
+            if name in df.columns:
+                values = df[name].to_numpy()
+            else:
+                values, _ = _missing(self.columns[name][1].data.dtype, len(df))
+            if name not in self.columns:
+                self.columns[name] = (_Buffer('int64'), _Buffer(values.dtype))
+                if self.ts.n:
+                    # New column: one missing run over the rows held before it
+                    before, dtype = _missing(values.dtype, 1)
+                    self.columns[name][1].astype(dtype)
+                    self.columns[name][0].extend([self.offset])
+                    self.columns[name][1].extend(before)
+            starts, held = self.columns[name]
+            dtype = _common_dtype(held.data.dtype, values.dtype)
+            if dtype != held.data.dtype:
+                held.astype(dtype)
+            values = values.astype(dtype, copy=False)
+            idx = np.flatnonzero(_changed(values, held.data[held.n - 1] if held.n else None))
+            starts.extend(base + idx)
+            held.extend(values[idx])
+        self.ts.extend(df['timestamp'].to_numpy().view('int64'))
+
+    def _runs(self, name, lo, hi):
+        """Dense values of ``name`` for absolute rows [lo, hi)."""
+        starts, held = self.columns[name]
+        s = starts.view()
+        first = max(np.searchsorted(s, lo, side='right') - 1, 0)
+        last = np.searchsorted(s, hi, side='left')
+        bounds = np.clip(np.append(s[first:last], hi), lo, hi)
+        return np.repeat(held.view()[first:last], np.diff(bounds))
+
+    def locate(self, start=None, end=None):
+        """Held row positions [lo, hi) of the rows with timestamps in [start, end]."""
+        ts = self.ts.view()
+        lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side='right'))
+        return lo, max(lo, hi)
+
+    def decode(self, start=None, end=None, columns=None):
+        """Dense DataFrame of the rows in [start, end], optionally only some columns."""
+        return self.decode_rows(*self.locate(start, end), columns)
+
+    def decode_rows(self, lo, hi, columns=None):
+        """Dense DataFrame of held rows lo..hi-1."""
+        ts = self.ts.view()
+        names = self.order if columns is None else [c for c in columns if c in self.order]
+        out = {}
+        for name in names:
+            if name == 'timestamp':
+                out[name] = ts[lo:hi].view('datetime64[ns]')
+            else:
+                out[name] = self._runs(name, self.offset + lo, self.offset + hi)
+        return pd.DataFrame(out, columns=names)
+
+    def cut(self, start, end, rows, columns=None):
+        """Up to about ``rows`` decoded rows from ``start`` on, and where the next cut starts (None at ``end``).
+
+        Rows sharing the last timestamp stay in the same cut, so cutting
+        again from the returned start neither skips nor repeats rows.
+        """
+        lo, hi = self.locate(start, end)
+        if lo == hi:
+            return self.decode_rows(lo, lo, columns), None
+        ts = self.ts.view()
+        stop = int(np.searchsorted(ts, ts[min(lo + rows, hi) - 1], side='right'))
+        after = pd.Timestamp(ts[stop - 1] + 1) if stop < hi else None
+        return self.decode_rows(lo, stop, columns), after
+
+    def last_row(self):
+        return self.decode(start=self.last_timestamp) if self.ts.n else pd.DataFrame()
+
+    def drop_before(self, cutoff):
+        """Forget rows with timestamps before ``cutoff``; returns them, decoded."""
+        ts = self.ts.view()
+        k = int(np.searchsorted(ts, pd.Timestamp(cutoff).value, side='left'))
+        if k == 0:
+            return pd.DataFrame(columns=self.order)
+        old = self.decode(end=pd.Timestamp(ts[k - 1]))
+        new_offset = self.offset + k
+        for name, (starts, held) in self.columns.items():
+            s = starts.view()
+            # Keep the run covering the new first row, moved to start there
+            first = max(np.searchsorted(s, new_offset, side='right') - 1, 0)
+            starts.keep_from(first)
+            held.keep_from(first)
+            if starts.n:
+                starts.data[0] = max(starts.data[0], new_offset)
+        self.ts.keep_from(k)
+        self.offset = new_offset
+        return old
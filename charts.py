@@ -0,0 +1,413 @@
+"""Plotly figures for the dashboard, built from plain frames.
+
+Numeric arrays go out as contiguous NumPy arrays (``typed_values``) and
+timestamps as epoch milliseconds (``time_axis``), so Plotly writes them into
+the figure JSON as base64 typed arrays instead of ISO strings and decimal
+text. Traces on the same time base reuse one converted x-array, though
+Plotly still writes a copy of it into the JSON for every trace.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import correlation
+
+
+def time_axis(timestamps):
+    """Timestamps as epoch milliseconds so Plotly ships them as a binary typed array."""
+    return (pd.to_datetime(timestamps).to_numpy(dtype='datetime64[ms]').astype('int64')).astype('float64')
+
+
+def typed_values(values, dtype='float32'):
+    """Numeric column as a contiguous NumPy array (base64 typed array in the figure JSON)."""
+    return np.ascontiguousarray(pd.to_numeric(values, errors='coerce'), dtype=dtype)
+
+
+def build_hashrate_figure(df_chart, use_log_scale, ath_val, window_hours=24):
+    """Pool/network hashrate chart with block stars and ATH line."""
+    # Converted once for the pool and network traces (each still serializes its own copy)
+    x = time_axis(df_chart['timestamp'])
+    block_mask = df_chart['block_found'].to_numpy(dtype=bool)
+    pool_mhs = typed_values(df_chart['pool_hashrate_mhs'])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=pool_mhs,
+        name='Pool Hashrate (MH/s)',
+        line=dict(color='#4cc9f0'),
+        hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Pool: %{y:.2f} MH/s<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=typed_values(df_chart['network_hashrate_ghs']),
+        name='Network Hashrate (GH/s)',
+        line=dict(color='#f72585', dash='dot'),
+        yaxis='y2',
+        hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Network: %{y:.2f} GH/s<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=x[block_mask],
+        y=pool_mhs[block_mask],
+        mode='markers',
+        name='Block Found',
+        marker=dict(symbol='star', size=12, color='gold', line=dict(width=1, color='black')),
+        hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Block Found<extra></extra>'
+    ))
+
+    # Convert to MH/s
+    ath_val_mhs = ath_val / 1e6
+
+    if not use_log_scale:
+        fig.add_hline(
+            y=ath_val_mhs,
+            line_dash="longdash",
+            line_color="gold",
+            annotation_text=f"ATH: {ath_val_mhs:,.0f} MH/s",
+            annotation_position="top left",
+            annotation_font_color="gold"
+        )
+
+    # Calculate the initial visible time range
+    end_time = df_chart['timestamp'].max()
+    start_time = end_time - timedelta(hours=window_hours)
+
+    fig.update_layout(
+        xaxis=dict(
+            title='Time',
+            gridcolor='rgba(255,255,255,0.1)',
+            range=[start_time, end_time],
+            rangeslider=dict(visible=True, thickness=0.1),
+            rangeselector=dict(
+                buttons=list([
+                    dict(count=1, label="1h", step="hour", stepmode="backward"),
+                    dict(count=6, label="6h", step="hour", stepmode="backward"),
+                    dict(count=12, label="12h", step="hour", stepmode="backward"),
+                    dict(count=24, label="24h", step="hour", stepmode="backward"),
+                    dict(step="all", label="All")
+                ]),
+                bgcolor='rgba(32, 46, 60, 0.9)',
+                font=dict(color='white'),
+                activecolor='#4cc9f0'
+            ),
+            type='date'
+        ),
+        yaxis=dict(
+            title='Pool Hashrate (MH/s)',
+            gridcolor='rgba(255,255,255,0.1)',
+            type='log' if use_log_scale else 'linear'
+        ),
+        yaxis2=dict(
+            title='Network Hashrate (GH/s)',
+            overlaying='y',
+            side='right',
+            gridcolor='rgba(255,255,255,0.1)',
+            type='log' if use_log_scale else 'linear'
+        ),
+        margin=dict(t=5, b=10, l=10, r=10),
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=True,
+        legend=dict(x=0.5, y=1, orientation='h'),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def build_price_figure(df_chart):
+    """XMR and QUBIC prices on dual y-axes sharing one time axis."""
+    x = time_axis(df_chart['timestamp'])
+
+    fig_prices = go.Figure()
+
+    # Add XMR price
+    fig_prices.add_trace(go.Scatter(
+        x=x,
+        y=typed_values(df_chart['close']),
+        mode='lines',
+        name='XMR Price (USD)',
+        line=dict(color='limegreen', width=2),
+        yaxis='y1'
+    ))
+
+    # Add QUBIC price (on secondary axis)
+    fig_prices.add_trace(go.Scatter(
+        x=x,
+        y=typed_values(df_chart['qubic_usdt']),
+        mode='lines',
+        name='QUBIC Price (USD)',
+        line=dict(color='magenta', width=2),
+        yaxis='y2'
+    ))
+
+    # Layout with dual y-axes
+    fig_prices.update_layout(
+        title='XMR & QUBIC Prices (24h)',
+        xaxis=dict(type='date'),
+        yaxis=dict(
+            title='XMR Price (USD)',
+            tickformat='$.2f',
+            side='left',
+            showgrid=False
+        ),
+        yaxis2=dict(
+            title='QUBIC Price (USD)',
+            tickformat='$.9f',
+            overlaying='y',
+            side='right',
+            showgrid=False
+        ),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1
+        ),
+        margin=dict(l=40, r=40, t=40, b=40),
+        height=350,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig_prices
+
+
+def build_share_figure(df_chart, smoothed, window_hours=24):
+    """Pool share of network hashrate: raw samples under the three smoothed estimates."""
+    raw_share = df_chart['pool_hashrate'] / df_chart['network_hashrate'] * 100
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=time_axis(df_chart['timestamp']),
+        y=typed_values(raw_share),
+        name='Raw',
+        line=dict(color='rgba(255,255,255,0.25)', width=1),
+        hovertemplate='%{x|%Y-%m-%d %H:%M}<br>Raw: %{y:.2f}%<extra></extra>'
+    ))
+    # Same 5-minute grid as the chart frame
+    points = smoothed.resample('5min', on='timestamp').last().dropna(how='all').reset_index()
+    x = time_axis(points['timestamp'])
+    styles = {'ewma': ('EWMA', '#ffd166'), 'median': ('Rolling median', '#06d6a0'), 'kalman': ('Kalman', '#4cc9f0')}
+    for method, (label, color) in styles.items():
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=typed_values(points[f'share_{method}'] * 100),
+            name=label,
+            line=dict(color=color),
+            hovertemplate='%{x|%Y-%m-%d %H:%M}<br>' + label + ': %{y:.2f}%<extra></extra>'
+        ))
+    end_time = df_chart['timestamp'].max()
+    fig.update_layout(
+        xaxis=dict(title='Time', type='date', gridcolor='rgba(255,255,255,0.1)',
+                   range=[end_time - timedelta(hours=window_hours), end_time]),
+        yaxis=dict(title='Pool Share of Network (%)', gridcolor='rgba(255,255,255,0.1)'),
+        margin=dict(t=5, b=10, l=10, r=10),
+        height=300,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(x=0.5, y=1, orientation='h'),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def build_candle_figure(candles, freq='D'):
+    """Exchange candles re-aggregated to ``freq`` (the full hourly history is too heavy to ship), one row per symbol."""
+    symbols = [symbol for symbol, df in candles.items() if not df.empty]
+    fig = make_subplots(rows=len(symbols), cols=1, shared_xaxes=True, vertical_spacing=0.05, subplot_titles=symbols)
+    for row, symbol in enumerate(symbols, start=1):
+        df = candles[symbol].resample(freq, on='timestamp').agg(
+            {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}).dropna().reset_index()
+        fig.add_trace(go.Candlestick(
+            x=time_axis(df['timestamp']),
+            open=typed_values(df['open'], dtype='float64'),
+            high=typed_values(df['high'], dtype='float64'),
+            low=typed_values(df['low'], dtype='float64'),
+            close=typed_values(df['close'], dtype='float64'),
+            name=symbol,
+            showlegend=False
+        ), row=row, col=1)
+        fig.update_xaxes(type='date', rangeslider=dict(visible=False), gridcolor='rgba(255,255,255,0.1)', row=row, col=1)
+        fig.update_yaxes(gridcolor='rgba(255,255,255,0.1)', row=row, col=1)
+    fig.update_layout(
+        margin=dict(l=40, r=40, t=40, b=40),
+        height=250 * len(symbols),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig
+
+
+def build_revenue_figure(totals, period):
+    """USD value of found blocks per period, with the XMR amount on a second axis."""
+    x = totals.index.astype(str) if period == 'epoch' else time_axis(totals.index)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=x,
+        y=typed_values(totals['usd'], dtype='float64'),
+        name='USD',
+        marker_color='gold',
+        hovertemplate='%{x}<br>$%{y:,.0f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=typed_values(totals['xmr'], dtype='float64'),
+        name='XMR',
+        mode='lines+markers',
+        line=dict(color='#ff6600'),
+        yaxis='y2',
+        hovertemplate='%{x}<br>%{y:,.2f} XMR<extra></extra>'
+    ))
+    fig.update_layout(
+        xaxis=dict(title='Epoch' if period == 'epoch' else 'Time', type='category' if period == 'epoch' else 'date'),
+        yaxis=dict(title='Block Value (USD)', gridcolor='rgba(255,255,255,0.1)'),
+        yaxis2=dict(title='XMR', overlaying='y', side='right', showgrid=False),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        margin=dict(l=40, r=40, t=40, b=40),
+        height=300,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig
+
+
+def build_heatmap_figure(grid, label, unit, fmt):
+    """Weekday by UTC hour heatmap of one accumulator grid."""
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(),
+        x=[f"{h:02d}:00" for h in grid.columns],
+        y=list(grid.index),
+        colorscale='Viridis',
+        colorbar=dict(title=unit),
+        hovertemplate=f'%{{y}} %{{x}} UTC<br>%{{z:{fmt}}} {unit}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=dict(text=label, x=0.5),
+        xaxis=dict(title='Hour (UTC)', type='category'),
+        yaxis=dict(autorange='reversed'),
+        margin=dict(l=40, r=40, t=40, b=40),
+        height=300,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig
+
+
+def build_projection_figure(fan, actual):
+    """Blocks found so far this epoch, then the P10-P90 band and median of the projection."""
+    x = time_axis(fan['timestamp'])
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=typed_values(fan['p90']), mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(
+        x=x, y=typed_values(fan['p10']), mode='lines', line=dict(width=0), fill='tonexty',
+        fillcolor='rgba(0,255,255,0.2)', name='P10-P90',
+        customdata=typed_values(fan['p90']), hovertemplate='%{x}<br>P10 %{y} · P90 %{customdata}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(x=x, y=typed_values(fan['p50']), mode='lines', line=dict(color='cyan', dash='dash'), name='P50',
+                             hovertemplate='%{x}<br>P50 %{y}<extra></extra>'))
+    if not actual.empty:
+        fig.add_trace(go.Scatter(x=time_axis(actual['timestamp']), y=typed_values(actual['blocks']), mode='lines',
+                                 line=dict(color='gold', shape='hv'), name='Found',
+                                 hovertemplate='%{x}<br>%{y} blocks<extra></extra>'))
+    fig.update_layout(
+        xaxis=dict(title='Time', type='date'),
+        yaxis=dict(title='Blocks this epoch', gridcolor='rgba(255,255,255,0.1)'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        margin=dict(l=40, r=40, t=40, b=40),
+        height=300,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    return fig
+
+
+CORRELATION_COLORS = ['cyan', 'orange', 'magenta']
+
+
+def build_correlation_figures(result, window_label):
+    """Rolling correlation of each pair over time, and cross-correlation by lag over the last window."""
+    rolling, lags = result['rolling'], result['lags']
+    fig_rolling = go.Figure()
+    fig_lags = go.Figure()
+    for color, label in zip(CORRELATION_COLORS, correlation.PAIRS):
+        fig_rolling.add_trace(go.Scatter(
+            x=time_axis(rolling.index), y=typed_values(rolling[label]), mode='lines', name=label,
+            line=dict(color=color), hovertemplate='%{x}<br>%{y:.2f}<extra>' + label + '</extra>'
+        ))
+        fig_lags.add_trace(go.Scatter(
+            x=lags.index.to_numpy(), y=typed_values(lags[label]), mode='lines+markers', name=label,
+            line=dict(color=color), marker=dict(size=4), hovertemplate='lag %{x} h<br>%{y:.2f}<extra>' + label + '</extra>'
+        ))
+    layout = dict(
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        margin=dict(l=40, r=40, t=40, b=40),
+        height=300,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    fig_rolling.update_layout(xaxis=dict(title='Time', type='date'),
+                              yaxis=dict(title=f'{window_label} correlation', range=[-1, 1], gridcolor='rgba(255,255,255,0.1)'), **layout)
+    fig_lags.update_layout(xaxis=dict(title='Lag (hours, positive: first series leads)', zeroline=True),
+                           yaxis=dict(title='Correlation', range=[-1, 1], gridcolor='rgba(255,255,255,0.1)'), **layout)
+    return fig_rolling, fig_lags
+
+
+def build_pools_figure(merged):
+    """Pool hashrate of every source on a shared time index."""
+    x = time_axis(merged.index)
+    fig = go.Figure()
+    for name in merged.columns:
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=typed_values(merged[name] / 1e6),
+            name=name,
+            mode='lines',
+            connectgaps=False,
+            hovertemplate='%{x|%Y-%m-%d %H:%M}<br>' + name + ': %{y:.2f} MH/s<extra></extra>'
+        ))
+    fig.update_layout(
+        xaxis=dict(title='Time', type='date', gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(title='Pool Hashrate (MH/s)', gridcolor='rgba(255,255,255,0.1)'),
+        margin=dict(t=5, b=10, l=10, r=10),
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(x=0.5, y=1, orientation='h'),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def build_burn_figure(recent_burns):
+    """Bar chart of QUBIC burned per transaction."""
+    fig_burn = go.Figure()
+    fig_burn.add_trace(go.Bar(
+        x=time_axis(recent_burns['timestamp']),
+        y=typed_values(recent_burns['qubic_amount'], dtype='float64'),
+        name='QUBIC Burned',
+        marker_color='crimson',
+        hovertemplate='%{x|%Y-%m-%d %H:%M}<br>%{y:,.0f} QUBIC<extra></extra>'
+    ))
+
+    fig_burn.update_layout(
+        xaxis=dict(title="Date", type='date'),
+        yaxis_title="QUBIC Burned",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        margin=dict(l=20, r=20, t=30, b=30),
+        height=300
+    )
+    return fig_burn
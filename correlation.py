@@ -0,0 +1,190 @@
+"""How QUBIC price, XMR price and pool hashrate move together, and which leads.
+
+``HourlySeries`` keeps one row per hour (mean pool hashrate, last prices)
+as a ``HistoryStore`` listener, so the analysis never reads the 1-second
+raw tier: the full history is a few thousand hourly rows. Prices missing
+from the pool feed can be filled from exchange candles (``ohlcv.py``).
+
+Everything runs on hourly log changes, not levels (trending levels
+correlate whatever they are). ``rolling_corr`` takes its rolling moments
+as differences of cumulative sums, one pass per moment whatever the
+window; ``cross_corr`` correlates one series with the other shifted by
+each lag over the most recent window. A positive lag means the first
+series leads the second by that many hours.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+INTERVAL = pd.Timedelta("1h")
+WINDOWS = {'1d': 24, '7d': 168, '30d': 720}  # hours
+MAX_LAG = 48  # hours
+PAIRS = {
+    'QUBIC vs pool hashrate': ('qubic_usdt', 'pool_hashrate'),
+    'XMR vs pool hashrate': ('close', 'pool_hashrate'),
+    'QUBIC vs XMR': ('qubic_usdt', 'close'),
+}
+COLUMNS = ['pool_hashrate', 'qubic_usdt', 'close']
+
+
+class HourlySeries:
+    """Hourly mean pool hashrate and last QUBIC/XMR prices, updated as rows arrive."""
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hours = pd.DataFrame(columns=['hashrate_sum', 'samples', 'qubic_usdt', 'close'], dtype=float)
+        self.version = 0  # bumped when an hour is complete
+
+    def on_ingest(self, df, initial):
+        """HistoryStore listener: fold new rows into their hours, merging with the open one."""
+        with self._lock:
+            if initial:
+                self.reset()
+            if df.empty:
+                return
+            ts = df['timestamp'].to_numpy().view('int64')
+            step = self.interval.value
+            first_hour, last_hour = ts[0] - ts[0] % step, ts[-1] - ts[-1] % step
+            if first_hour == last_hour and not self.hours.empty and self.hours.index[-1].value == first_hour:
+                # Live rows inside the open hour: update it in place
+                self._add_to_open_hour(df)
+                return
+            hour = pd.to_datetime(ts - ts % step)
+            agg = pd.DataFrame({
+                'hashrate_sum': df['pool_hashrate'].astype(float),
+                'samples': df['pool_hashrate'].notna().astype(float),
+                'qubic_usdt': df['qubic_usdt'] if 'qubic_usdt' in df.columns else np.nan,
+                'close': df['close'] if 'close' in df.columns else np.nan,
+            }).groupby(hour).agg({'hashrate_sum': 'sum', 'samples': 'sum', 'qubic_usdt': 'last', 'close': 'last'})
+            if not self.hours.empty and agg.index[0] == self.hours.index[-1]:
+                # Still the open hour: add to its sums, newer prices win
+                open_hour = self.hours.iloc[-1]
+                first = agg.iloc[0]
+                agg.iloc[0] = [open_hour['hashrate_sum'] + first['hashrate_sum'], open_hour['samples'] + first['samples'],
+                               first['qubic_usdt'] if pd.notna(first['qubic_usdt']) else open_hour['qubic_usdt'],
+                               first['close'] if pd.notna(first['close']) else open_hour['close']]
+                completed = len(agg) - 1
+                self.hours = pd.concat([self.hours.iloc[:-1], agg])
+            else:
+                completed = len(agg) if not self.hours.empty else len(agg) - 1
+                self.hours = agg if self.hours.empty else pd.concat([self.hours, agg])
+            if completed:
+                self.version += 1
+
+    def _add_to_open_hour(self, df):
+        hashrate = df['pool_hashrate'].to_numpy(dtype=float)
+        valid = ~np.isnan(hashrate)
+        i = len(self.hours) - 1
+        self.hours.iat[i, 0] += hashrate[valid].sum()
+        self.hours.iat[i, 1] += valid.sum()
+        for j, col in ((2, 'qubic_usdt'), (3, 'close')):
+            if col in df.columns:
+                prices = df[col].to_numpy(dtype=float)
+                prices = prices[~np.isnan(prices)]
+                if len(prices):
+                    self.hours.iat[i, j] = prices[-1]
+
+    def frame(self, prices=None):
+        """Complete hours: ``pool_hashrate``, ``qubic_usdt``, ``close`` indexed by hour.
+
+        ``prices`` (hourly ``qubic_usdt``/``close`` indexed by hour) fills
+        prices the pool feed didn't carry.
+        """
+        with self._lock:
+            hours = self.hours.iloc[:-1]
+        out = pd.DataFrame({
+            'pool_hashrate': hours['hashrate_sum'] / hours['samples'].where(hours['samples'] > 0),
+            'qubic_usdt': hours['qubic_usdt'],
+            'close': hours['close'],
+        })
+        if prices is not None and not prices.empty and not out.empty:
+            out = out.fillna(prices.reindex(out.index))
+        return out
+
+
+def candle_prices(candles):
+    """Hourly ``qubic_usdt``/``close`` from ohlcv candle frames ({symbol: frame})."""
+    columns = {'QUBIC/USDT': 'qubic_usdt', 'XMR/USDT': 'close'}
+    parts = {name: candles[symbol].set_index('timestamp')['close']
+             for symbol, name in columns.items() if symbol in candles and not candles[symbol].empty}
+    return pd.DataFrame(parts)
+
+
+def log_changes(hours):
+    """Hour-over-hour log change of every column; NaN where either hour is missing or non-positive."""
+    values = hours.reindex(pd.date_range(hours.index[0], hours.index[-1], freq=INTERVAL)) if len(hours) else hours
+    logs = np.log(values.where(values > 0))
+    return logs.diff().iloc[1:]
+
+
+def _window_sums(a, window):
+    """Sum of each trailing ``window`` of ``a`` (fewer at the start), from one cumulative sum."""
+    c = np.concatenate([[0.0], np.cumsum(a)])
+    lo = np.maximum(np.arange(1, len(a) + 1) - window, 0)
+    return c[1:] - c[lo]
+
+
+def rolling_corr(x, y, window, min_periods=None):
+    """Pearson correlation of ``x`` and ``y`` over each trailing ``window``, skipping NaN pairs."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    n = _window_sums(valid.astype(float), window)
+    sx, sy = _window_sums(x, window), _window_sums(y, window)
+    cov = _window_sums(x * y, window) - sx * sy / np.maximum(n, 1)
+    var_x = _window_sums(x * x, window) - sx * sx / np.maximum(n, 1)
+    var_y = _window_sums(y * y, window) - sy * sy / np.maximum(n, 1)
+    denom = np.sqrt(np.clip(var_x, 0, None) * np.clip(var_y, 0, None))
+    ok = (n >= (min_periods or max(window // 2, 3))) & (denom > 1e-12 * np.maximum(n, 1))
+    return np.where(ok, cov / np.where(ok, denom, 1.0), np.nan)
+
+
+def _corr(x, y):
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < 3:
+        return np.nan
+    x, y = x[valid] - x[valid].mean(), y[valid] - y[valid].mean()
+    denom = np.sqrt((x * x).sum() * (y * y).sum())
+    return float((x * y).sum() / denom) if denom > 0 else np.nan
+
+
+def cross_corr(x, y, max_lag):
+    """Correlation of ``x[t]`` with ``y[t + lag]`` for lag in -max_lag..max_lag."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    lags = np.arange(-max_lag, max_lag + 1)
+    out = np.empty(len(lags))
+    for i, lag in enumerate(lags):
+        if abs(lag) >= len(x):
+            out[i] = np.nan
+        elif lag >= 0:
+            out[i] = _corr(x[:len(x) - lag], y[lag:])
+        else:
+            out[i] = _corr(x[-lag:], y[:len(y) + lag])
+    return pd.Series(out, index=pd.Index(lags, name='lag_hours'))
+
+
+def analyze(hours, window):
+    """Rolling correlation of every pair over the whole history, and lead/lag over the last ``window`` hours.
+
+    Returns ``{'rolling', 'lags', 'best'}``: rolling correlations by hour,
+    cross-correlation by lag, and each pair's strongest lag and correlation.
+    """
+    changes = log_changes(hours) if len(hours) > 1 else pd.DataFrame(columns=COLUMNS)
+    rolling = pd.DataFrame(index=changes.index)
+    lags = pd.DataFrame()
+    best = []
+    recent = changes.iloc[-window:]
+    max_lag = min(MAX_LAG, max(window // 4, 1))
+    for label, (a, b) in PAIRS.items():
+        rolling[label] = rolling_corr(changes[a], changes[b], window) if len(changes) else []
+        lags[label] = cross_corr(recent[a], recent[b], max_lag)
+        col = lags[label]
+        if col.notna().any():
+            lag = int(col.abs().idxmax())
+            best.append({'pair': label, 'lag_hours': lag, 'corr': col.loc[lag], 'corr_at_0': col.loc[0]})
+    return {'rolling': rolling, 'lags': lags, 'best': pd.DataFrame(best, columns=['pair', 'lag_hours', 'corr', 'corr_at_0'])}
@@ -0,0 +1,159 @@
+"""Smoothed pool hashrate, network hashrate and pool share of the network.
+
+Three estimators run side by side on every ingested row:
+
+- ``ewma``: time-aware exponentially weighted mean (half-life in wall time,
+  so gaps in polling count as elapsed time)
+- ``median``: rolling median over a time window, robust to single-sample
+  spikes like 509k -> 117k H/s in 11 s
+- ``kalman``: local-level Kalman filter with a steady-state gain per time
+  step; equivalent to an EWMA whose weight grows with the gap since the
+  previous sample
+
+EWMA and Kalman run in log space, so noise is treated as relative.
+Both are the recurrence ``x[t] = x[t-1] + a[t] * (z[t] - x[t-1])``, which
+``smooth()`` evaluates with blocked cumulative sums rather than row by row.
+Bulk loads and incremental updates share that code; ``Smoother`` keeps the
+end state between ingests.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import history
+from blockstats import MONERO_BLOCK_TIME
+
+MONERO_BLOCKS_PER_DAY = 86400 / MONERO_BLOCK_TIME
+SERIES = ['pool_hashrate', 'network_hashrate', 'share']
+METHODS = ['ewma', 'median', 'kalman']
+EWMA_HALFLIFE = "10min"
+MEDIAN_WINDOW = "15min"
+KALMAN_MEASUREMENT_SD = 0.3   # per sample, relative (log space)
+KALMAN_PROCESS_SD = 0.1       # per sqrt(hour), relative
+BLOCK = 16
+WARMUP = "6h"  # history before the kept window fed in to settle the estimators (many half-lives)
+
+
+def ewma_weights(dt, halflife):
+    """Per-row update weight for a time-aware EWMA; ``dt`` and ``halflife`` in seconds."""
+    return -np.expm1(-np.log(2) * dt / halflife)
+
+
+def kalman_gains(dt, process_var, measurement_var):
+    """Steady-state local-level Kalman gain for each time step ``dt`` (seconds)."""
+    q = process_var * dt
+    prior = (q + np.sqrt(q * q + 4 * q * measurement_var)) / 2
+    return prior / (prior + measurement_var)
+
+
+def smooth(z, a, x0=np.nan):
+    """Evaluate ``x[t] = (1 - a[t]) * x[t-1] + a[t] * z[t]`` without a Python loop per row.
+
+    Rows are cut into blocks of ``BLOCK``; within a block the recurrence is a
+    scaled cumulative sum, and only the block ends are chained one by one.
+    NaN samples leave the estimate unchanged; with no ``x0`` the first valid
+    sample starts it.
+    """
+    z = np.asarray(z, dtype=float)
+    n = len(z)
+    valid = ~np.isnan(z)
+    # Capping a keeps every factor (1 - a) positive, so logs stay finite
+    a = np.where(valid, np.clip(a, 0, 1 - 1e-15), 0.0)
+    z = np.where(valid, z, 0.0)
+    lead = 0
+    if np.isnan(x0):
+        if not valid.any():
+            return np.full(n, np.nan)
+        lead = int(np.argmax(valid))
+        a[lead] = 1 - 1e-15
+        x0 = 0.0
+    pad = -n % BLOCK
+    a = np.concatenate([a, np.zeros(pad)]).reshape(-1, BLOCK)
+    z = np.concatenate([z, np.zeros(pad)]).reshape(-1, BLOCK)
+    decay = np.exp(np.cumsum(np.log1p(-a), axis=1))
+    # Block result when the previous estimate is 0
+    inner = decay * np.cumsum(a * z / decay, axis=1)
+    carry = np.empty(len(a))
+    x = x0
+    for k, (d, y) in enumerate(zip(decay[:, -1].tolist(), inner[:, -1].tolist())):
+        carry[k] = x
+        x = d * x + y
+    out = (inner + decay * carry[:, None]).ravel()[:n]
+    out[:lead] = np.nan
+    return out
+
+
+class Smoother:
+    """Smoothed series for the rows the ``HistoryStore`` holds, updated per ingest."""
+
+    def __init__(self, halflife=EWMA_HALFLIFE, median_window=MEDIAN_WINDOW,
+                 measurement_sd=KALMAN_MEASUREMENT_SD, process_sd=KALMAN_PROCESS_SD, keep_days=history.RAW_DAYS):
+        self.halflife = pd.Timedelta(halflife).total_seconds()
+        self.median_window = pd.Timedelta(median_window)
+        self.measurement_var = measurement_sd ** 2
+        self.process_var = process_sd ** 2 / 3600
+        self.keep = pd.Timedelta(days=keep_days)
+        self.warmup = pd.Timedelta(WARMUP)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.series = pd.DataFrame()
+        self._state = {}        # (series, method) -> last estimate (log space for ewma/kalman)
+        self._last_ts = None    # int64 ns
+        self._tail = pd.DataFrame()  # raw inputs within the median window
+
+    def on_ingest(self, df, initial):
+        """HistoryStore listener."""
+        with self._lock:
+            if initial:
+                self.reset()
+            if df.empty:
+                return
+            # Rows this far back no longer affect anything that is kept
+            df = history.time_slice(df, start=df['timestamp'].iloc[-1] - self.keep - self.warmup)
+            inputs = pd.DataFrame({
+                'timestamp': df['timestamp'].to_numpy(),
+                'pool_hashrate': df['pool_hashrate'].to_numpy(dtype=float),
+                'network_hashrate': df['network_hashrate'].to_numpy(dtype=float),
+            })
+            inputs['share'] = inputs['pool_hashrate'] / inputs['network_hashrate']
+            ts = inputs['timestamp'].to_numpy().view('int64')
+            prev = np.concatenate([[self._last_ts if self._last_ts is not None else ts[0]], ts[:-1]])
+            dt = np.maximum((ts - prev) / 1e9, 0)
+            a_ewma = ewma_weights(dt, self.halflife)
+            a_kalman = kalman_gains(dt, self.process_var, self.measurement_var)
+
+            out = pd.DataFrame({'timestamp': inputs['timestamp']})
+            # Median over the window ending at each new row, reusing the held tail
+            window = pd.concat([self._tail, inputs], ignore_index=True) if not self._tail.empty else inputs
+            medians = window.rolling(self.median_window, on='timestamp')[SERIES].median().iloc[-len(inputs):]
+            for name in SERIES:
+                values = inputs[name].to_numpy()
+                logs = np.log(np.where(values > 0, values, np.nan))
+                for method, weights in (('ewma', a_ewma), ('kalman', a_kalman)):
+                    est = smooth(logs, weights, self._state.get((name, method), np.nan))
+                    if not np.isnan(est).all():
+                        self._state[(name, method)] = est[~np.isnan(est)][-1]
+                    out[f'{name}_{method}'] = np.exp(est).astype('float32')
+                out[f'{name}_median'] = medians[name].to_numpy(dtype='float32')
+
+            self._last_ts = int(ts[-1])
+            self._tail = history.time_slice(window, start=pd.Timestamp(self._last_ts) - self.median_window).reset_index(drop=True)
+            self.series = out if self.series.empty else pd.concat([self.series, out], ignore_index=True)
+            self.series = history.time_slice(self.series, start=pd.Timestamp(self._last_ts) - self.keep)
+
+    def frame(self):
+        with self._lock:
+            return self.series
+
+    def latest(self, method='kalman'):
+        """Latest smoothed pool/network hashrate and share, plus expected blocks per day."""
+        with self._lock:
+            if self.series.empty:
+                return {}
+            row = self.series.iloc[-1]
+        out = {name: float(row[f'{name}_{method}']) for name in SERIES}
+        out['blocks_per_day'] = out['share'] * MONERO_BLOCKS_PER_DAY
+        return out
@@ -0,0 +1,163 @@
+"""Export a time range of pool or burn history as CSV or Parquet, streamed in chunks.
+
+The rows come from ``HistoryStore.iter_window()`` (or slices of the burn
+frame) a chunk at a time. Each chunk is encoded and handed on before the
+next is cut, so memory stays at about one chunk (``history.CHUNK_ROWS``
+rows) however long the range: a Parquet export is one row group per chunk,
+and a CSV export writes the header once.
+
+``serve()`` exposes the same export over HTTP (``QPOOL_EXPORT_PORT`` in the
+app, on localhost unless ``QPOOL_EXPORT_HOST`` says otherwise), with
+chunked transfer encoding::
+
+    GET /export?dataset=pool&start=2025-05-01&end=2025-05-08&format=parquet
+
+``dataset`` is ``pool`` or ``burns``; ``start``/``end`` are optional and
+inclusive; ``format`` is ``csv`` (default) or ``parquet`` (needs pyarrow).
+"""
+import io
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import history
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DATASETS = ['pool', 'burns']
+FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+
+def pool_chunks(store, start=None, end=None, chunk_rows=history.CHUNK_ROWS):
+    return store.iter_window(start, end, chunk_rows=chunk_rows)
+
+
+def burn_chunks(burns, start=None, end=None, chunk_rows=history.CHUNK_ROWS):
+    part = history.time_slice(burns, start, end) if not burns.empty else burns
+    for i in range(0, len(part), chunk_rows):
+        yield part.iloc[i:i + chunk_rows]
+
+
+def iter_csv(chunks):
+    first = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=first).encode()
+        first = False
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are taken out after every row group."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def iter_parquet(chunks):
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet export")
+    sink, writer = _Drain(), None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        # Later chunks follow the first one's schema (rolled-up means are floats, raw values may be ints)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+
+def encode(chunks, fmt="csv"):
+    """Bytes of the export, piece by piece."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return iter_csv(chunks) if fmt == "csv" else iter_parquet(chunks)
+
+
+def export(dataset, store, burns, start=None, end=None, fmt="csv"):
+    """Encoded pieces of ``dataset`` ('pool' or 'burns') over [start, end]."""
+    if dataset == "pool":
+        return encode(pool_chunks(store, start, end), fmt)
+    if dataset == "burns":
+        return encode(burn_chunks(burns, start, end), fmt)
+    raise ValueError(f"unknown dataset {dataset!r}; expected one of {', '.join(DATASETS)}")
+
+
+def file_name(dataset, start=None, end=None, fmt="csv"):
+    span = "-".join(pd.Timestamp(t).strftime("%Y%m%d") for t in (start, end) if t is not None) or "all"
+    return f"qpool-{dataset}-{span}.{fmt}"
+
+
+def make_handler(store, burns):
+    """``burns`` is a callable returning the current burn frame."""
+
+    class ExportHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/export":
+                self.send_error(404)
+                return
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            dataset, fmt = query.get("dataset", "pool"), query.get("format", "csv")
+            try:
+                start = pd.Timestamp(query["start"]) if "start" in query else None
+                end = pd.Timestamp(query["end"]) if "end" in query else None
+                pieces = export(dataset, store, burns() if dataset == "burns" else None, start, end, fmt)
+                first = next(pieces, b"")
+            except (ValueError, ImportError) as e:
+                self.send_error(400, str(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", FORMATS[fmt])
+            self.send_header("Content-Disposition", f'attachment; filename="{file_name(dataset, start, end, fmt)}"')
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for piece in itertools.chain([first], pieces):
+                    if piece:
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                # Ends the store's export right away, so deferred evictions resume
+                pieces.close()
+
+    return ExportHandler
+
+
+def serve(store, burns, host="127.0.0.1", port=8766):
+    """Start the export endpoint on a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(store, burns))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
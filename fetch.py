@@ -0,0 +1,264 @@
+"""Resilient HTTP fetching for the upstream CSV feeds.
+
+- one pooled ``requests.Session`` per process, with (connect, read) timeouts
+- bounded retries with exponential backoff and full jitter
+- a per-endpoint circuit breaker, so a dead host fails fast instead of
+  tying up every rerun
+- compressed transport negotiation (see ``transport.py``): Arrow / zstd /
+  gzip siblings of a CSV are tried first, the plain CSV is the fallback,
+  and a ranged request for the CSV's tail catches siblings that lag it
+- ``StaleWhileRevalidate``: readers always get the last good value
+  immediately while a single background refresh replaces it
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+import transport
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+TAIL_BYTES = 4096  # enough for a few CSV rows, to read the last timestamp
+RETRIES = 3
+BACKOFF = 0.5      # seconds, doubled per attempt
+MAX_BACKOFF = 5
+POOL_SIZE = 16
+
+
+class FetchError(Exception):
+    pass
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session():
+    """Process-wide session with keep-alive connection pooling."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; lets one probe through after ``reset_after`` seconds."""
+
+    def __init__(self, threshold=5, reset_after=30):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open":
+                return False
+            if self.state == "half-open":
+                # Only one probe at a time: re-arm until it reports back
+                self.opened_at = time.monotonic()
+            return True
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+
+
+class Fetcher:
+    """GET one URL with timeouts, jittered retries and a circuit breaker."""
+
+    def __init__(self, url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF, breaker=None, headers=None, negotiate=True):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        # Compressed siblings first; ones the server doesn't have (404, wrong body) are dropped
+        self.candidates = (transport.variant_urls(url) if negotiate else []) + [url]
+        # Ask intermediaries to revalidate instead of busting caches with a query string
+        self.headers = {"Cache-Control": "no-cache", "Accept": transport.accept_header(), **(headers or {})}
+        self.served = None  # URL of the last response: the CSV or one of its siblings
+        self.stale_siblings = 0
+
+    def _request(self, candidates):
+        for candidate in list(candidates):
+            resp = session().get(candidate, timeout=self.timeout, headers=self.headers)
+            if candidate != self.url and (resp.status_code in (404, 410) or (
+                    resp.ok and not transport.is_variant_body(candidate, resp.content,
+                                                              resp.headers.get("Content-Encoding")))):
+                self.candidates.remove(candidate)
+                continue
+            self.served = candidate
+            return resp
+
+    def get(self, plain=False):
+        """Response for the feed: the best sibling, or the CSV itself with ``plain``."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.url}: circuit open after {self.breaker.failures} failures")
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))))
+            try:
+                resp = self._request([self.url] if plain else self.candidates)
+                if resp.status_code < 500:
+                    resp.raise_for_status()
+                    self.breaker.record(True)
+                    return resp
+                error = FetchError(f"{self.url}: HTTP {resp.status_code}")
+            except requests.HTTPError as e:
+                # 4xx: retrying won't help
+                self.breaker.record(False)
+                raise FetchError(str(e)) from e
+            except requests.RequestException as e:
+                error = FetchError(f"{self.url}: {e.__class__.__name__}: {e}")
+        self.breaker.record(False)
+        raise error
+
+    def read_frame(self):
+        """Fetch and decode the feed in whichever format the server offered.
+
+        A sibling whose last row is older than the CSV's (the collector
+        hasn't rewritten it yet) is discarded for the CSV itself.
+        """
+        resp = self.get()
+        df = transport.decode(resp.content, resp.headers.get("Content-Type"), resp.url)
+        if self.served == self.url or df.empty or "timestamp" not in df.columns:
+            return df
+        plain = self._csv_if_newer(resp, pd.Timestamp(df["timestamp"].iloc[-1]), list(df.columns))
+        if plain is not None:
+            self.stale_siblings += 1
+            return plain
+        return df
+
+    def _csv_if_newer(self, sibling, last, columns):
+        """The CSV's frame if it is newer than ``sibling`` (ending at ``last``); None if not, or if it can't be told.
+
+        Compares Last-Modified with a HEAD request when both carry it, and
+        otherwise reads the timestamp of the CSV's last row from a ranged GET.
+        """
+        try:
+            modified = sibling.headers.get("Last-Modified")
+            if modified:
+                head = session().head(self.url, timeout=self.timeout, headers=self.headers)
+                csv_modified = head.headers.get("Last-Modified")
+                if head.ok and csv_modified:
+                    if parsedate_to_datetime(csv_modified) <= parsedate_to_datetime(modified):
+                        return None
+                    return self._plain_frame()
+            headers = {**self.headers, "Range": f"bytes=-{TAIL_BYTES}", "Accept-Encoding": "identity"}
+            resp = session().get(self.url, timeout=self.timeout, headers=headers)
+        except (requests.RequestException, TypeError, ValueError):
+            return None
+        if resp.status_code == 200:
+            # No range support: that was the whole CSV, as fresh as it gets
+            return transport.decode(resp.content, resp.headers.get("Content-Type"), self.url)
+        if resp.status_code != 206:
+            return None
+        tail = transport.last_csv_timestamp(resp.content, columns)
+        if tail is None or tail <= last:
+            return None
+        return self._plain_frame()
+
+    def _plain_frame(self):
+        resp = self.get(plain=True)
+        return transport.decode(resp.content, resp.headers.get("Content-Type"), resp.url)
+
+
+class StaleWhileRevalidate:
+    """Serve the last good value while at most one background refresh runs.
+
+    The first ``get()`` loads synchronously; afterwards a value older than
+    ``ttl`` triggers a refresh on a daemon thread and is returned as-is. A
+    failed refresh keeps the old value and records the error. An ``initial``
+    value (say, restored from disk) is served as already stale, so the first
+    ``get()`` returns at once and revalidates in the background.
+    """
+
+    def __init__(self, loader, ttl, initial=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.value = initial
+        self.loaded_at = time.monotonic() - ttl if initial is not None else None
+        self.last_error = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def has_value(self):
+        return self.loaded_at is not None
+
+    @property
+    def age(self):
+        return time.monotonic() - self.loaded_at if self.loaded_at is not None else None
+
+    def _refresh(self):
+        try:
+            value = self.loader()
+        except Exception as e:
+            with self._lock:
+                self.last_error = e
+                self._refreshing = False
+            return False
+        with self._lock:
+            self.value = value
+            self.loaded_at = time.monotonic()
+            self.last_error = None
+            self._refreshing = False
+        return True
+
+    def get(self):
+        """Current value; raises only if nothing has ever loaded."""
+        with self._lock:
+            first = not self.has_value and not self._refreshing
+            stale = self.has_value and self.age >= self.ttl and not self._refreshing
+            if first or stale:
+                self._refreshing = True
+        if first:
+            if not self._refresh():
+                raise self.last_error
+        elif stale:
+            threading.Thread(target=self._refresh, daemon=True).start()
+        elif not self.has_value:
+            # Another thread is doing the first load
+            while self._refreshing:
+                time.sleep(0.05)
+            if not self.has_value:
+                raise self.last_error
+        return self.value
+
+    def invalidate(self):
+        """Make the next ``get()`` start a refresh."""
+        with self._lock:
+            if self.loaded_at is not None:
+                self.loaded_at -= self.ttl
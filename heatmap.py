@@ -0,0 +1,95 @@
+"""When the pool finds blocks and when its hashrate peaks, by hour of day and day of week.
+
+Three fixed 7x24 accumulators (UTC weekday by hour) hold blocks found, the
+time covered, and hashrate integrated over that time. A bulk load (the
+initial ingest, a restore, any batch of more than ``CELLS`` rows) is added
+with one ``np.bincount`` pass per accumulator; the few rows of a live
+update are added in place, O(1) each. Both run as a ``HistoryStore``
+listener. Reading them never touches the history.
+
+Each row stands for the time since the row before it, capped at
+``MAX_STEP`` so an outage doesn't count as hours of the last hashrate
+seen. Rolled-up rows therefore weigh as much as the raw rows they replace,
+and the hashrate cells are time-weighted means.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+HOURS = 24
+CELLS = len(DAYS) * HOURS
+MAX_STEP = pd.Timedelta("15min").value  # ns
+NS_PER_HOUR = 3600 * 10**9
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+
+
+def cells(ts):
+    """Weekday * 24 + hour of int64 ns UTC timestamps."""
+    hours = ts // NS_PER_HOUR
+    return ((hours // HOURS + EPOCH_WEEKDAY) % len(DAYS)) * HOURS + hours % HOURS
+
+
+class WeekHeatmap:
+    """Blocks, covered hours and hashrate per hour-of-week, fed by ``HistoryStore``."""
+
+    def __init__(self, max_step=MAX_STEP):
+        self.max_step = max_step
+        self._lock = threading.Lock()
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.blocks = np.zeros(CELLS)
+            self.seconds = np.zeros(CELLS)
+            self.hashes = np.zeros(CELLS)  # hashrate * seconds
+            self.last_ts = None
+            self.version += 1
+
+    def on_ingest(self, df, initial):
+        """HistoryStore listener: bincount a bulk load, add a few new rows cell by cell."""
+        if initial:
+            self.reset()
+        if df.empty:
+            return
+        ts = df['timestamp'].to_numpy().view('int64')
+        blocks = df['blocks_delta'].to_numpy(dtype=float) if 'blocks_delta' in df.columns else np.zeros(len(ts))
+        hashrate = np.nan_to_num(df['pool_hashrate'].to_numpy(dtype=float))
+        with self._lock:
+            step = np.diff(ts, prepend=ts[0] if self.last_ts is None else self.last_ts)
+            seconds = np.minimum(step, self.max_step) / 1e9
+            cell = cells(ts)
+            if len(ts) > CELLS:
+                # Bulk: one pass per accumulator
+                self.blocks += np.bincount(cell, weights=blocks, minlength=CELLS)
+                self.seconds += np.bincount(cell, weights=seconds, minlength=CELLS)
+                self.hashes += np.bincount(cell, weights=hashrate * seconds, minlength=CELLS)
+            else:
+                for i, b, s, h in zip(cell.tolist(), blocks.tolist(), seconds.tolist(), hashrate.tolist()):
+                    self.blocks[i] += b
+                    self.seconds[i] += s
+                    self.hashes[i] += h * s
+            self.last_ts = int(ts[-1])
+            self.version += 1
+
+    def grid(self, metric='blocks'):
+        """A 7x24 frame (days by UTC hour) of ``metric``.
+
+        ``blocks`` found, ``blocks_per_hour`` of time covered, mean ``hashrate``
+        (H/s), or ``hours`` covered; cells with no coverage are NaN.
+        """
+        with self._lock:
+            covered = self.seconds > 0
+            if metric == 'blocks':
+                values = self.blocks.copy()
+            elif metric == 'blocks_per_hour':
+                values = np.divide(self.blocks * 3600, self.seconds, out=np.full(CELLS, np.nan), where=covered)
+            elif metric == 'hashrate':
+                values = np.divide(self.hashes, self.seconds, out=np.full(CELLS, np.nan), where=covered)
+            elif metric == 'hours':
+                values = self.seconds / 3600
+            else:
+                raise ValueError(f"unknown heatmap metric {metric!r}")
+        return pd.DataFrame(values.reshape(len(DAYS), HOURS), index=DAYS, columns=range(HOURS))
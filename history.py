@@ -0,0 +1,301 @@
+"""Memory-bounded pool history.
+
+Recent rows are kept raw for ``raw_days``, as change points
+(``changepoints.ChangePointFrame``) since most columns repeat from one
+snapshot to the next; older rows are folded into fixed-interval rollups as
+they age out. The all-time hashrate peak is kept
+verbatim so ATH figures survive the rollup. A memory ceiling is enforced
+after every ingest by shrinking the raw tier first and dropping the oldest
+rollups last.
+
+Nothing else holds the history: views read the rows they draw with
+``window()`` (or ``iter_window()`` for exports), so the ceiling bounds
+what stays in memory between reruns.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from changepoints import ChangePointFrame
+
+log = logging.getLogger(__name__)
+
+RAW_DAYS = float(os.environ.get("QPOOL_RAW_DAYS", "7"))
+ROLLUP_INTERVAL = os.environ.get("QPOOL_ROLLUP_INTERVAL", "5min")
+MEMORY_CEILING_MB = float(os.environ.get("QPOOL_MEMORY_CEILING_MB", "512"))
+CHUNK_ROWS = 50_000  # rows per chunk when a window is iterated (exports)
+
+# How each column is aggregated when raw rows are rolled up
+ROLLUP_AGG = {
+    'pool_hashrate': 'mean',
+    'pool_hashrate_mhs': 'mean',
+    'network_hashrate': 'mean',
+    'network_hashrate_ghs': 'mean',
+    'network_height': 'last',
+    'pool_blocks_found': 'last',
+    'blocks_delta': 'sum',
+    'block_found': 'any',
+    'connected_miners': 'mean',
+    'qubic_epoch': 'last',
+    'qubic_usdt': 'last',
+    'close': 'last',
+}
+
+
+def frame_bytes(df):
+    # deep: object columns count their values, not just the pointers
+    return int(df.memory_usage(index=True, deep=True).sum()) if df is not None else 0
+
+
+def time_slice(df, start=None, end=None):
+    """Rows of a timestamp-sorted frame within [start, end], located by binary search."""
+    ts = df['timestamp'].to_numpy()
+    lo = 0 if start is None else np.searchsorted(ts, pd.Timestamp(start).to_datetime64(), side='left')
+    hi = len(ts) if end is None else np.searchsorted(ts, pd.Timestamp(end).to_datetime64(), side='right')
+    return df.iloc[lo:hi]
+
+
+def prepare_frame(df):
+    """Type raw pool rows and add the derived dashboard columns."""
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    if df['timestamp'].isna().any():
+        raise ValueError("Invalid timestamp values in CSV")
+    df.sort_values('timestamp', inplace=True)
+    df['pool_hashrate_mhs'] = df['pool_hashrate'] / 1e6
+    df['network_hashrate_ghs'] = df['network_hashrate'] / 1e9
+    df['blocks_delta'] = df['pool_blocks_found'].diff().fillna(0)
+    df['block_found'] = df['blocks_delta'] > 0
+    # Ensure price columns are numeric
+    for col in ['qubic_usdt', 'close']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def rollup(df, interval=ROLLUP_INTERVAL):
+    """Aggregate raw rows into ``interval`` buckets (see ROLLUP_AGG)."""
+    if df.empty:
+        return df
+    agg = {col: how for col, how in ROLLUP_AGG.items() if col in df.columns}
+    rolled = df.resample(interval, on='timestamp').agg(agg)
+    rolled = rolled.dropna(subset=['pool_hashrate']).reset_index()
+    rolled['block_found'] = rolled['block_found'].astype(bool)
+    return rolled
+
+
+class HistoryStore:
+    """Raw rows for the retention window plus rollups for everything older."""
+
+    def __init__(self, raw_days=RAW_DAYS, interval=ROLLUP_INTERVAL, ceiling_mb=MEMORY_CEILING_MB):
+        self.raw_days = raw_days
+        self.interval = interval
+        self.ceiling_bytes = int(ceiling_mb * 1024 * 1024)
+        self.changes = ChangePointFrame()
+        self.rollups = pd.DataFrame()
+        self.ath_row = None
+        self.evictions = 0
+        self.listeners = []
+        # Optional ``gate(new_rows, initial)`` returning the rows fit to keep (quality.QualityGate)
+        self.gate = None
+        self.listener_errors = 0
+        self.generation = 0  # bumped whenever the held history is replaced rather than appended to
+        self._exports = 0  # iter_window() calls in progress; the raw tier isn't evicted under them
+        self._lock = threading.RLock()
+
+    @property
+    def first_timestamp(self):
+        firsts = [t for t in (self.rollups['timestamp'].iloc[0] if not self.rollups.empty else None,
+                              self.changes.first_timestamp) if t is not None]
+        return min(firsts) if firsts else None
+
+    @property
+    def last_timestamp(self):
+        return self.changes.last_timestamp
+
+    def last_row(self):
+        return self.changes.last_row()
+
+    def subscribe(self, listener):
+        """Call ``listener(new_rows, initial)`` after every ingest that added rows."""
+        self.listeners.append(listener)
+
+    def ingest(self, df):
+        """Add rows newer than what is held (a prepared frame, sorted by timestamp)."""
+        with self._lock:
+            if df.empty:
+                return 0
+            initial = self.changes.empty
+            new = df if initial else time_slice(df, start=self.last_timestamp + pd.Timedelta(1, 'ns'))
+            if self.gate is not None and not new.empty:
+                new = self.gate(new, initial)
+            if new.empty:
+                return 0
+            self.changes.append(new)
+            peak = new.loc[[new['pool_hashrate'].idxmax()]]
+            if self.ath_row is None or peak['pool_hashrate'].iloc[0] > self.ath_row['pool_hashrate'].iloc[0]:
+                self.ath_row = peak.copy()
+            self._evict(self.last_timestamp - pd.Timedelta(days=self.raw_days))
+            self._enforce_ceiling()
+            self._notify(new, initial)
+            return len(new)
+
+    def restore(self, changes, rollups, ath_row):
+        """Replace the held history (e.g. from a snapshot); listeners see all of it as an initial ingest."""
+        with self._lock:
+            self.changes = changes
+            self.rollups = rollups
+            self.ath_row = ath_row
+            self.generation += 1
+            self._notify(self.frame(), True)
+
+    def _notify(self, df, initial):
+        for listener in self.listeners:
+            try:
+                listener(df, initial)
+            except Exception:
+                # One broken listener must not stop the others or the ingest
+                self.listener_errors += 1
+                log.exception("history listener %r failed", listener)
+
+    def reset(self):
+        with self._lock:
+            self.changes = ChangePointFrame()
+            self.rollups = pd.DataFrame()
+            self.ath_row = None
+            self.generation += 1
+
+    def matches(self, df):
+        """Whether ``df`` continues the held history: it still has our last row, unchanged.
+
+        False means the upstream was rewritten or rewound since (for instance,
+        relative to a restored snapshot) and the store should be rebuilt.
+        """
+        with self._lock:
+            if self.changes.empty or df.empty:
+                return True
+            last = self.last_row().iloc[-1]
+            ts = df['timestamp'].to_numpy()
+            i = np.searchsorted(ts, last['timestamp'].to_datetime64(), side='left')
+            if i == len(ts) or ts[i] != last['timestamp'].to_datetime64():
+                return False
+            return df['pool_blocks_found'].iloc[i] == last['pool_blocks_found']
+
+    def _evict(self, cutoff):
+        """Fold raw rows older than ``cutoff`` (floored to a bucket edge) into the rollups.
+
+        Deferred while an export is reading the raw tier: rows it hasn't
+        reached yet would move behind its cursor. The next ingest after it
+        finishes catches up.
+        """
+        if self._exports:
+            return
+        cutoff = pd.Timestamp(cutoff).floor(self.interval)
+        old = self.changes.drop_before(cutoff)
+        if old.empty:
+            return
+        rolled = rollup(old, self.interval)
+        self.rollups = rolled if self.rollups.empty else pd.concat([self.rollups, rolled], ignore_index=True)
+        self.evictions += 1
+
+    def _enforce_ceiling(self):
+        while self.memory_bytes() > self.ceiling_bytes and len(self.changes) > 1:
+            if self._exports:
+                # The raw tier can't shrink under an export, and halving the rollups on every
+                # pass would empty them; checked again on the next ingest or when it ends
+                break
+            # Halve the raw window, then fall back to dropping the oldest rollups
+            span, raw = self.raw_span(), len(self.changes)
+            if span > pd.Timedelta(self.interval):
+                self._evict(self.last_timestamp - span / 2)
+                if len(self.changes) < raw:
+                    continue
+                # Half the span floors to a bucket edge before the first raw row: nothing moved
+            if len(self.rollups) > 1:
+                self.rollups = self.rollups.iloc[len(self.rollups) // 2:].reset_index(drop=True)
+            else:
+                break
+
+    def raw_span(self):
+        if self.changes.empty:
+            return pd.Timedelta(0)
+        return self.changes.last_timestamp - self.changes.first_timestamp
+
+    def memory_bytes(self):
+        return self.changes.nbytes + frame_bytes(self.rollups) + frame_bytes(self.ath_row)
+
+    def frame(self):
+        """Rollups followed by raw rows: the full history at mixed resolution.
+
+        Decoded afresh on every call and not kept, so it is for one-off
+        consumers (a restore's listeners, a published copy); views should
+        ask ``window()`` for the rows and columns they draw.
+        """
+        with self._lock:
+            parts = [p for p in (self.rollups, self.changes.decode()) if not p.empty]
+            if self.ath_row is not None and self.ath_row['timestamp'].iloc[0] < self.changes.first_timestamp:
+                # Aged-out ATH row: its block (if any) is already counted in the rollups
+                parts.insert(0, self.ath_row.assign(blocks_delta=0, block_found=False))
+            return (pd.concat(parts, ignore_index=True).sort_values('timestamp', kind='stable')
+                    .reset_index(drop=True) if parts else pd.DataFrame())
+
+    def window(self, start=None, end=None, columns=None):
+        """Materialize only the rows of [start, end], optionally only some columns."""
+        with self._lock:
+            parts = [time_slice(self.rollups, start, end)] if not self.rollups.empty else []
+            parts = [p[[c for c in columns if c in p.columns]] if columns else p for p in parts if not p.empty]
+            if not self.changes.empty:
+                # Only the requested rows and columns of the raw tier are decoded
+                parts.append(self.changes.decode(start, end, columns))
+            parts = [p for p in parts if not p.empty]
+            return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def iter_window(self, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS):
+        """``window()`` in chunks of about ``chunk_rows`` rows, all with the same columns.
+
+        Only one chunk of the raw tier is decoded at a time, and the lock is
+        held just while it is cut, so ingest carries on during a long
+        export; raw rows are not evicted until it finishes (or the iterator
+        is closed), so none slip from the raw tier into rollups already
+        passed. ``end`` defaults to the newest row when iteration starts.
+        """
+        with self._lock:
+            rollups = self.rollups
+            end = self.last_timestamp if end is None else pd.Timestamp(end)
+            names = list(columns) if columns else (self.changes.order or list(rollups.columns))
+            if end is None:
+                return
+            self._exports += 1
+        try:
+            if not rollups.empty:
+                part = time_slice(rollups, start, end)
+                for i in range(0, len(part), chunk_rows):
+                    yield part.iloc[i:i + chunk_rows].reindex(columns=names)
+            cursor = start
+            while True:
+                with self._lock:
+                    chunk, cursor = self.changes.cut(cursor, end, chunk_rows, names)
+                if not chunk.empty:
+                    yield chunk.reindex(columns=names)
+                if cursor is None:
+                    return
+        finally:
+            with self._lock:
+                self._exports -= 1
+                self._enforce_ceiling()
+
+    def stats(self):
+        return {
+            'raw_rows': len(self.changes),
+            'rollup_rows': len(self.rollups),
+            'raw_days': self.raw_span().total_seconds() / 86400,
+            'raw_days_target': self.raw_days,
+            'memory_mb': self.memory_bytes() / 1024 / 1024,
+            'raw_mb': self.changes.nbytes / 1024 / 1024,
+            'raw_dense_mb': self.changes.dense_nbytes() / 1024 / 1024,
+            'ceiling_mb': self.ceiling_bytes / 1024 / 1024,
+            'evictions': self.evictions,
+            'listener_errors': self.listener_errors,
+        }
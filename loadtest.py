@@ -0,0 +1,346 @@
+"""Concurrent-viewer load test for app.py.
+
+Starts ``streamlit run app.py`` against local stubs of the pool and burn
+feeds and of the exchanges (candles and token tickers, through
+``QPOOL_EXCHANGE``), so no run touches a real host, then drives N headless sessions over Streamlit's websocket protocol
+(``/_stcore/stream``, protobuf ``BackMsg``/``ForwardMsg``). Each viewer reruns
+the page every ``--interval`` seconds like a browser on the 1 s refresh, and
+now and then flips the log-scale toggle or picks another revenue period.
+Tab switches are not simulated: ``st.tabs`` renders every tab on each run
+and switching happens in the browser, so it costs the server nothing.
+
+For each N it records rerun latency percentiles (request sent to
+``script_finished``), server CPU and RSS (from ``/proc``), and appends one
+row per N to a CSV. Rows carry a release label, so the file is a capacity
+curve to compare across releases::
+
+    python loadtest.py --viewers 1 2 4 8 16 32 --out loadtest.csv
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import requests
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import replay
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+VIEWERS = [1, 2, 4, 8, 16, 32]
+INTERVAL = 1.0   # seconds between reruns per viewer (the app's refresh)
+DURATION = 30.0  # seconds measured per step
+WARMUP = 5.0     # seconds per step before latencies count
+SLO = 1.0        # seconds; a step is within capacity while its p90 stays under this
+TOGGLE_SHARE = 0.1  # of reruns that flip the log-scale toggle
+RADIO_SHARE = 0.1   # of reruns that change the revenue period
+COLUMNS = ['label', 'started', 'viewers', 'reruns', 'reruns_per_sec', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms',
+           'errors', 'cpu_pct', 'rss_mb']
+
+
+class StubFeeds:
+    """Local stand-in for the pool and burn CSV endpoints.
+
+    Serves a recorded history with timestamps moved so that rows appear one
+    by one in real time, starting with ``lead`` of the file already visible,
+    so the app ingests new rows the way it does live.
+    """
+
+    def __init__(self, path="data/pool_stats_V2.csv", lead=0.8):
+        pool = replay.read_history(path)
+        ts = pd.to_datetime(pool['timestamp'])
+        now = pd.Timestamp.now().floor('s')
+        pool['timestamp'] = ts - ts.iloc[int((len(pool) - 1) * lead)] + now
+        self.pool = pool
+        self.times = pool['timestamp'].to_numpy()
+        days = pd.date_range(now - pd.Timedelta(days=40), now, freq='20h')
+        self.burns = pd.DataFrame({'timestamp': days, 'tx': [f'tx{i}' for i in range(len(days))],
+                                   'qubic_amount': np.arange(len(days)) * 1e9, 'usdt_value': np.arange(len(days)) * 2e3})
+        self._body = (None, b"")
+        self._lock = threading.Lock()
+        self.server = None
+
+    def pool_csv(self):
+        visible = int(np.searchsorted(self.times, np.datetime64(pd.Timestamp.now()), side='right'))
+        with self._lock:
+            if self._body[0] != visible:
+                self._body = (visible, self.pool.iloc[:visible].to_csv(index=False).encode())
+            return self._body[1]
+
+    def start(self, port=0):
+        feeds = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/pool.csv":
+                    body = feeds.pool_csv()
+                elif self.path == "/burns.csv":
+                    body = feeds.burns.to_csv(index=False).encode()
+                else:
+                    # Compressed variants and anything else: not here, so the app uses the plain CSV
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+
+class StubExchange:
+    """Offline stand-in for a ccxt exchange: flat-ish hourly candles and tickers for any market."""
+
+    rateLimit = 0
+    enableRateLimit = True
+    has = {"fetchTickers": True}
+
+    def __init__(self, exchange_id="stub"):
+        self.id = exchange_id
+
+    def parse_timeframe(self, timeframe):
+        return int(pd.Timedelta(timeframe).total_seconds())
+
+    def _price(self, symbol, ms):
+        base = 1e-6 if symbol.startswith("QUBIC") else 300.0
+        return base * (1 + 0.05 * np.sin(ms / 3.6e6 / 24))
+
+    def fetch_ohlcv(self, symbol, timeframe="1h", since=None, limit=1000):
+        step = self.parse_timeframe(timeframe) * 1000
+        now = int(time.time() * 1000) // step * step
+        start = since // step * step if since is not None else now - step * (limit - 1)
+        candles = []
+        for ms in range(start, min(now, start + step * (limit - 1)) + 1, step):
+            price = self._price(symbol, ms)
+            candles.append([ms, price, price * 1.01, price * 0.99, price, 1e4])
+        return candles
+
+    def fetch_ticker(self, symbol):
+        last = self._price(symbol, time.time() * 1000)
+        return {"symbol": symbol, "last": last, "percentage": 0.0, "baseVolume": 1e4, "quoteVolume": 1e4 * last}
+
+    def fetch_tickers(self, symbols=None):
+        return {symbol: self.fetch_ticker(symbol) for symbol in symbols or []}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(feeds_url, port, timeout=60):
+    """Run app.py under ``streamlit run`` reading the stub feeds; returns the process once healthy."""
+    env = dict(os.environ, QPOOL_POOL_URL=f"{feeds_url}/pool.csv", QPOOL_BURN_URL=f"{feeds_url}/burns.csv",
+               QPOOL_SNAPSHOT="", QPOOL_EXCHANGE="loadtest:StubExchange",
+               QPOOL_OHLCV_DB=os.path.join("data", f".loadtest-{port}.sqlite"))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"app did not become healthy on port {port} within {timeout}s")
+
+
+class ProcessSampler:
+    """CPU time and resident memory of one process, read from /proc."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            # Fields after the command name; utime and stime are the 14th and 15th overall
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def rss_mb(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+
+async def viewer(url, interval, record_from, until, latencies, errors, rng):
+    """One headless session: rerun every ``interval`` seconds until ``until``, interacting now and then."""
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=60) as ws:
+        page_hash = ""
+        widgets = {}   # id -> WidgetState sent with every rerun, as the browser does
+        controls = {}  # 'toggle' / 'radio' -> element proto from the last run
+        while time.monotonic() < until:
+            roll = rng.random()
+            if 'toggle' in controls and roll < TOGGLE_SHARE:
+                toggle = controls['toggle']
+                current = widgets[toggle.id].bool_value if toggle.id in widgets else toggle.default
+                widgets[toggle.id] = WidgetState(id=toggle.id, bool_value=not current)
+            elif 'radio' in controls and roll < TOGGLE_SHARE + RADIO_SHARE:
+                radio = controls['radio']
+                widgets[radio.id] = WidgetState(id=radio.id, string_value=rng.choice(list(radio.options)))
+            msg = BackMsg()
+            msg.rerun_script.page_script_hash = page_hash
+            msg.rerun_script.widget_states.widgets.extend(widgets.values())
+            started = time.monotonic()
+            await ws.send(msg.SerializeToString())
+            failed = False
+            while True:
+                fwd = ForwardMsg()
+                fwd.ParseFromString(await ws.recv())
+                kind = fwd.WhichOneof("type")
+                if kind == "new_session":
+                    page_hash = fwd.new_session.page_script_hash
+                elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                    element = fwd.delta.new_element
+                    field = element.WhichOneof("type")
+                    if field == "checkbox":
+                        controls['toggle'] = element.checkbox
+                    elif field == "radio":
+                        controls['radio'] = element.radio
+                    elif field == "exception":
+                        failed = True
+                elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    failed = failed or fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR
+                    break
+            finished = time.monotonic()
+            if started >= record_from:
+                latencies.append(finished - started)
+                errors[0] += failed
+            await asyncio.sleep(max(0.0, interval - (finished - started)))
+
+
+async def _drive(url, n, interval, warmup, duration, seed):
+    latencies, errors = [], [0]
+    start = time.monotonic()
+    # Viewers arrive spread over the first interval rather than all at once
+    tasks = []
+    for i in range(n):
+        tasks.append(asyncio.create_task(viewer(url, interval, start + warmup, start + warmup + duration,
+                                                latencies, errors, random.Random(seed + i))))
+        await asyncio.sleep(interval / n)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors[0] += sum(isinstance(r, Exception) for r in results)
+    return latencies, errors[0]
+
+
+def step(url, sampler, n, interval=INTERVAL, warmup=WARMUP, duration=DURATION, seed=0):
+    """Measure ``n`` concurrent viewers; one row of the capacity curve."""
+    cpu_started, wall_started = None, None
+
+    async def run():
+        nonlocal cpu_started, wall_started
+        drive = asyncio.create_task(_drive(url, n, interval, warmup, duration, seed))
+        await asyncio.sleep(warmup)
+        cpu_started, wall_started = sampler.cpu_seconds(), time.monotonic()
+        return await drive
+
+    latencies, errors = asyncio.run(run())
+    wall = time.monotonic() - wall_started
+    ms = np.asarray(latencies) * 1000 if latencies else np.array([np.nan])
+    return {
+        'viewers': n,
+        'reruns': len(latencies),
+        'reruns_per_sec': round(len(latencies) / duration, 2),
+        'p50_ms': round(float(np.percentile(ms, 50)), 1),
+        'p90_ms': round(float(np.percentile(ms, 90)), 1),
+        'p99_ms': round(float(np.percentile(ms, 99)), 1),
+        'max_ms': round(float(ms.max()), 1),
+        'errors': int(errors),
+        'cpu_pct': round(100 * (sampler.cpu_seconds() - cpu_started) / wall, 1),
+        'rss_mb': round(sampler.rss_mb(), 1),
+    }
+
+
+def release_label():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(viewers=VIEWERS, interval=INTERVAL, warmup=WARMUP, duration=DURATION, slo=SLO, history="data/pool_stats_V2.csv",
+        label=None, out=None):
+    """Run every step against a fresh app process; returns the curve as a DataFrame."""
+    if websockets is None:
+        raise ImportError("the websockets package is required for the load test (pip install websockets)")
+    feeds = StubFeeds(history)
+    feeds_url = feeds.start()
+    port = free_port()
+    proc = start_app(feeds_url, port)
+    label = label or release_label()
+    rows = []
+    try:
+        sampler = ProcessSampler(proc.pid)
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        for n in viewers:
+            row = {'label': label, 'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                   **step(url, sampler, n, interval, warmup, duration)}
+            rows.append(row)
+            print(f"{n:>4} viewers: p50 {row['p50_ms']:7.0f} ms  p90 {row['p90_ms']:7.0f} ms  "
+                  f"p99 {row['p99_ms']:7.0f} ms  {row['reruns_per_sec']:6.1f} reruns/s  "
+                  f"cpu {row['cpu_pct']:5.0f}%  rss {row['rss_mb']:6.0f} MB  errors {row['errors']}", flush=True)
+            if out:
+                new = not os.path.exists(out)
+                with open(out, "a", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames=COLUMNS)
+                    if new:
+                        writer.writeheader()
+                    writer.writerow(row)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        feeds.server.shutdown()
+        db = os.path.join("data", f".loadtest-{port}.sqlite")
+        if os.path.exists(db):
+            os.remove(db)
+    curve = pd.DataFrame(rows, columns=COLUMNS)
+    within = curve[(curve['p90_ms'] <= slo * 1000) & (curve['errors'] == 0)]
+    capacity = int(within['viewers'].max()) if not within.empty else 0
+    print(f"Capacity at p90 <= {slo * 1000:.0f} ms: {capacity} viewers ({label})")
+    return curve
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test app.py with concurrent headless viewers.")
+    parser.add_argument("--viewers", type=int, nargs="+", default=VIEWERS, help="viewer counts, one step each")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between reruns per viewer")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds measured per step")
+    parser.add_argument("--warmup", type=float, default=WARMUP, help="seconds per step before measuring")
+    parser.add_argument("--slo", type=float, default=SLO, help="p90 rerun latency (s) that counts as within capacity")
+    parser.add_argument("--history", default="data/pool_stats_V2.csv", help="recorded pool history the stub serves")
+    parser.add_argument("--label", help="release label for the rows (default: git describe)")
+    parser.add_argument("--out", default="loadtest.csv", help="CSV the curve is appended to")
+    args = parser.parse_args()
+    run(args.viewers, args.interval, args.warmup, args.duration, args.slo, args.history, args.label, args.out)
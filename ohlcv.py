@@ -0,0 +1,139 @@
+"""Local OHLCV candle cache backfilled from an exchange through ccxt.
+
+Candles are kept in SQLite, keyed by (symbol, timeframe, timestamp). The
+first ``update()`` for a series pages back to ``BACKFILL_FROM``; later calls
+only fetch from the newest stored candle on (that one is re-fetched, since
+it was probably still open when stored). Pages are spaced by the
+exchange's ``rateLimit``: ccxt does that itself (``enableRateLimit``), so
+the cache only sleeps between pages for exchanges that don't.
+
+Any object with ``fetch_ohlcv(symbol, timeframe, since, limit)``,
+``parse_timeframe()`` and ``rateLimit`` works as the exchange, so a stub can
+stand in for ccxt; ``QPOOL_EXCHANGE=module:factory`` swaps one in for every
+exchange the app makes (the load test's stub). Backfill from the command line with
+``python ohlcv.py --db data/ohlcv.sqlite QUBIC/USDT XMR/USDT``.
+"""
+import argparse
+import importlib
+import os
+import sqlite3
+import threading
+import time
+
+import ccxt
+import pandas as pd
+
+EXCHANGE_ID = "mexc"
+SYMBOLS = ["QUBIC/USDT", "XMR/USDT"]
+TIMEFRAME = "1h"
+BACKFILL_FROM = "2024-01-01"
+PAGE_LIMIT = 1000
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+EXCHANGE_FACTORY = os.environ.get("QPOOL_EXCHANGE")  # "module:callable" taking the exchange id
+
+
+def make_exchange(exchange_id=EXCHANGE_ID):
+    if EXCHANGE_FACTORY:
+        module, name = EXCHANGE_FACTORY.split(":")
+        return getattr(importlib.import_module(module), name)(exchange_id)
+    return getattr(ccxt, exchange_id)({"enableRateLimit": True})
+
+
+class OHLCVCache:
+    def __init__(self, path, exchange=None, backfill_from=BACKFILL_FROM, page_limit=PAGE_LIMIT):
+        self.path = path
+        self._exchange = exchange
+        self.backfill_from = int(pd.Timestamp(backfill_from, tz="UTC").timestamp() * 1000)
+        self.page_limit = page_limit
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS candles (symbol TEXT, timeframe TEXT, ts INTEGER, "
+                "open REAL, high REAL, low REAL, close REAL, volume REAL, PRIMARY KEY (symbol, timeframe, ts))"
+            )
+
+    @property
+    def exchange(self):
+        # Created on first use so reading cached candles never touches the network
+        if self._exchange is None:
+            self._exchange = make_exchange()
+        return self._exchange
+
+    def last_ts(self, symbol, timeframe=TIMEFRAME):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT MAX(ts) FROM candles WHERE symbol = ? AND timeframe = ?", (symbol, timeframe)
+            ).fetchone()[0]
+
+    def _throttle(self):
+        if getattr(self.exchange, "enableRateLimit", False):
+            return  # ccxt already spaces requests by rateLimit
+        wait = getattr(self.exchange, "rateLimit", 0) / 1000 - (time.monotonic() - self._last_request)
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def _store(self, symbol, timeframe, candles):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, timeframe, int(c[0]), *c[1:6]) for c in candles],
+            )
+
+    def update(self, symbol, timeframe=TIMEFRAME):
+        """Fetch candles newer than the stored ones (all since ``backfill_from`` the first time); returns how many."""
+        step = self.exchange.parse_timeframe(timeframe) * 1000
+        last = self.last_ts(symbol, timeframe)
+        cursor = last if last is not None else self.backfill_from
+        fetched = 0
+        while True:
+            self._throttle()
+            candles = self.exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=self.page_limit)
+            candles = [c for c in candles if c[0] >= cursor]
+            if not candles:
+                break
+            self._store(symbol, timeframe, candles)
+            fetched += len(candles)
+            next_cursor = candles[-1][0] + step
+            # Exchanges may cap pages below ``page_limit``, so only stop at the present
+            if next_cursor > time.time() * 1000:
+                break
+            cursor = next_cursor
+        return fetched
+
+    def update_all(self, symbols=SYMBOLS, timeframe=TIMEFRAME):
+        return {symbol: self.update(symbol, timeframe) for symbol in symbols}
+
+    def frame(self, symbol, timeframe=TIMEFRAME, start=None, end=None):
+        """Stored candles as a DataFrame with a naive UTC ``timestamp`` column."""
+        sql = "SELECT ts, open, high, low, close, volume FROM candles WHERE symbol = ? AND timeframe = ?"
+        params = [symbol, timeframe]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(int(pd.Timestamp(start).timestamp() * 1000))
+        if end is not None:
+            sql += " AND ts <= ?"
+            params.append(int(pd.Timestamp(end).timestamp() * 1000))
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY ts", params).fetchall()
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+    def frames(self, symbols=SYMBOLS, timeframe=TIMEFRAME):
+        return {symbol: self.frame(symbol, timeframe) for symbol in symbols}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the local OHLCV cache.")
+    parser.add_argument("symbols", nargs="*", default=SYMBOLS)
+    parser.add_argument("--db", default="data/ohlcv.sqlite")
+    parser.add_argument("--timeframe", default=TIMEFRAME)
+    parser.add_argument("--since", default=BACKFILL_FROM)
+    args = parser.parse_args()
+    cache = OHLCVCache(args.db, backfill_from=args.since)
+    for symbol in args.symbols:
+        print(f"{symbol} {args.timeframe}: {cache.update(symbol, args.timeframe):,} candles fetched, "
+              f"{len(cache.frame(symbol, args.timeframe)):,} stored")
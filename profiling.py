@@ -0,0 +1,100 @@
+"""On-demand profiling of single app.py reruns.
+
+Off unless asked for: add ``?profile=1`` to the page URL to profile the
+next rerun of that session (the parameter is then removed, so reload with
+it to profile another), or set ``QPOOL_PROFILE=1`` to sample one rerun
+every ``QPOOL_PROFILE_EVERY`` seconds across the process. A profiled rerun
+runs under ``cProfile`` from the top of app.py to the end. Its stats are
+written to ``PROFILE_DIR`` as ``<session>-<UTC time>.pstats``, keeping the
+newest ``QPOOL_PROFILE_KEEP`` files; read them with ``python -m pstats``,
+snakeviz, or flameprof for a flamegraph. The functions with the most own
+time are listed in the Diagnostics expander on the next rerun.
+
+When profiling is off, a rerun costs one query-parameter lookup.
+"""
+import cProfile
+import glob
+import os
+import pstats
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+PROFILE_DIR = os.environ.get("QPOOL_PROFILE_DIR", "data/profiles")
+SAMPLED = os.environ.get("QPOOL_PROFILE", "") not in ("", "0")
+SAMPLE_EVERY = float(os.environ.get("QPOOL_PROFILE_EVERY", "60"))  # seconds between sampled reruns
+KEEP = int(os.environ.get("QPOOL_PROFILE_KEEP", "50"))  # newest .pstats files kept in PROFILE_DIR
+TOP = 20
+
+_sampled_at = None
+_sample_lock = threading.Lock()
+
+# Profiler left running by a rerun that never reached its end (st.rerun, an exception)
+_running = threading.local()
+
+
+def _sample_due(every):
+    """Whether a sampled rerun is due; at most one per ``every`` seconds in the process."""
+    global _sampled_at
+    with _sample_lock:
+        now = time.monotonic()
+        if _sampled_at is not None and now - _sampled_at < every:
+            return False
+        _sampled_at = now
+        return True
+
+
+def begin(query_params, sampled=SAMPLED, every=SAMPLE_EVERY):
+    """A started profiler if this rerun should be profiled, else None.
+
+    ``?profile=1`` is consumed: it is popped from ``query_params`` so only
+    this one rerun is profiled.
+    """
+    stale = getattr(_running, "profiler", None)
+    if stale is not None:
+        stale.disable()
+        _running.profiler = None
+    if query_params.get("profile", "0") not in ("", "0"):
+        query_params.pop("profile")
+    elif not (sampled and _sample_due(every)):
+        return None
+    profiler = cProfile.Profile()
+    _running.profiler = profiler
+    profiler.enable()
+    return profiler
+
+
+def finish(profiler, session_id, directory=PROFILE_DIR, keep=KEEP):
+    """Stop ``profiler`` and save its stats, dropping all but the newest ``keep`` files; returns (path, top functions)."""
+    profiler.disable()
+    _running.profiler = None
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = os.path.join(directory, f"{session_id}-{stamp}.pstats")
+    profiler.dump_stats(path)
+    rotate(directory, keep)
+    return path, top_functions(profiler)
+
+
+def rotate(directory, keep=KEEP):
+    """Delete all but the newest ``keep`` .pstats files in ``directory``."""
+    paths = sorted(glob.glob(os.path.join(directory, "*.pstats")), key=os.path.getmtime)
+    for path in paths[:max(len(paths) - keep, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # already gone (another replica rotating the same directory)
+
+
+def top_functions(profiler, limit=TOP):
+    """The ``limit`` functions with the most own time, as a frame."""
+    stats = pstats.Stats(profiler).stats
+    rows = [{
+        'function': f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+        'calls': calls,
+        'own_s': own,
+        'cumulative_s': cumulative,
+    } for (filename, line, name), (_, calls, own, cumulative, _) in stats.items()]
+    return pd.DataFrame(rows).sort_values('own_s', ascending=False).head(limit).reset_index(drop=True)
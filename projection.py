@@ -0,0 +1,110 @@
+"""Monte Carlo projection of the blocks the pool will find by the end of the epoch.
+
+The pool finds blocks at rate ``share / MONERO_BLOCK_TIME``, ``share`` being
+its smoothed fraction of network hashrate (``estimators.Smoother``). Each
+path draws its own share from a log-normal around the current one and
+keeps it to the epoch turnover: a pool's share moves with its miners, who
+stay for days, so the remaining hours don't average out as independent
+draws would. The spread is how much the share's daily mean varied over
+the last week. Each path then draws its Poisson total to the turnover in
+one go. The fan needs blocks by the end of every ``STEP``, so a subsample of
+``FAN_PATHS`` of those paths spreads its totals over the steps (given its
+total, a path's blocks land in each step in proportion to the step's
+length). The P10 / P50 / P90 totals are quantiles over all paths, and the
+fan ends on them.
+
+Qubic epochs turn over every Wednesday at 12:00 UTC.
+"""
+import numpy as np
+import pandas as pd
+
+from blockstats import MONERO_BLOCK_TIME
+
+EPOCH_TURNOVER = pd.Timestamp('2025-01-01 12:00')  # a Wednesday noon UTC, when Qubic epochs turn over
+EPOCH_LENGTH = pd.Timedelta(weeks=1)
+PATHS = 100_000
+FAN_PATHS = 10_000  # of the paths, spread over the steps for the fan
+STEP = pd.Timedelta("6h")
+QUANTILES = {'p10': 0.1, 'p50': 0.5, 'p90': 0.9}
+DISPERSION_WINDOW = pd.Timedelta(days=7)
+MIN_DAYS = 3  # full days of share needed for a day-level spread; hours are used before that
+
+
+def epoch_end(ts):
+    """The first epoch turnover after ``ts``."""
+    return EPOCH_TURNOVER + (pd.Timestamp(ts) - EPOCH_TURNOVER) // EPOCH_LENGTH * EPOCH_LENGTH + EPOCH_LENGTH
+
+
+def share_dispersion(series, column='share_kalman', window=DISPERSION_WINDOW, min_days=MIN_DAYS):
+    """Relative spread of daily-mean share over the last ``window`` of smoothed ``series``.
+
+    Days are 24-hour blocks counted back from the newest hour; with fewer
+    than ``min_days`` of them the hourly means are used instead, which
+    spread wider. Returns the sigma of the log-normal whose coefficient of
+    variation matches the means', 0.0 without two means to compare. Unlike
+    the spread of their logs, it stays finite when a small pool's miners
+    drop to nothing for an hour.
+    """
+    if series.empty:
+        return 0.0
+    recent = series[series['timestamp'] >= series['timestamp'].iloc[-1] - window]
+    means = recent.set_index('timestamp')[column].astype(float).resample('h').mean().dropna()
+    days = len(means) // 24
+    if days >= min_days:
+        means = means.iloc[len(means) - days * 24:].groupby(np.arange(days * 24) // 24).mean()
+    if len(means) < 2 or means.mean() <= 0:
+        return 0.0
+    return float(np.sqrt(np.log1p((means.std() / means.mean()) ** 2)))
+
+
+def simulate(share, share_sd, seconds, paths=PATHS, step=STEP.total_seconds(), fan_paths=FAN_PATHS, seed=None):
+    """Blocks found by the epoch turnover on each of ``paths`` paths, and by each ``step`` on the first ``fan_paths``.
+
+    Returns ``(totals, cumulative)``: an int array of ``paths`` totals, and
+    an int array of shape (fan_paths, steps), cumulative along steps, whose
+    last column is the first ``fan_paths`` totals. Every path keeps its own
+    share throughout.
+    """
+    rng = np.random.default_rng(seed)
+    steps = max(int(np.ceil(seconds / step)), 1)
+    dt = np.full(steps, step, dtype=float)
+    dt[-1] = seconds - step * (steps - 1)
+    shares = share * np.exp(share_sd * rng.standard_normal(paths) - share_sd ** 2 / 2) if share_sd else np.full(paths, share)
+    totals = rng.poisson(shares * (seconds / MONERO_BLOCK_TIME))
+    # Each step takes its share of what is left of the path's total, so the steps sum to it
+    left = totals[:min(fan_paths, paths)].copy()
+    counts = np.empty((len(left), steps), dtype=np.int64)
+    for i in range(steps - 1):
+        counts[:, i] = rng.binomial(left, dt[i] / dt[i:].sum())
+        left -= counts[:, i]
+    counts[:, -1] = left
+    return totals, np.cumsum(counts, axis=1, dtype=np.int32)
+
+
+def project(share, share_sd, now, blocks_so_far=0, paths=PATHS, step=STEP, fan_paths=FAN_PATHS, seed=None):
+    """Projected epoch total and fan bands; None without a positive share or time left.
+
+    ``share_sd`` is the relative spread of the share (``share_dispersion``).
+
+    Returns ``{'end', 'p10', 'p50', 'p90', 'mean', 'fan'}``, totals including
+    ``blocks_so_far``; ``fan`` has one row per step (and ``now``) with the
+    same quantiles of blocks found by then over ``fan_paths`` of the paths,
+    its last row the totals.
+    """
+    now = pd.Timestamp(now)
+    end = epoch_end(now)
+    seconds = (end - now).total_seconds()
+    if not share or share <= 0 or seconds <= 0:
+        return None
+    totals, cumulative = simulate(share, share_sd, seconds, paths, step.total_seconds(), fan_paths, seed)
+    bands = np.quantile(cumulative, list(QUANTILES.values()), axis=0, method='inverted_cdf')
+    bands[:, -1] = np.quantile(totals, list(QUANTILES.values()), method='inverted_cdf')
+    # The subsample's bands can sit a block above the totals' near the end; keep the fan rising to them
+    bands = np.minimum.accumulate(bands[:, ::-1], axis=1)[:, ::-1] + blocks_so_far
+    times = [now + step * (i + 1) for i in range(cumulative.shape[1] - 1)] + [end]
+    fan = pd.DataFrame({'timestamp': [now] + times})
+    for i, name in enumerate(QUANTILES):
+        fan[name] = np.concatenate([[blocks_so_far], bands[i]])
+    out = {name: int(fan[name].iloc[-1]) for name in QUANTILES}
+    out.update(end=end, mean=float(totals.mean()) + blocks_so_far, fan=fan)
+    return out
@@ -0,0 +1,261 @@
+"""Data-quality checks on pool rows before they enter the history.
+
+A ``QualityGate`` is installed as ``HistoryStore.gate`` and sees every batch
+of new rows first. Each check is a vectorized comparison of the batch with
+itself shifted by one row, with the last row already checked in front, so
+a batch costs a handful of array passes however it was split. Rows that
+would corrupt the metrics are quarantined (kept out of the store, the
+last ``QUARANTINE_ROWS`` of them kept for inspection):
+
+- ``duplicate``: a timestamp seen on the previous row
+- ``invalid``: pool hashrate missing, negative or above the network's
+- ``spike``: pool hashrate over ``SPIKE_RATIO`` times the median of its
+  ``SPIKE_WINDOW``-row block and the blocks beside it (``block_reference``),
+  or of ``SPIKE_FLOOR`` of the network's when that is larger: a pool of a
+  few miners genuinely swings by 50x within minutes
+- ``counter``: pool blocks found lower than on the last row kept (a dip),
+  or higher than on the rows either side of it (a one-row jump). A rise
+  isn't confirmed until the next row arrives, so a row whose counter went
+  up is held back until then. A fall that lasts ``COUNTER_RESET_ROWS``
+  rows is taken as the counter's new level (an upstream reset or a
+  bad row kept before) and the rows from there on are kept
+- ``height``: network height lower than on the previous row
+
+Others are only counted, since the row itself is still usable:
+
+- gaps: more than ``GAP`` since the previous row
+- stuck: network hashrate and height unchanged for longer than ``STUCK``
+  (Monero blocks come every two minutes, so twenty minutes is a stale feed)
+
+When rows are dropped, ``blocks_delta``/``block_found`` of the rows kept
+are recomputed so a quarantined counter glitch doesn't read as a block.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+GAP = pd.Timedelta(os.environ.get("QPOOL_QUALITY_GAP", "1min"))
+STUCK = pd.Timedelta(os.environ.get("QPOOL_QUALITY_STUCK", "20min"))
+SPIKE_RATIO = 10
+SPIKE_FLOOR = 0.001  # share of network hashrate below which a local median is too small to judge by
+SPIKE_WINDOW = 60  # rows per median block, about two minutes
+QUARANTINE_ROWS = 1000
+COUNTER_RESET_ROWS = 60  # rows below the kept counter before it is taken as the new level
+# Quarantine reasons, in the order a row's reason is chosen when several apply
+REASONS = ['duplicate', 'invalid', 'counter', 'height', 'spike']
+
+
+def _falls(values, last):
+    """Whether each value is below the one before it (``last`` before the first)."""
+    out = np.empty(len(values), dtype=bool)
+    np.less(values[1:], values[:-1], out=out[1:])
+    out[0] = last is not None and values[0] < last
+    return out
+
+
+def counter_flags(values, following, base, falling, reset_rows):
+    """(up, down, falling) for a batch of block counters.
+
+    ``up`` marks one-row jumps: above the next value (``following`` after
+    the last), which is back at or above the previous one. ``down`` marks
+    values below the highest one kept so far (``base`` before the batch),
+    up-jumps aside. A run of ``reset_rows`` downs (``falling`` of them
+    carried from earlier batches) re-bases at the row that completes it.
+    The returned ``falling`` is the run still open at the end.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    prev = np.append(np.nan if base is None else base, values[:-1])
+    after = np.append(values[1:], np.nan if following is None else following)
+    up = (values > after) & (after >= prev)
+    down = np.zeros(n, dtype=bool)
+    start = 0
+    while start < n:
+        level = np.where(up[start:], -np.inf, values[start:])
+        kept = np.maximum.accumulate(np.append(-np.inf if base is None else base, level))[:-1]
+        falls = values[start:] < kept
+        idx = np.arange(len(falls))
+        since = np.maximum.accumulate(np.where(falls, -1, idx))
+        run = idx - since + np.where(since < 0, falling, 0)
+        reset = np.flatnonzero(falls & (run >= reset_rows))
+        if not len(reset):
+            down[start:] = falls
+            falling = int(run[-1]) if falls[-1] else 0
+            break
+        r = int(reset[0])
+        down[start:start + r] = falls[:r]
+        up[start + r] = False
+        base, falling, start = values[start + r], 0, start + r + 1
+    return up, down, falling
+
+
+def _changes(values, last):
+    """Whether each value differs from the one before it; the first always does without ``last``."""
+    out = np.empty(len(values), dtype=bool)
+    np.not_equal(values[1:], values[:-1], out=out[1:])
+    out[0] = last is None or values[0] != last
+    return out
+
+
+def block_reference(values, size):
+    """Typical value around each element: the largest median of its ``size``-row block and the two beside it.
+
+    Blocks run from the start, the last one absorbing any remainder, so a
+    few new rows behind ``size`` rows of context share the context's block.
+    Taking the neighbours' medians too keeps a genuine step, or a small
+    pool's miners dropping off for a minute, from reading as a spike. One
+    partition per block: linear, unlike a rolling median.
+    """
+    n_blocks = max(len(values) // size, 1)
+    split = (n_blocks - 1) * size
+    median = np.nanmedian if np.isnan(values).any() else np.median
+    medians = np.append(median(values[:split].reshape(-1, size), axis=1) if split else [], median(values[split:]))
+    reference = np.maximum(medians, np.maximum(np.append(medians[1:], medians[-1]), np.append(medians[0], medians[:-1])))
+    return np.repeat(reference, np.append(np.full(n_blocks - 1, size), len(values) - split))
+
+
+class QualityGate:
+    """Flags and quarantines bad rows; ``gate(new, initial)`` returns the rows to keep."""
+
+    def __init__(self, gap=GAP, stuck=STUCK, spike_ratio=SPIKE_RATIO, spike_window=SPIKE_WINDOW,
+                 spike_floor=SPIKE_FLOOR, quarantine_rows=QUARANTINE_ROWS, counter_reset_rows=COUNTER_RESET_ROWS):
+        self.gap = gap.value  # ns, compared with int64 timestamps
+        self.stuck = stuck.value
+        self.spike_ratio = spike_ratio
+        self.spike_window = spike_window
+        self.spike_floor = spike_floor
+        self.quarantine_rows = quarantine_rows
+        self.counter_reset_rows = counter_reset_rows
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(['rows', 'quarantined', 'gaps', 'stuck'] + REASONS, 0)
+            self.gap_seconds = 0.0
+            self.seconds = 0.0  # spent checking
+            self.quarantine = pd.DataFrame()
+            self._last = None         # last row checked: {column: value}
+            self._kept_blocks = None  # pool_blocks_found of the last row kept
+            self._pending = None      # last row, held back until the next one confirms its counter rise
+            self._falling = 0         # rows in the run below _kept_blocks so far
+            self._hashrates = np.empty(0)  # trailing pool hashrates, context for the spike reference
+            self._net_since = None    # when the current network hashrate/height was first seen
+
+    def __call__(self, new, initial):
+        if initial:
+            self.reset()
+        with self._lock:
+            started = time.perf_counter()
+            ts = new['timestamp'].to_numpy().view('int64')
+            if self._last is not None:
+                # Already checked (and maybe quarantined) when an earlier fetch brought them
+                new = new.iloc[int(np.searchsorted(ts, self._last['timestamp'], side='right')):]
+                ts = ts[len(ts) - len(new):]
+            if self._pending is not None:
+                pending = self._pending['timestamp'].to_numpy().view('int64')[0]
+                new = pd.concat([self._pending, new.iloc[int(np.searchsorted(ts, pending, side='right')):]])
+                ts = new['timestamp'].to_numpy().view('int64')
+                self._pending = None
+            counter = new['pool_blocks_found'].to_numpy(dtype=float)
+            previous = counter[-2] if len(new) > 1 else self._kept_blocks
+            following = None
+            if len(new) and previous is not None and counter[-1] > previous:
+                # A rise may be a one-row jump; the next row tells
+                self._pending, following = new.iloc[-1:], counter[-1]
+                new, ts = new.iloc[:-1], ts[:-1]
+            if new.empty:
+                return new
+            flags = self._check(new, ts, following)
+            bad = np.zeros(len(new), dtype=bool)
+            for reason in REASONS:
+                bad |= flags[reason]
+            kept = self._keep(new, bad, flags) if bad.any() else new
+            if not kept.empty:
+                self._kept_blocks = kept['pool_blocks_found'].iloc[-1]
+            self.counts['rows'] += len(new)
+            self.seconds += time.perf_counter() - started
+            return kept
+
+    def _check(self, df, ts, following=None):
+        last = self._last or {}
+        flags = {}
+        step = np.diff(ts, prepend=ts[0] if self._last is None else last['timestamp'])
+        flags['duplicate'] = step == 0
+        if self._last is None:
+            flags['duplicate'][0] = False
+        gaps = step > self.gap
+        self.counts['gaps'] += int(gaps.sum())
+        self.gap_seconds += float(step[gaps].sum()) / 1e9
+
+        hashrate = df['pool_hashrate'].to_numpy(dtype=float)
+        network = df['network_hashrate'].to_numpy()
+        flags['invalid'] = np.isnan(hashrate) | (hashrate < 0) | ((network > 0) & (hashrate > network))
+        up, down, self._falling = counter_flags(df['pool_blocks_found'].to_numpy(), following, self._kept_blocks,
+                                                self._falling, self.counter_reset_rows)
+        flags['counter'] = up | down
+        # data/pool_stats.csv predates network_height
+        height = df['network_height'].to_numpy() if 'network_height' in df.columns else None
+        flags['height'] = _falls(height, last.get('network_height')) if height is not None else np.zeros(len(df), dtype=bool)
+
+        context = np.concatenate([self._hashrates, hashrate])
+        reference = block_reference(context, self.spike_window)[len(self._hashrates):]
+        reference = np.maximum(reference, self.spike_floor * network)
+        flags['spike'] = (reference > 0) & (hashrate > self.spike_ratio * reference)
+        self._hashrates = context[-2 * self.spike_window:]
+
+        # Network feed stuck: time since the network hashrate/height last changed
+        changed = _changes(network, last.get('network_hashrate'))
+        if height is not None:
+            changed |= _changes(height, last.get('network_height'))
+        if self._net_since is None:
+            changed[0] = True
+        # Start of each row's run of unchanged values: a change in this batch, else the carried one
+        start = np.maximum.accumulate(np.where(changed, np.arange(len(ts)), -1))
+        since = np.where(start >= 0, ts[start], self._net_since if self._net_since is not None else 0)
+        self.counts['stuck'] += int(((ts - since) > self.stuck).sum())
+        self._net_since = int(since[-1])
+
+        self._last = {col: df[col].iloc[-1] for col in
+                      ('network_height', 'network_hashrate') if col in df.columns}
+        self._last['timestamp'] = ts[-1]
+        return flags
+
+    def _keep(self, df, bad, flags):
+        reason = np.select([flags[r][bad] for r in REASONS], REASONS, default='')
+        for r in REASONS:
+            self.counts[r] += int(flags[r].sum())
+        self.counts['quarantined'] += int(bad.sum())
+        held = df[bad].assign(reason=reason)
+        self.quarantine = (held if self.quarantine.empty else pd.concat([self.quarantine, held], ignore_index=True)) \
+            .iloc[-self.quarantine_rows:].reset_index(drop=True)
+        kept = df[~bad].copy()
+        if not kept.empty:
+            # Block deltas against the previous row kept, not a quarantined one
+            counter = kept['pool_blocks_found'].to_numpy(dtype=float)
+            delta = np.diff(counter, prepend=counter[0] if self._kept_blocks is None else self._kept_blocks)
+            if self._kept_blocks is None:
+                delta[0] = kept['blocks_delta'].iloc[0]
+            kept['blocks_delta'] = delta
+            kept['block_found'] = delta > 0
+        return kept
+
+    def summary(self):
+        """Running totals: rows checked and quarantined, rates, gaps, outliers and stuck network rows."""
+        with self._lock:
+            rows = self.counts['rows']
+            return {
+                **self.counts,
+                'duplicate_rate': self.counts['duplicate'] / rows if rows else 0.0,
+                'quarantine_rate': self.counts['quarantined'] / rows if rows else 0.0,
+                'gap_hours': self.gap_seconds / 3600,
+                'check_seconds': self.seconds,
+            }
+
+    def recent(self):
+        """The most recently quarantined rows, newest first, with their reason."""
+        with self._lock:
+            return self.quarantine.iloc[::-1].reset_index(drop=True)
@@ -0,0 +1,172 @@
+"""Replay recorded pool history through the live pipeline at accelerated speed.
+
+A ``Replayer`` publishes the rows of a history CSV (``data/pool_stats.csv``,
+``data/pool_stats_V2.csv`` or an export) into a ``stream.RowBroker``, keeping
+their original spacing divided by ``speed``. A ``stream.LiveFeed`` then
+ingests them the way it ingests rows the collector pushes: incrementally,
+through the ``HistoryStore`` and every listener on it (alerts, block stats,
+smoothing, revenue). Rows that fall due together are published back to back
+and picked up by one ingest, as they would be by a slow page.
+
+In the app, set ``QPOOL_REPLAY`` to a CSV path (and optionally
+``QPOOL_REPLAY_SPEED``, default 60). To run the same pipeline headless and
+report sustained throughput, use
+``python replay.py data/pool_stats_V2.csv --speed 1000``.
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import alerts
+import blockstats
+import estimators
+import history
+import projection
+import quality
+import revenue
+import stream
+
+SPEED = 60
+TICK = 0.05  # seconds; rows due within a tick are published together
+# Columns the live feed has and older recordings lack
+LIVE_COLUMNS = ['qubic_epoch', 'qubic_usdt', 'close']
+
+
+def read_history(path):
+    """Raw rows of a history CSV, sorted by time, in the live feed's columns."""
+    df = pd.read_csv(path)
+    if 'pool_blocks_found' not in df.columns and 'blocks_found' in df.columns:
+        # data/pool_stats.csv predates the V2 collector
+        df = df.rename(columns={'blocks_found': 'pool_blocks_found'})
+    ts = pd.to_datetime(df['timestamp'])
+    for col in LIVE_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    if df['qubic_epoch'].isna().all():
+        # Not recorded: number the weekly epochs from the file's first one
+        week = (ts - projection.EPOCH_TURNOVER) // projection.EPOCH_LENGTH
+        df['qubic_epoch'] = week - week.min()
+    order = np.argsort(ts.to_numpy(), kind='stable')
+    return df.iloc[order].reset_index(drop=True)
+
+
+class Replayer:
+    """Publishes recorded rows into ``broker`` on a thread, paced at ``speed`` times real time."""
+
+    def __init__(self, rows, speed=SPEED, broker=None):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self.timestamps = pd.to_datetime(rows['timestamp']).to_numpy()
+        # Seconds after the first row, in recorded time
+        self.offsets = (self.timestamps - self.timestamps[0]) / np.timedelta64(1, 's') if len(rows) else np.empty(0)
+        # Rows go out as the collector sends them: plain JSON-like dicts
+        self.records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+        self.broker = broker or stream.RowBroker()
+        self.published = 0
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def run(self):
+        self.started_at = time.monotonic()
+        n = len(self.records)
+        while self.published < n:
+            due = self.started_at + self.offsets[self.published] / self.speed
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(max(wait, TICK))
+            # Everything due by now goes out at once
+            replayed = (time.monotonic() - self.started_at) * self.speed
+            end = max(int(np.searchsorted(self.offsets, replayed, side='right')), self.published + 1)
+            for row in self.records[self.published:end]:
+                self.broker.publish(row)
+            self.published = end
+        self.finished_at = time.monotonic()
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True, name="replay").start()
+        return self
+
+    def stats(self):
+        """Progress of the replay and the pace actually achieved."""
+        if self.started_at is None:
+            return {'published': 0, 'total': len(self.records), 'position': None, 'rows_per_sec': 0.0, 'speed': 0.0}
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        last = self.published - 1
+        return {
+            'published': self.published,
+            'total': len(self.records),
+            'position': pd.Timestamp(self.timestamps[last]) if last >= 0 else None,
+            'rows_per_sec': self.published / elapsed if elapsed else 0.0,
+            # Recorded seconds covered per wall second; below ``speed`` when publishing can't keep up
+            'speed': self.offsets[last] / elapsed if last >= 0 and elapsed else 0.0,
+        }
+
+
+def throughput(feed, replayer):
+    """Sustained pipeline throughput of a ``LiveFeed`` fed by ``replayer``.
+
+    ``rows_per_sec`` is what the pipeline kept up with at this replay speed;
+    ``capacity`` is rows per second actually spent typing and ingesting, the
+    most it could take.
+    """
+    elapsed = ((replayer.finished_at or time.monotonic()) - replayer.started_at) if replayer.started_at else 0.0
+    return {
+        'rows': feed.rows_ingested,
+        'rows_per_sec': feed.rows_ingested / elapsed if elapsed else 0.0,
+        'capacity': feed.rows_ingested / feed.busy if feed.busy else 0.0,
+        'busy': feed.busy / elapsed if elapsed else 0.0,
+    }
+
+
+def pipeline():
+    """A ``HistoryStore`` with the quality gate and listeners the app puts on it; alerts are kept, not sent."""
+    store = history.HistoryStore()
+    store.gate = quality.QualityGate()
+    engine = alerts.AlertEngine(alerts.load_rules())
+    engine.deliver = False
+    for listener in (engine, blockstats.BlockStats(), estimators.Smoother(), revenue.RevenueLedger()):
+        store.subscribe(listener.on_ingest)
+    return store, engine
+
+
+def run(path, speed=SPEED, poll=0.5, report=5.0):
+    """Replay ``path`` headless, consuming like a page that reruns every ``poll`` seconds."""
+    replayer = Replayer(read_history(path), speed)
+    store, engine = pipeline()
+    feed = stream.LiveFeed(replayer.broker, store, history.prepare_frame)
+    replayer.start()
+    reported = time.monotonic()
+    while True:
+        finished = replayer.done
+        feed.pull()
+        if finished and feed.seq == replayer.published:
+            break
+        if time.monotonic() - reported >= report:
+            reported = time.monotonic()
+            progress, rate = replayer.stats(), throughput(feed, replayer)
+            print(f"{progress['published']:,}/{progress['total']:,} rows, at {progress['position']}, "
+                  f"{rate['rows_per_sec']:,.0f} rows/s (capacity {rate['capacity']:,.0f} rows/s)")
+        time.sleep(poll)
+    return replayer, feed, engine
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a pool history CSV through the ingest pipeline.")
+    parser.add_argument("path", nargs="?", default="data/pool_stats_V2.csv")
+    parser.add_argument("--speed", type=float, default=SPEED, help="times real time (1-1000)")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between ingests, like page reruns")
+    args = parser.parse_args()
+    replayer, feed, engine = run(args.path, args.speed, args.poll)
+    progress, rate = replayer.stats(), throughput(feed, replayer)
+    print(f"Replayed {rate['rows']:,} rows in {replayer.finished_at - replayer.started_at:.1f}s "
+          f"at {progress['speed']:,.0f}x: {rate['rows_per_sec']:,.0f} rows/s sustained, "
+          f"capacity {rate['capacity']:,.0f} rows/s ({rate['busy']:.0%} busy), "
+          f"{len(engine.recent)} alerts, {feed.store.stats()['memory_mb']:.1f} MB history")
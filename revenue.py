@@ -0,0 +1,143 @@
+"""What the pool's blocks were worth, in XMR and USD.
+
+Block events (rows where ``pool_blocks_found`` went up) are priced with a
+sorted as-of join (``pd.merge_asof``) against the nearest XMR/USD price:
+first the ``close`` samples the pool rows carry, then exchange candles
+(``ohlcv.py``) for blocks with no pool price nearby. Values are added to
+per-hour, per-day and per-epoch totals as rows are ingested, so reading a
+total never rescans the block history.
+
+Each block is valued at ``XMR_PER_BLOCK`` (Monero tail emission; fees are
+not in the feed).
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+XMR_PER_BLOCK = float(os.environ.get("QPOOL_XMR_PER_BLOCK", "0.6"))
+POOL_PRICE_TOLERANCE = pd.Timedelta("10min")
+CANDLE_PRICE_TOLERANCE = pd.Timedelta("2h")
+PERIODS = {'hour': 'h', 'day': 'D'}
+
+
+def block_events(df):
+    """One row per ingested row that found blocks: timestamp, blocks, epoch."""
+    found = df[df['blocks_delta'] > 0]
+    return pd.DataFrame({
+        'timestamp': found['timestamp'].to_numpy(),
+        'blocks': found['blocks_delta'].to_numpy(dtype=float),
+        'qubic_epoch': found['qubic_epoch'].to_numpy() if 'qubic_epoch' in found.columns else np.nan,
+    })
+
+
+def price_asof(events, prices, tolerance):
+    """XMR/USD price nearest each event (NaN beyond ``tolerance``); both frames sorted by timestamp."""
+    if prices.empty or events.empty:
+        return pd.Series(np.nan, index=events.index)
+    joined = pd.merge_asof(events[['timestamp']], prices[['timestamp', 'xmr_usd']],
+                           on='timestamp', direction='nearest', tolerance=tolerance)
+    return pd.Series(joined['xmr_usd'].to_numpy(), index=events.index)
+
+
+class RevenueLedger:
+    """Running XMR/USD totals per hour, day and epoch; a ``HistoryStore`` listener."""
+
+    def __init__(self, xmr_per_block=XMR_PER_BLOCK):
+        self.xmr_per_block = xmr_per_block
+        self.candles = pd.DataFrame(columns=['timestamp', 'xmr_usd'])
+        self._candle_version = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # period -> {key: [blocks, xmr, usd]}
+        self.totals = {name: {} for name in (*PERIODS, 'epoch')}
+        self.unpriced = pd.DataFrame(columns=['timestamp', 'blocks', 'qubic_epoch'])
+        self._prices = pd.DataFrame(columns=['timestamp', 'xmr_usd'])  # pool prices near the last row ingested
+        self.version = 0
+
+    def on_ingest(self, df, initial):
+        if initial:
+            with self._lock:
+                self.reset()
+        if df.empty:
+            return
+        pool_prices = pd.DataFrame({'timestamp': df['timestamp'].to_numpy(),
+                                    'xmr_usd': pd.to_numeric(df['close'], errors='coerce').to_numpy()
+                                    if 'close' in df.columns else np.nan}).dropna()
+        # A block early in this batch may be nearest a price from the end of the last one
+        if not self._prices.empty:
+            pool_prices = pd.concat([self._prices, pool_prices], ignore_index=True)
+        self._prices = pool_prices[pool_prices['timestamp'] >= df['timestamp'].iloc[-1] - POOL_PRICE_TOLERANCE]
+        events = block_events(df)
+        if events.empty:
+            return
+        self._add(events, price_asof(events, pool_prices, POOL_PRICE_TOLERANCE))
+
+    def add_prices(self, candles):
+        """Use exchange candles (``ohlcv`` frame) for blocks without a pool price; cheap when unchanged."""
+        version = (len(candles), candles['timestamp'].iloc[-1].value if len(candles) else None)
+        if version == self._candle_version:
+            return
+        with self._lock:
+            self._candle_version = version
+            self.candles = pd.DataFrame({'timestamp': candles['timestamp'].to_numpy(),
+                                         'xmr_usd': candles['close'].to_numpy(dtype=float)})
+            pending, self.unpriced = self.unpriced, self.unpriced.iloc[:0]
+        if not pending.empty:
+            self._add(pending, pd.Series(np.nan, index=pending.index), repriced=True)
+
+    def _add(self, events, price, repriced=False):
+        """Add events to the totals; ones still without a price count in blocks/XMR now and in USD once priced."""
+        with self._lock:
+            missing = price.isna()
+            if missing.any():
+                price[missing] = price_asof(events[missing], self.candles, CANDLE_PRICE_TOLERANCE)
+            unpriced = price.isna()
+            if unpriced.any():
+                self.unpriced = events[unpriced].reset_index(drop=True) if self.unpriced.empty else \
+                    pd.concat([self.unpriced, events[unpriced]], ignore_index=True)
+            xmr = events['blocks'] * self.xmr_per_block
+            valued = events.assign(
+                blocks=0.0 if repriced else events['blocks'],
+                xmr=0.0 if repriced else xmr,
+                usd=(xmr * price).fillna(0.0))
+            keys = {name: valued['timestamp'].dt.floor(freq) for name, freq in PERIODS.items()}
+            keys['epoch'] = valued['qubic_epoch']
+            for name, key in keys.items():
+                grouped = valued.groupby(key.to_numpy())[['blocks', 'xmr', 'usd']].sum()
+                table = self.totals[name]
+                for k, (blocks, xmr, usd) in zip(grouped.index.tolist(), grouped.to_numpy().tolist()):
+                    entry = table.setdefault(k, [0.0, 0.0, 0.0])
+                    entry[0] += blocks
+                    entry[1] += xmr
+                    entry[2] += usd
+            self.version += 1
+
+    def series(self, period='day'):
+        """Totals per ``period`` ('hour', 'day' or 'epoch') as a sorted frame."""
+        with self._lock:
+            table = dict(self.totals[period])
+        df = pd.DataFrame.from_dict(table, orient='index', columns=['blocks', 'xmr', 'usd']).sort_index()
+        return df.rename_axis('qubic_epoch' if period == 'epoch' else 'timestamp')
+
+    def since(self, start, period='hour'):
+        """Summed blocks, XMR and USD over ``period`` buckets starting at or after ``start``."""
+        start = pd.Timestamp(start).floor(PERIODS[period])
+        with self._lock:
+            values = [v for k, v in self.totals[period].items() if k >= start]
+        blocks, xmr, usd = (map(sum, zip(*values)) if values else (0.0, 0.0, 0.0))
+        return {'blocks': blocks, 'xmr': xmr, 'usd': usd}
+
+    def epoch(self, epoch):
+        with self._lock:
+            blocks, xmr, usd = self.totals['epoch'].get(epoch, [0.0, 0.0, 0.0])
+        return {'blocks': blocks, 'xmr': xmr, 'usd': usd}
+
+    def totals_all(self):
+        with self._lock:
+            values = list(self.totals['day'].values())
+        blocks, xmr, usd = (map(sum, zip(*values)) if values else (0.0, 0.0, 0.0))
+        return {'blocks': blocks, 'xmr': xmr, 'usd': usd, 'unpriced_blocks': float(self.unpriced['blocks'].sum())}
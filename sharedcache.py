@@ -0,0 +1,281 @@
+"""One ingest pipeline shared by several app replicas.
+
+Every replica runs a ``Publisher`` thread, but only the one holding the
+backend's writer lock fetches and processes the feed. It publishes the
+processed history through a ``HistoryChannel``, and the other replicas
+apply it to their own store instead of downloading and parsing the CSVs
+themselves. If the writer dies its lock is released and another replica's
+publisher takes over on its next tick.
+
+The history goes out in two parts, both data only (Arrow tables and JSON,
+as in ``snapshot.py``), so reading them can't run code:
+
+- ``<key>.base``: a full snapshot of the store, rewritten every
+  ``base_interval`` seconds or when the writer's history is replaced
+- ``<key>.tail``: the rows since the previous base, rewritten on every new
+  row, so a write costs a minute or two of rows rather than the history
+
+A follower that is up to date only ingests the tail; one that is new, fell
+behind the tail's start or saw the writer's history replaced restores the
+base first.
+
+Backends are chosen by URL (``QPOOL_SHARED_CACHE``) and hold bytes under a
+version:
+
+- ``file:///dev/shm/qpool`` or any local directory: files replaced
+  atomically. The writer lock is an ``flock``, so the OS drops it with the
+  process. Under ``/dev/shm`` the files live in shared memory.
+- ``redis://host:6379/0``: needs the ``redis`` package. The lock is a key
+  with a TTL the writer keeps renewing, compare-and-expire in one script.
+"""
+import fcntl
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import pandas as pd
+
+import snapshot
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+LOCK_KEY = "qpool:writer"
+# Extend the lease only if it is still ours: a GET then EXPIRE could extend
+# a lease that expired and was taken by another replica in between
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+BASE_INTERVAL = 60  # seconds between full snapshots of the history
+
+
+def _encode_version(version):
+    return json.dumps([str(v) for v in version] if isinstance(version, (tuple, list)) else str(version))
+
+
+class FileBackend:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.is_writer = False
+        self._lock_file = open(os.path.join(path, "writer.lock"), "a")
+        self._seen = {}  # key -> (version, data) last read by this process
+
+    def try_acquire(self):
+        """Become the writer if nobody else is; True while this process holds the lock."""
+        if not self.is_writer:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.is_writer = True
+            except BlockingIOError:
+                pass
+        return self.is_writer
+
+    def _paths(self, key):
+        return os.path.join(self.path, f"{key}.bin"), os.path.join(self.path, f"{key}.version")
+
+    def put(self, key, data, version):
+        path, meta = self._paths(key)
+        snapshot.write_atomic(path, data)
+        # The version is replaced last, so readers never pair it with older data
+        snapshot.write_atomic(meta, _encode_version(version).encode())
+        self._seen[key] = (_encode_version(version), data)
+
+    def version(self, key):
+        try:
+            with open(self._paths(key)[1]) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get(self, key):
+        """Latest published bytes, or None; re-read only when the version changed."""
+        version = self.version(key)
+        if version is None:
+            return None
+        if key in self._seen and self._seen[key][0] == version:
+            return self._seen[key][1]
+        try:
+            with open(self._paths(key)[0], "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return self._seen.get(key, (None, None))[1]
+        self._seen[key] = (version, data)
+        return data
+
+
+class RedisBackend:
+    def __init__(self, url, lock_ttl=10):
+        if redis is None:
+            raise ImportError("the redis package is required for a redis:// shared cache")
+        self.client = redis.Redis.from_url(url)
+        self.lock_ttl = lock_ttl
+        self.is_writer = False
+        self._id = uuid.uuid4().hex
+        self._renew = self.client.register_script(RENEW_SCRIPT)
+        self._seen = {}
+
+    def try_acquire(self):
+        if self.client.set(LOCK_KEY, self._id, nx=True, ex=self.lock_ttl):
+            self.is_writer = True
+        else:
+            self.is_writer = bool(self._renew(keys=[LOCK_KEY], args=[self._id, self.lock_ttl]))
+        return self.is_writer
+
+    def put(self, key, data, version):
+        version = _encode_version(version)
+        pipe = self.client.pipeline()
+        pipe.set(f"qpool:{key}:data", data)
+        pipe.set(f"qpool:{key}:version", version)
+        pipe.execute()
+        self._seen[key] = (version, data)
+
+    def version(self, key):
+        value = self.client.get(f"qpool:{key}:version")
+        return value.decode() if value is not None else None
+
+    def get(self, key):
+        version = self.version(key)
+        if version is None:
+            return None
+        if key in self._seen and self._seen[key][0] == version:
+            return self._seen[key][1]
+        data = self.client.get(f"qpool:{key}:data")
+        if data is None:
+            return self._seen.get(key, (None, None))[1]
+        self._seen[key] = (version, data)
+        return data
+
+
+def open_backend(url):
+    parsed = urlparse(url)
+    if parsed.scheme == "redis":
+        return RedisBackend(url)
+    return FileBackend(parsed.path if parsed.scheme == "file" else url)
+
+
+def encode_rows(df, meta):
+    """Arrow IPC bytes of ``df`` with ``meta`` (a JSON-able dict) in the schema."""
+    if pa is None:
+        raise ImportError("pyarrow is required for the shared cache")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"qpool.meta": json.dumps(meta).encode()})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_rows(data):
+    table = pa.ipc.open_stream(io.BytesIO(data)).read_all()
+    return table.to_pandas(), json.loads(table.schema.metadata[b"qpool.meta"])
+
+
+class HistoryChannel:
+    """Publishes a ``history.HistoryStore`` as a base snapshot plus a tail of recent rows, and applies them."""
+
+    def __init__(self, backend, store, key="history", base_interval=BASE_INTERVAL):
+        self.backend = backend
+        self.store = store
+        self.key = key
+        self.base_interval = base_interval
+        # Writer side
+        self._base_at = None
+        self._base_generation = None
+        self._base_last = None
+        self._tail_start = None  # the tail holds rows after this (the previous base's last timestamp)
+        # Follower side: the writer generation applied, and how often a base was restored
+        self.synced_generation = None
+        self.restores = 0
+        self._sync_lock = threading.Lock()
+
+    def publish(self):
+        """Writer: rewrite the tail, and the base when it is due or the history was replaced."""
+        store = self.store
+        last = store.last_timestamp
+        if last is None:
+            return
+        replaced = store.generation != self._base_generation
+        if replaced or time.monotonic() - self._base_at >= self.base_interval:
+            self.backend.put(f"{self.key}.base", snapshot.dumps(store), (store.generation, last.value))
+            # Rows of the previous base stay in the tail, so followers a little behind don't need the new base
+            self._tail_start = last if replaced else self._base_last
+            self._base_last = last
+            self._base_at = time.monotonic()
+            self._base_generation = store.generation
+        version = (store.generation, last.value)
+        if self.backend.version(f"{self.key}.tail") == _encode_version(version):
+            return
+        rows = store.window(start=self._tail_start + pd.Timedelta(1, "ns"))
+        meta = {"generation": store.generation, "start": self._tail_start.value}
+        self.backend.put(f"{self.key}.tail", encode_rows(rows, meta), version)
+
+    def sync(self):
+        """Follower: bring the store up to the published history; rows ingested, or None if nothing is published.
+
+        One sync at a time: sessions rerunning together would otherwise each
+        restore the same new base, and listeners would see it twice. The
+        generation is checked under the lock, so the ones that waited only
+        ingest the tail.
+        """
+        with self._sync_lock:
+            data = self.backend.get(f"{self.key}.tail")
+            if data is None:
+                return None
+            tail, meta = decode_rows(data)
+            last = self.store.last_timestamp
+            if meta["generation"] != self.synced_generation or last is None or last.value < meta["start"]:
+                base = self.backend.get(f"{self.key}.base")
+                state = snapshot.decode(base) if base is not None else None
+                if state is None or state["changes"].last_timestamp.value < meta["start"]:
+                    return 0  # base and tail mid-update: try again next time
+                snapshot.restore(self.store, state)
+                self.synced_generation = meta["generation"]
+                self.restores += 1
+            return self.store.ingest(tail) if not tail.empty else 0
+
+
+class Publisher:
+    """Calls ``refresh()`` every ``interval`` seconds while holding the writer lock."""
+
+    def __init__(self, backend, key, refresh, interval=1):
+        self.backend = backend
+        self.key = key
+        self.refresh = refresh
+        self.interval = interval
+        self.last_error = None
+
+    def step(self):
+        if not self.backend.try_acquire():
+            return False
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e
+        return True
+
+    def run(self):
+        while True:
+            started = time.monotonic()
+            self.step()
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True, name=f"publish-{self.key}").start()
+        return self
@@ -0,0 +1,200 @@
+"""Checkpoint processed dashboard state to local disk and restore it on startup.
+
+A snapshot holds the ``HistoryStore`` tiers (change-point encoded raw rows,
+rollups, ATH row)
+plus any extra named frames (the prepared burn frame). It is written
+atomically by a ``Checkpointer`` at most every ``interval`` seconds after new
+rows arrive. On startup ``restore()`` fills the store and the saved frames
+seed the feeds, so the first render needs no download; the next upstream
+fetch is checked with ``HistoryStore.matches()`` and only rows after the
+snapshot are ingested.
+
+The file is data only, so reading one can't run code: a JSON header (format
+version, change-point offsets and dtypes, the names of the parts) followed
+by one Arrow IPC stream per table. Needs pyarrow; without it nothing is
+saved and nothing is restored.
+"""
+import io
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from changepoints import ChangePointFrame
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+FORMAT_VERSION = 3
+MAGIC = b"QPSNAP\n"
+
+
+def _table_bytes(table):
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _read_table(data):
+    return pa.ipc.open_stream(io.BytesIO(data)).read_all()
+
+
+def _frame_table(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def encode(changes, rollups, ath_row, extra=None):
+    """Snapshot bytes of a store's tiers (``changes`` as from ``ChangePointFrame.arrays()``) and extra frames."""
+    if pa is None:
+        raise ImportError("pyarrow is required for snapshots")
+    offset, order, ts, columns = changes
+    parts = {"ts": pa.table({"ts": pa.array(ts)})}
+    for i, (name, (starts, values)) in enumerate(columns.items()):
+        parts[f"column.{i}"] = pa.table({"starts": pa.array(starts), "values": pa.array(values, from_pandas=True)})
+    for name, df in (("rollups", rollups), ("ath_row", ath_row)):
+        if df is not None and not df.empty:
+            parts[name] = _frame_table(df)
+    for name, df in (extra or {}).items():
+        parts[f"extra.{name}"] = _frame_table(df)
+    header = {
+        "format": FORMAT_VERSION,
+        "saved_at": time.time(),
+        "offset": int(offset),
+        "order": list(order),
+        "columns": [[name, str(values.dtype)] for name, (_, values) in columns.items()],
+        "parts": list(parts),
+    }
+    blobs = [_table_bytes(table) for table in parts.values()]
+    header["sizes"] = [len(b) for b in blobs]
+    meta = json.dumps(header).encode()
+    return b"".join([MAGIC, struct.pack("<I", len(meta)), meta] + blobs)
+
+
+def decode(data):
+    """Snapshot dict from ``encode()`` bytes: ``changes``, ``rollups``, ``ath_row``, ``extra``, ``saved_at``.
+
+    Raises ValueError on another format or version.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("not a snapshot")
+    pos = len(MAGIC)
+    (size,) = struct.unpack_from("<I", data, pos)
+    header = json.loads(data[pos + 4:pos + 4 + size])
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"snapshot format {header.get('format')}, expected {FORMAT_VERSION}")
+    pos += 4 + size
+    tables = {}
+    for name, n in zip(header["parts"], header["sizes"]):
+        tables[name] = _read_table(data[pos:pos + n])
+        pos += n
+    columns = {}
+    for i, (name, dtype) in enumerate(header["columns"]):
+        table = tables[f"column.{i}"]
+        values = table.column("values").to_numpy(zero_copy_only=False)
+        columns[name] = (table.column("starts").to_numpy(), np.asarray(values, dtype=np.dtype(dtype)))
+    changes = ChangePointFrame.from_arrays(header["offset"], header["order"], tables["ts"].column("ts").to_numpy(), columns)
+    return {
+        "format": FORMAT_VERSION,
+        "saved_at": header["saved_at"],
+        "changes": changes,
+        "rollups": tables["rollups"].to_pandas() if "rollups" in tables else pd.DataFrame(),
+        "ath_row": tables["ath_row"].to_pandas() if "ath_row" in tables else None,
+        "extra": {name[len("extra."):]: table.to_pandas() for name, table in tables.items() if name.startswith("extra.")},
+    }
+
+
+def write_atomic(path, data):
+    """Write ``data`` to ``path`` through a unique temporary file in the same directory."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def dumps(store, extra=None):
+    """Snapshot bytes of ``store`` and ``extra`` frames."""
+    # Rollups and the ATH row are replaced rather than mutated, so references
+    # are enough; the change points grow in place and are copied (they are
+    # small). Encoding happens unlocked
+    with store._lock:
+        changes = (store.changes.offset, list(store.changes.order)) + store.changes.arrays()
+        rollups, ath_row = store.rollups, store.ath_row
+    return encode(changes, rollups, ath_row, extra)
+
+
+def save(path, store, extra=None):
+    write_atomic(path, dumps(store, extra))
+
+
+def load(path):
+    """Snapshot dict, or None when missing, unreadable or from another format version."""
+    try:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    except Exception:
+        return None
+
+
+def restore(store, state):
+    """Fill ``store`` from a loaded snapshot; False if there was nothing to restore."""
+    if state is None or state["changes"].empty:
+        return False
+    store.restore(state["changes"], state["rollups"], state["ath_row"])
+    return True
+
+
+class Checkpointer:
+    """Saves ``store`` after ingests, at most once per ``interval`` seconds, off the request path.
+
+    ``feeds`` maps names to ``fetch.StaleWhileRevalidate`` feeds whose current
+    value (a DataFrame) is saved alongside the history. ``enabled()`` gates
+    every save.
+    """
+
+    def __init__(self, store, path, interval=60, feeds=None, enabled=None):
+        self.store = store
+        self.path = path
+        self.interval = interval
+        self.feeds = feeds or {}
+        # Checked before every save: only one of several replicas sharing ``path`` should write it
+        self.enabled = enabled or (lambda: True)
+        # First checkpoint one interval in, once the other feeds have loaded too
+        self.saved_at = time.monotonic()
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._saving = False
+        store.subscribe(self.on_ingest)
+
+    def on_ingest(self, df, initial):
+        with self._lock:
+            due = time.monotonic() - self.saved_at >= self.interval
+            if not due or self._saving or not self.enabled():
+                return
+            self._saving = True
+        threading.Thread(target=self.save, daemon=True).start()
+
+    def save(self):
+        try:
+            save(self.path, self.store, {name: feed.value for name, feed in self.feeds.items() if feed.has_value})
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e
+        finally:
+            with self._lock:
+                self.saved_at = time.monotonic()
+                self._saving = False
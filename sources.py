@@ -0,0 +1,177 @@
+"""Registry of pool feeds fetched concurrently.
+
+Each configured pool is a ``Source`` with its own ``fetch.Fetcher`` (and so
+its own circuit breaker). ``SourceRegistry.fetch_all()`` starts a background
+fetch for every source whose cached frame is older than its TTL; only
+sources with nothing cached yet are waited for (at most ``wait`` seconds),
+and a source that is still downloading keeps serving its previous frame, so
+one slow pool never holds up the others or the page.
+
+A source whose URL is already ingested into a ``history.HistoryStore``
+(the dashboard's own feed) is read from that store instead of downloaded
+again. Fetched frames keep only the last ``SOURCE_WINDOW`` of the columns
+the pools tab draws, so extra pools stay small next to the history's
+memory ceiling. ``versions()`` changes whenever any source has new rows,
+for caching what is derived from them.
+
+Sources come from the JSON file named by ``QPOOL_SOURCES``::
+
+    [{"name": "main", "url": "http://.../qpool_V1.csv"},
+     {"name": "eu", "url": "http://.../qpool_eu.csv", "timeout": 5}]
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import pandas as pd
+
+import fetch
+
+SOURCE_WINDOW = pd.Timedelta(days=7)
+SOURCE_COLUMNS = ['timestamp', 'pool_hashrate', 'pool_blocks_found']
+
+
+class Source:
+    def __init__(self, name, url, timeout=10, ttl=1):
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.fetcher = fetch.Fetcher(url, timeout=(fetch.CONNECT_TIMEOUT, timeout), retries=1)
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {self.url!r})"
+
+
+def load_sources(path=None, default_url=None):
+    """Sources from ``QPOOL_SOURCES`` (or ``path``); a single "main" source otherwise."""
+    path = path or os.environ.get("QPOOL_SOURCES")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return [Source(**spec) for spec in json.load(f)]
+    return [Source("main", default_url)] if default_url else []
+
+
+def fetch_csv(source):
+    return source.fetcher.read_frame()
+
+
+class SourceRegistry:
+    """Per-source cached frames, refreshed on a shared thread pool."""
+
+    def __init__(self, sources, prepare, fetch_frame=fetch_csv, max_workers=8, stores=None, window=SOURCE_WINDOW):
+        self.sources = {s.name: s for s in sources}
+        self.prepare = prepare
+        self.fetch_frame = fetch_frame
+        self.window = window
+        # url -> HistoryStore already holding that feed
+        self.stores = {s.name: stores[s.url] for s in sources if stores and s.url in stores}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="source")
+        self._lock = threading.Lock()
+        self._frames = {}      # name -> prepared frame of the last good fetch
+        self._fetched_at = {}  # name -> monotonic time of that fetch
+        self._errors = {}      # name -> last error message
+        self._inflight = {}    # name -> Future
+        self._versions = {}    # name -> fetches that brought new rows
+        self._store_frames = {}  # name -> (store's last timestamp, its window)
+
+    def _trim(self, df):
+        if df.empty:
+            return df
+        df = df[[c for c in SOURCE_COLUMNS if c in df.columns]]
+        # A copy, so the rest of the downloaded frame can be freed
+        return df[df['timestamp'] >= df['timestamp'].iloc[-1] - self.window].reset_index(drop=True)
+
+    def _load(self, source):
+        try:
+            df = self._trim(self.prepare(self.fetch_frame(source)))
+        except Exception as e:
+            with self._lock:
+                self._errors[source.name] = str(e)
+            raise
+        with self._lock:
+            previous = self._frames.get(source.name)
+            if previous is None or len(previous) != len(df) or (
+                    len(df) and previous['timestamp'].iloc[-1] != df['timestamp'].iloc[-1]):
+                self._versions[source.name] = self._versions.get(source.name, 0) + 1
+            self._frames[source.name] = df
+            self._fetched_at[source.name] = time.monotonic()
+            self._errors.pop(source.name, None)
+        return df
+
+    def _from_store(self, name):
+        store = self.stores[name]
+        last = store.last_timestamp
+        cached = self._store_frames.get(name)
+        if cached is None or cached[0] != last:
+            df = store.window(start=last - self.window, columns=SOURCE_COLUMNS) if last is not None \
+                else pd.DataFrame(columns=SOURCE_COLUMNS)
+            cached = self._store_frames[name] = (last, df)
+        return cached[1]
+
+    def refresh(self):
+        """Start fetches for stale sources that aren't already downloading."""
+        now = time.monotonic()
+        with self._lock:
+            for name, source in self.sources.items():
+                if name in self.stores:
+                    continue
+                fresh = now - self._fetched_at.get(name, float("-inf")) < source.ttl
+                running = name in self._inflight and not self._inflight[name].done()
+                if not fresh and not running:
+                    self._inflight[name] = self._pool.submit(self._load, source)
+            return {name: f for name, f in self._inflight.items() if not f.done()}
+
+    def fetch_all(self, wait=None):
+        """Latest frame per source; waits at most ``wait`` seconds, and only for sources with no frame yet."""
+        pending = self.refresh()
+        with self._lock:
+            first = [f for name, f in pending.items() if name not in self._frames]
+        timeout = wait if wait is not None else max((s.timeout for s in self.sources.values()), default=0)
+        if first:
+            wait_futures(first, timeout=timeout)
+        with self._lock:
+            frames = dict(self._frames)
+        frames.update((name, self._from_store(name)) for name in self.stores)
+        return frames
+
+    def versions(self):
+        """Changes whenever any source has new rows."""
+        with self._lock:
+            fetched = tuple(sorted(self._versions.items()))
+        stored = tuple((name, store.last_timestamp) for name, store in sorted(self.stores.items()))
+        return fetched + stored
+
+    def status(self):
+        """Per-source age of the cached frame and last error, for display."""
+        now = time.monotonic()
+        with self._lock:
+            return pd.DataFrame([{
+                "source": name,
+                "rows": len(self._frames[name]) if name in self._frames else len(self.stores[name].changes) if name in self.stores else 0,
+                "age_s": round(now - self._fetched_at[name], 1) if name in self._fetched_at else 0.0 if name in self.stores else None,
+                "error": self._errors.get(name, ""),
+            } for name in self.sources])
+
+
+def merge_on_time(frames, column, freq="5min"):
+    """One column per source, resampled onto a shared ``freq`` time index."""
+    series = {
+        name: df.set_index("timestamp")[column].resample(freq).mean()
+        for name, df in frames.items() if not df.empty and column in df.columns
+    }
+    if not series:
+        return pd.DataFrame()
+    return pd.concat(series, axis=1).sort_index()
+
+
+def aggregate_metrics(frames):
+    """Combined latest hashrate and blocks across all sources."""
+    latest = [df.iloc[-1] for df in frames.values() if not df.empty]
+    return {
+        "pools": len(latest),
+        "pool_hashrate": sum(row["pool_hashrate"] for row in latest),
+        "pool_blocks_found": sum(int(row["pool_blocks_found"]) for row in latest),
+    }
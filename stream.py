@@ -0,0 +1,232 @@
+"""Push channel for new pool rows.
+
+The collector publishes each pool snapshot once (``POST /publish``) and every
+dashboard process receives only the new rows, either in-process through
+``RowBroker.since()`` or over Server-Sent Events (``GET /events``).
+
+Publishing needs the shared token from ``QPOOL_PUBLISH_TOKEN``, sent as
+``Authorization: Bearer <token>`` (``publish_row`` does this); without a
+token configured ``/publish`` is refused. Servers bind to localhost unless
+given another host.
+
+Run a standalone broker with ``python stream.py --port 8765``.
+"""
+import argparse
+import hmac
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import requests
+
+BROKER_BACKLOG = 10_000  # rows kept for subscribers that reconnect
+KEEPALIVE_INTERVAL = 15  # seconds between SSE comments on an idle stream
+PUBLISH_TOKEN = os.environ.get("QPOOL_PUBLISH_TOKEN", "")
+
+
+class RowBroker:
+    """Thread-safe, bounded log of published rows with sequence numbers."""
+
+    def __init__(self, backlog=BROKER_BACKLOG):
+        self._rows = deque(maxlen=backlog)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, row):
+        """Append one row (a dict) and wake up every waiting subscriber."""
+        with self._cond:
+            self._seq += 1
+            self._rows.append((self._seq, row))
+            self._cond.notify_all()
+            return self._seq
+
+    def since(self, seq):
+        """Rows published after ``seq`` as a list of (seq, row) pairs.
+
+        Only the last ``backlog`` rows are kept: when the first pair returned
+        is later than ``seq + 1``, the rows in between are gone.
+        """
+        with self._cond:
+            if not self._rows or seq >= self._seq:
+                return []
+            first = self._rows[0][0]
+            return list(self._rows)[max(seq - first + 1, 0):]
+
+    def wait(self, seq, timeout=None):
+        """Block until a row newer than ``seq`` exists, then return the new rows."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout=timeout)
+        return self.since(seq)
+
+
+class LiveFeed:
+    """Pool history kept current from a broker instead of re-downloading the CSV.
+
+    Published rows are typed with ``prepare`` (``history.prepare_frame``) and
+    ingested into ``store`` (a ``history.HistoryStore``). New rows are only
+    ingested when ``pull()`` is called, so a burst of publishes costs a
+    single concat; views then read the store's ``window()``.
+
+    Rows are only pulled while somebody renders, so a feed left alone for
+    longer than the broker's backlog would miss rows. When that happens
+    ``resync()`` (say, a fresh download ingested into the store) fills the
+    gap before the rows still in the broker are added; without one the gap
+    stays.
+    """
+
+    def __init__(self, broker, store, prepare, resync=None, seq=None):
+        self.broker = broker
+        self.store = store
+        self.prepare = prepare
+        self.resync = resync
+        self._lock = threading.Lock()
+        # Rows after ``seq`` are ingested: pass the broker's seq from before the
+        # history was downloaded, so nothing pushed during the download is lost
+        self._seq = broker.seq if seq is None else seq
+        # Rows ingested and seconds spent typing and ingesting them (throughput)
+        self.rows_ingested = 0
+        self.busy = 0.0
+        self.resyncs = 0
+
+    @property
+    def seq(self):
+        return self.broker.seq
+
+    def pull(self):
+        """Ingest the rows published since the last pull; returns how many were ingested."""
+        with self._lock:
+            new = self.broker.since(self._seq)
+            if not new:
+                return 0
+            started = time.perf_counter()
+            if new[0][0] > self._seq + 1 and self.resync is not None:
+                # Fell behind the broker's backlog: the dropped rows only exist upstream now
+                self.resync()
+                self.resyncs += 1
+            self._seq = new[-1][0]
+            ingested = self.store.ingest(prepare_rows(self.store.last_row(), [row for _, row in new], self.prepare))
+            self.rows_ingested += ingested
+            self.busy += time.perf_counter() - started
+            return ingested
+
+
+def prepare_rows(last, rows, prepare):
+    """Type raw rows, deriving diff-based columns against the last known prepared row."""
+    tail = pd.DataFrame(rows)
+    if last.empty:
+        return prepare(tail)
+    # Re-prepare with the previous row in front so diffs (block_found) stay correct
+    last = last[last.columns.intersection(tail.columns)]
+    fresh = prepare(pd.concat([last, tail], ignore_index=True)).iloc[1:]
+    return fresh[fresh['timestamp'] > last['timestamp'].iloc[0]]
+
+
+def make_handler(broker, token=PUBLISH_TOKEN):
+    class BrokerHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            if self.path != "/publish":
+                self.send_error(404)
+                return
+            if not token:
+                self.send_error(403, "Publishing is disabled: no QPOOL_PUBLISH_TOKEN configured")
+                return
+            if not hmac.compare_digest(self.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+                self.send_error(401, "Missing or wrong publish token")
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                row = json.loads(self.rfile.read(length))
+            except ValueError:
+                self.send_error(400, "Body must be a JSON object")
+                return
+            seq = broker.publish(row)
+            body = json.dumps({"seq": seq}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if not self.path.startswith("/events"):
+                self.send_error(404)
+                return
+            try:
+                seq = int(self.headers.get("Last-Event-ID", broker.seq))
+            except ValueError:
+                self.send_error(400, "Last-Event-ID must be an integer")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.end_headers()
+            try:
+                while True:
+                    rows = broker.wait(seq, timeout=KEEPALIVE_INTERVAL)
+                    if not rows:
+                        self.wfile.write(b": keepalive\n\n")
+                    for seq, row in rows:
+                        self.wfile.write(f"id: {seq}\ndata: {json.dumps(row, default=str)}\n\n".encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return BrokerHandler
+
+
+def serve(broker, host="127.0.0.1", port=8765, token=PUBLISH_TOKEN):
+    """Start the publish/SSE endpoint on a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(broker, token))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def publish_row(url, row, token=PUBLISH_TOKEN, timeout=2):
+    """Collector side: push one snapshot to a broker at ``url``."""
+    resp = requests.post(f"{url.rstrip('/')}/publish", data=json.dumps(row, default=str), timeout=timeout,
+                         headers={"Authorization": f"Bearer {token}"})
+    resp.raise_for_status()
+    return resp.json()["seq"]
+
+
+def subscribe(url, last_event_id=None, timeout=None):
+    """Yield (seq, row) pairs from a broker's SSE stream."""
+    headers = {"Accept": "text/event-stream"}
+    if last_event_id is not None:
+        headers["Last-Event-ID"] = str(last_event_id)
+    with requests.get(f"{url.rstrip('/')}/events", headers=headers, stream=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        seq = None
+        # Small chunks so each event is yielded as soon as it arrives
+        for line in resp.iter_lines(chunk_size=1, decode_unicode=True):
+            if line.startswith("id: "):
+                seq = int(line[4:])
+            elif line.startswith("data: "):
+                yield seq, json.loads(line[6:])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a standalone pool row broker.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", default=PUBLISH_TOKEN, help="shared publish token (default: QPOOL_PUBLISH_TOKEN)")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(RowBroker(), args.token))
+    server.daemon_threads = True
+    print(f"Broker listening on {args.host}:{args.port}")
+    server.serve_forever()
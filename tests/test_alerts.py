@@ -0,0 +1,97 @@
+import threading
+
+import pandas as pd
+
+import alerts
+import history
+
+
+def pool_rows(hashrates, start='2025-06-01', blocks=None, freq='10min'):
+    n = len(hashrates)
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq=freq).astype(str),
+        'pool_hashrate': hashrates, 'network_hashrate': 5e9,
+        'pool_blocks_found': blocks if blocks is not None else [10] * n,
+    }))
+
+
+class ListSink:
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+class BrokenSink:
+    def send(self, alert):
+        raise ConnectionError("webhook down")
+
+
+def drop_engine(*sinks):
+    return alerts.AlertEngine(alerts.build_rules([{'type': 'hashrate_drop', 'name': 'drop', 'drop': 0.5,
+                                                   'window_hours': 1, 'cooldown_minutes': 120}]), sinks)
+
+
+def test_threshold_on_rolling_mean_alerts_once_per_episode():
+    engine = drop_engine()
+    engine.on_ingest(pool_rows([2e8] * 6), True)
+    # 1e8 against a 1h mean of 2e8 is a 50% drop; the next rows keep firing but alert once
+    raised = engine.process(pool_rows([0.9e8, 0.9e8, 0.9e8], start='2025-06-01 01:00'))
+    assert [a['rule'] for a in raised] == ['drop']
+    assert 'below its 1h mean' in raised[0]['message']
+    # Cleared, then dropping again inside the cooldown: quiet; after it: a new alert
+    assert engine.process(pool_rows([2e8] * 6 + [0.5e8], start='2025-06-01 01:30')) == []
+    assert len(engine.process(pool_rows([2e8] * 6 + [0.5e8], start='2025-06-01 03:00'))) == 1
+
+
+def test_burns_are_deduplicated_by_key():
+    engine = alerts.AlertEngine(alerts.build_rules([{'type': 'burn', 'name': 'burn', 'min_qubic': 1e9}]))
+    burns = pd.DataFrame({'timestamp': pd.to_datetime(['2025-06-01', '2025-06-02']), 'tx': ['a', 'b'],
+                          'qubic_amount': [5e9, 5e9]})
+    assert engine.process_burns(burns) == []  # burns already on file
+    more = pd.concat([burns, pd.DataFrame({'timestamp': [pd.Timestamp('2025-06-03')], 'tx': ['c'],
+                                           'qubic_amount': [2e9]})], ignore_index=True)
+    assert [a['key'] for a in engine.process_burns(more)] == ['burn:c']
+    assert engine.process_burns(more) == []
+
+
+def test_prime_raises_nothing_and_restarts_the_state():
+    sink = ListSink()
+    engine = drop_engine(sink)
+    engine.on_ingest(pool_rows([2e8] * 6 + [0.5e8] * 3, blocks=[10] * 8 + [11]), True)
+    assert list(engine.recent) == [] and engine.state['last_block'] is not None
+    # A restore of unrelated history: nothing of the old windows or blocks remains
+    engine.on_ingest(pool_rows([4e8] * 3, start='2025-07-01'), True)
+    assert engine.state['last_block'] is None
+    assert engine.state[('pool_hashrate', '1h')].mean == 4e8
+    engine.flush()
+    assert sink.alerts == []
+
+
+def test_failing_sink_is_counted_and_does_not_stop_delivery():
+    good = ListSink()
+    engine = drop_engine(BrokenSink(), good)
+    engine.on_ingest(pool_rows([2e8] * 6), True)
+    raised = engine.process(pool_rows([0.5e8], start='2025-06-01 01:00'))
+    engine.flush()
+    assert len(raised) == 1 and len(good.alerts) == 1
+    stats = engine.sink_stats()
+    assert stats['failed'].tolist() == [1, 0] and stats['sent'].tolist() == [0, 1]
+    assert stats['last_error'][0] == 'ConnectionError: webhook down'
+
+
+def test_slow_sink_does_not_block_evaluation():
+    release = threading.Event()
+
+    class SlowSink:
+        def send(self, alert):
+            release.wait(5)
+
+    engine = drop_engine(SlowSink())
+    engine.on_ingest(pool_rows([2e8] * 6), True)
+    raised = engine.process(pool_rows([0.5e8], start='2025-06-01 01:00'))
+    assert len(raised) == 1  # returned while the sink is still blocked
+    release.set()
+    engine.flush()
+    assert engine.sink_stats()['sent'].tolist() == [1]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+
+BACKENDS = ['sqlite'] + (['duckdb'] if analytics.duckdb is not None else [])
+
+
+def pool_rows(timestamps, blocks_delta=0.0):
+    n = len(timestamps)
+    return pd.DataFrame({'timestamp': pd.to_datetime(timestamps), 'pool_hashrate': np.arange(n, dtype=float) + 1,
+                         'network_hashrate': 5e9, 'pool_blocks_found': 10.0, 'blocks_delta': blocks_delta,
+                         'qubic_epoch': 165})
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rows_sharing_the_last_second_are_kept(backend):
+    db = analytics.AnalyticsDB(backend=backend)
+    assert db.append_pool(pool_rows(['2025-06-01 00:00:00.000', '2025-06-01 00:00:01.200'])) == 2
+    # Same second as the last stored row, but a later row
+    assert db.append_pool(pool_rows(['2025-06-01 00:00:01.700'])) == 1
+    assert db.query("SELECT COUNT(*) AS n FROM pool")['n'].iloc[0] == 3
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_overlapping_batches_are_not_stored_twice(backend):
+    db = analytics.AnalyticsDB(backend=backend)
+    burns = pd.DataFrame({'timestamp': pd.to_datetime(['2025-06-01', '2025-06-02', '2025-06-02']),
+                          'qubic_amount': [1.0, 2.0, 3.0], 'usdt_value': [0.1, 0.2, 0.3]})
+    db.append_burns(burns.iloc[:2])
+    db.append_burns(burns)
+    db.append_burns(burns)
+    assert db.burn_totals() == (6.0, pytest.approx(0.6))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_window_summary_matches_pandas(backend):
+    df = analytics.synthetic_pool(50_000)
+    db = analytics.AnalyticsDB(backend=backend)
+    db.append_pool(df)
+    start = df['timestamp'].iloc[-1] - pd.Timedelta(hours=6)
+    recent = df[df['timestamp'] >= start]
+    summary = db.window_summary(start)
+    assert summary['rows'] == len(recent)
+    assert summary['pool_hashrate'] == pytest.approx(recent['pool_hashrate'].mean())
+    assert summary['blocks'] == recent['blocks_delta'].sum()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_bench_queries_match_pandas(backend):
+    # Timings are for ``python analytics.py --bench``; here only the answers are compared
+    df = analytics.synthetic_pool(20_000)
+    db = analytics.AnalyticsDB(backend=backend)
+    db.append_pool(df)
+    hourly = df.groupby(df['timestamp'].dt.floor('h'))[['pool_hashrate', 'network_hashrate']].mean()
+    pd.testing.assert_frame_equal(db.hashrate_mean(analytics.HOUR), hourly, check_names=False, check_freq=False)
+    epochs = df.groupby('qubic_epoch')['pool_blocks_found'].max()
+    np.testing.assert_array_equal(db.blocks_per_epoch().to_numpy(), epochs.to_numpy())
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_initial_ingest_replaces_the_rows_it_covers(backend):
+    db = analytics.AnalyticsDB(backend=backend)
+    db.on_ingest(pool_rows(['2025-06-01 00:00:00.000', '2025-06-01 00:00:10.000', '2025-06-01 00:00:20.000']), True)
+    # A restored snapshot that starts inside the stored rows and ends before the last of them
+    db.on_ingest(pool_rows(['2025-06-01 00:00:10.000', '2025-06-01 00:00:15.000']), True)
+    keys = db.query("SELECT key FROM pool ORDER BY key")['key']
+    assert pd.to_datetime(keys).tolist() == pd.to_datetime(['2025-06-01 00:00:00', '2025-06-01 00:00:10',
+                                                             '2025-06-01 00:00:15']).tolist()
+    db.on_ingest(pool_rows(['2025-06-01 00:00:15.000', '2025-06-01 00:00:25.000']), False)
+    assert db.query("SELECT COUNT(*) AS n FROM pool")['n'].iloc[0] == 4
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_in_memory_db_keeps_only_the_retention(backend):
+    db = analytics.AnalyticsDB(backend=backend, retention='1h')
+    assert db.retained
+    df = analytics.synthetic_pool(20_000)
+    for start in range(0, len(df), 5000):
+        db.append_pool(df.iloc[start:start + 5000])
+    kept = df[df['timestamp'] >= df['timestamp'].iloc[-1] - pd.Timedelta(hours=1)]
+    assert db.query("SELECT COUNT(*) AS n FROM pool")['n'].iloc[0] == len(kept)
+    # Without a retention nothing is dropped
+    assert not analytics.AnalyticsDB(backend=backend).retained
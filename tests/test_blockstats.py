@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import blockstats
+import history
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range('2025-06-01', periods=n, freq='30s').astype(str),
+        'pool_hashrate': 2e8, 'network_hashrate': 5e9,
+        'pool_blocks_found': np.cumsum(rng.random(n) < 0.02),
+        'qubic_epoch': 165 + np.arange(n) // 8000,
+    }))
+
+
+def test_batches_match_one_shot_intervals(pool):
+    stats = blockstats.BlockStats()
+    stats.on_ingest(pool.iloc[:5000], True)
+    for lo in range(5000, len(pool), 1234):
+        stats.on_ingest(pool.iloc[lo:lo + 1234], False)
+
+    blocks = pool[pool['blocks_delta'] > 0]
+    intervals = blocks['timestamp'].diff().dropna().dt.total_seconds()
+    summary = stats.summary()
+    assert summary['count'] == len(intervals)
+    assert summary['mean'] == pytest.approx(intervals.mean())
+    assert summary['max'] == intervals.max()
+    assert summary['last_block'] == blocks['timestamp'].iloc[-1]
+    for q in (0.1, 0.5, 0.9):
+        # Log bins 10**(1/50) wide: within about 5%
+        assert summary[f'p{int(q * 100)}'] == pytest.approx(np.quantile(intervals, q), rel=0.05)
+
+    # Each interval counts toward the epoch of the block that ends it
+    ending = blocks['qubic_epoch'].iloc[1:]
+    per_epoch = stats.per_epoch()
+    assert per_epoch['count'].to_dict() == ending.value_counts().sort_index().to_dict()
+    for epoch, group in intervals.groupby(ending.to_numpy()):
+        assert per_epoch.loc[epoch, 'mean'] == pytest.approx(group.mean())
+
+
+def test_initial_ingest_starts_over(pool):
+    stats = blockstats.BlockStats()
+    stats.on_ingest(pool, True)
+    stats.on_ingest(pool.iloc[-3000:], True)
+    blocks = pool.iloc[-3000:].query('blocks_delta > 0')
+    assert stats.summary()['count'] == len(blocks) - 1
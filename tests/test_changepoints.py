@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from changepoints import ChangePointFrame
+
+
+def batch(start, n, **columns):
+    return pd.DataFrame({'timestamp': pd.date_range(start, periods=n, freq='s'), **columns})
+
+
+def test_float_batch_widens_an_int_column():
+    frame = ChangePointFrame()
+    frame.append(batch('2025-06-01', 3, pool_blocks_found=np.array([10, 10, 11])))
+    frame.append(batch('2025-06-01 00:00:03', 3, pool_blocks_found=np.array([11.5, np.nan, 12.0])))
+    out = frame.decode()['pool_blocks_found']
+    assert out.dtype == np.float64
+    np.testing.assert_array_equal(out.to_numpy(), [10, 10, 11, 11.5, np.nan, 12])
+
+
+def test_mixed_kinds_become_object():
+    frame = ChangePointFrame()
+    frame.append(batch('2025-06-01', 2, qubic_epoch=np.array([165, 165])))
+    frame.append(batch('2025-06-01 00:00:02', 2, qubic_epoch=np.array(['166', '166'], dtype=object)))
+    assert frame.decode()['qubic_epoch'].tolist() == [165, 165, '166', '166']
+
+
+def test_missing_column_is_nan_for_that_batch():
+    frame = ChangePointFrame()
+    frame.append(batch('2025-06-01', 2, pool_hashrate=[2e8, 2e8], pool_name=['a', 'a']))
+    frame.append(batch('2025-06-01 00:00:02', 2, pool_name=['a', 'b']))
+    frame.append(batch('2025-06-01 00:00:04', 1, pool_hashrate=[3e8]))
+    out = frame.decode()
+    np.testing.assert_array_equal(out['pool_hashrate'].to_numpy(), [2e8, 2e8, np.nan, np.nan, 3e8])
+    assert out['pool_name'].tolist() == ['a', 'a', 'a', 'b', None]
+
+
+def test_new_column_is_missing_before_it_appeared():
+    frame = ChangePointFrame()
+    frame.append(batch('2025-06-01', 3, pool_hashrate=[1.0, 2.0, 3.0]))
+    frame.append(batch('2025-06-01 00:00:03', 2, pool_hashrate=[4.0, 5.0], close=[300, 301]))
+    out = frame.decode()
+    assert list(out.columns) == ['timestamp', 'pool_hashrate', 'close']
+    np.testing.assert_array_equal(out['close'].to_numpy(), [np.nan, np.nan, np.nan, 300, 301])
+    # Windows that start after the column appeared, and eviction, still line up
+    assert frame.decode(start='2025-06-01 00:00:04')['close'].tolist() == [301]
+    frame.drop_before(pd.Timestamp('2025-06-01 00:00:02'))
+    np.testing.assert_array_equal(frame.decode()['close'].to_numpy(), [np.nan, 300, 301])
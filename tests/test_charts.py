@@ -0,0 +1,66 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import pytest
+
+import charts
+
+POINTS = 10_000
+# Base64 float64 timestamps plus float32 values come to about 34 bytes a point;
+# ISO strings and decimal text were about 81
+MAX_BYTES_PER_POINT = 40
+
+
+@pytest.fixture
+def chart_frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-05-18', periods=POINTS, freq='5min'),
+        'pool_hashrate': rng.normal(2e8, 2e7, POINTS),
+        'pool_hashrate_mhs': rng.normal(200, 20, POINTS),
+        'network_hashrate': rng.normal(5e9, 1e8, POINTS),
+        'network_hashrate_ghs': rng.normal(5, 0.1, POINTS),
+        'block_found': rng.random(POINTS) < 0.01,
+        'close': rng.normal(300, 5, POINTS),
+        'qubic_usdt': rng.normal(2e-6, 1e-7, POINTS),
+    })
+
+
+def payload(fig):
+    # What st.plotly_chart sends over the websocket
+    return pio.to_json(fig, validate=False)
+
+
+@pytest.mark.parametrize('build', [
+    lambda df: charts.build_hashrate_figure(df, False, 2.5e8),
+    lambda df: charts.build_hashrate_figure(df, True, 2.5e8),
+    charts.build_price_figure,
+], ids=['hashrate', 'hashrate-log', 'price'])
+def test_payload_per_10k_points(chart_frame, build):
+    size = len(payload(build(chart_frame)))
+    assert size / POINTS < MAX_BYTES_PER_POINT, f"{size:,} bytes for {POINTS:,} points"
+
+
+def test_arrays_are_binary(chart_frame):
+    spec = json.loads(payload(charts.build_hashrate_figure(chart_frame, False, 2.5e8)))
+    for trace in spec['data']:
+        for axis in ('x', 'y'):
+            assert set(trace[axis]) == {'dtype', 'bdata'}, f"{trace['name']} {axis} is not a typed array"
+    assert spec['data'][0]['x']['dtype'] == 'f8'
+    assert spec['data'][0]['y']['dtype'] == 'f4'
+
+
+def test_block_stars_mark_the_block_rows(chart_frame):
+    spec = json.loads(payload(charts.build_hashrate_figure(chart_frame, False, 2.5e8)))
+    stars = spec['data'][2]
+    x = np.frombuffer(base64.b64decode(stars['x']['bdata']), dtype=stars['x']['dtype'])
+    blocks = chart_frame[chart_frame['block_found']]
+    np.testing.assert_array_equal(x, charts.time_axis(blocks['timestamp']))
+
+
+def test_time_axis_is_epoch_milliseconds():
+    ts = pd.Series([pd.Timestamp('1970-01-01 00:00:01'), pd.Timestamp('2025-05-18 08:32:24.500')])
+    np.testing.assert_array_equal(charts.time_axis(ts), [1000.0, ts[1].value / 1e6])
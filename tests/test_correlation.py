@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(5)
+    n = 6000
+    ts = pd.Timestamp('2025-06-01 00:17') + pd.to_timedelta(np.cumsum(rng.integers(5, 40, n)), unit='s')
+    hashrate = rng.normal(2e8, 1e7, n)
+    hashrate[rng.random(n) < 0.05] = np.nan
+    qubic = np.where(rng.random(n) < 0.3, rng.normal(2e-6, 1e-7, n), np.nan)
+    close = np.where(rng.random(n) < 0.3, rng.normal(300, 5, n), np.nan)
+    return pd.DataFrame({'timestamp': ts, 'pool_hashrate': hashrate, 'qubic_usdt': qubic, 'close': close})
+
+
+def one_shot(pool):
+    """Complete hours computed with a pandas groupby over the whole frame."""
+    hour = pool['timestamp'].dt.floor('h')
+    out = pool.groupby(hour).agg({'pool_hashrate': 'mean', 'qubic_usdt': 'last', 'close': 'last'})
+    return out.iloc[:-1]
+
+
+def feed(series, pool, rng):
+    lo = 0
+    while lo < len(pool):
+        # Mostly a few rows inside the open hour, now and then a batch across several hours
+        size = int(rng.choice([1, 7, 40, 900], p=[0.4, 0.3, 0.2, 0.1]))
+        series.on_ingest(pool.iloc[lo:lo + size], False)
+        lo += size
+
+
+def test_batched_hours_match_pandas(pool):
+    series = correlation.HourlySeries()
+    series.on_ingest(pool.iloc[:1000], True)
+    feed(series, pool.iloc[1000:], np.random.default_rng(0))
+    hours = series.frame()
+    assert len(hours) > 20
+    pd.testing.assert_frame_equal(hours, one_shot(pool), check_names=False, check_freq=False, rtol=1e-12)
+
+
+def test_restore_starts_over(pool):
+    series = correlation.HourlySeries()
+    feed(series, pool.iloc[:4000], np.random.default_rng(1))
+    # A restored snapshot: fewer rows than were fed, and not a continuation of them
+    restored = pool.iloc[:2500]
+    series.on_ingest(restored, True)
+    pd.testing.assert_frame_equal(series.frame(), one_shot(restored), check_names=False, check_freq=False, rtol=1e-12)
+    feed(series, pool.iloc[2500:], np.random.default_rng(2))
+    pd.testing.assert_frame_equal(series.frame(), one_shot(pool), check_names=False, check_freq=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize('window', [24, 168])
+def test_rolling_corr_matches_pandas(window):
+    rng = np.random.default_rng(window)
+    n = 2000
+    x = rng.normal(0, 0.01, n)
+    y = 0.5 * x + rng.normal(0, 0.01, n)
+    x[rng.random(n) < 0.1] = np.nan
+    y[rng.random(n) < 0.1] = np.nan
+    min_periods = window // 2
+    expected = pd.Series(x).rolling(window, min_periods=min_periods).corr(pd.Series(y))
+    np.testing.assert_allclose(correlation.rolling_corr(x, y, window, min_periods), expected, rtol=1e-8, atol=1e-10)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import estimators
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(5)
+    n = 5000
+    pool = 2e8 * np.exp(rng.normal(0, 0.3, n))
+    pool[rng.random(n) < 0.01] = 0  # miners gone: skipped by the log-space estimators
+    return pd.DataFrame({'timestamp': pd.date_range('2025-06-01', periods=n, freq='10s'),
+                         'pool_hashrate': pool, 'network_hashrate': 5e9 * np.exp(rng.normal(0, 0.05, n))})
+
+
+def ingest_in_batches(smoother, df, sizes=(1000, 1, 7, 333)):
+    smoother.on_ingest(df.iloc[:sizes[0]], True)
+    lo, i = sizes[0], 1
+    while lo < len(df):
+        size = sizes[i % len(sizes)] or 1
+        smoother.on_ingest(df.iloc[lo:lo + size], False)
+        lo, i = lo + size, i + 1
+    return smoother.frame()
+
+
+def test_smooth_matches_the_recurrence():
+    rng = np.random.default_rng(0)
+    z = rng.normal(size=101)
+    z[[0, 17, 50]] = np.nan
+    a = rng.random(101)
+    x, expected = np.nan, []
+    for zi, ai in zip(z, a):
+        if not np.isnan(zi):
+            x = zi if np.isnan(x) else (1 - ai) * x + ai * zi
+        expected.append(x)
+    np.testing.assert_allclose(estimators.smooth(z, a), expected, rtol=1e-9)
+
+
+def test_batches_match_one_shot_pandas(pool):
+    smoother = estimators.Smoother()
+    series = ingest_in_batches(smoother, pool)
+    assert len(series) == len(pool)
+
+    # Evenly spaced rows: both log-space estimators are a pandas EWM with a constant weight
+    dt = 10.0
+    for method, weight in (('ewma', estimators.ewma_weights(dt, smoother.halflife)),
+                           ('kalman', estimators.kalman_gains(dt, smoother.process_var, smoother.measurement_var))):
+        for name in ('pool_hashrate', 'network_hashrate'):
+            logs = np.log(pool[name].where(pool[name] > 0))
+            expected = np.exp(logs.ewm(alpha=weight, adjust=False, ignore_na=True).mean())
+            np.testing.assert_allclose(series[f'{name}_{method}'], expected, rtol=1e-5)
+
+    medians = pool.assign(share=pool['pool_hashrate'] / pool['network_hashrate']) \
+        .rolling(smoother.median_window, on='timestamp')[estimators.SERIES].median()
+    for name in estimators.SERIES:
+        np.testing.assert_allclose(series[f'{name}_median'], medians[name], rtol=1e-6)
+
+
+def test_restore_starts_over(pool):
+    smoother = estimators.Smoother()
+    smoother.on_ingest(pool, True)
+    smoother.on_ingest(pool.iloc[-100:], True)
+    fresh = estimators.Smoother()
+    fresh.on_ingest(pool.iloc[-100:], True)
+    pd.testing.assert_frame_equal(smoother.frame(), fresh.frame())
@@ -0,0 +1,75 @@
+import io
+
+import pandas as pd
+import pytest
+import requests
+
+import export
+import history
+
+
+def pool_frame(n, start='2025-06-01', freq='min'):
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq=freq).astype(str),
+        'pool_hashrate': 2e8, 'network_hashrate': 5e9, 'pool_blocks_found': 10 + pd.RangeIndex(n) // 500,
+        'qubic_epoch': 165,
+    }))
+
+
+@pytest.fixture
+def store():
+    # Three days a minute apart: two of them rolled up, the last one raw
+    store = history.HistoryStore(raw_days=1)
+    store.ingest(pool_frame(3 * 1440))
+    assert not store.rollups.empty
+    return store
+
+
+@pytest.fixture
+def server(store):
+    burns = pd.DataFrame({'timestamp': pd.date_range('2025-06-01', periods=5, freq='D'),
+                          'qubic_amount': 1e9, 'usdt_value': 2e3})
+    server = export.serve(store, lambda: burns, port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}/export"
+    server.shutdown()
+
+
+def test_csv_header_is_written_once(store):
+    pieces = list(export.iter_csv(export.pool_chunks(store, chunk_rows=500)))
+    assert len(pieces) > 2
+    text = b"".join(pieces).decode()
+    header = text.splitlines()[0]
+    assert text.count(header) == 1
+    df = pd.read_csv(io.StringIO(text), parse_dates=['timestamp'])
+    pd.testing.assert_frame_equal(df[['timestamp', 'pool_hashrate']], store.window()[['timestamp', 'pool_hashrate']],
+                                  check_dtype=False)
+
+
+def test_parquet_row_groups_read_back_with_one_schema(store):
+    pq = pytest.importorskip('pyarrow.parquet')
+    data = b"".join(export.iter_parquet(export.pool_chunks(store, chunk_rows=500)))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.num_row_groups == -(-len(store.rollups) // 500) + -(-len(store.changes) // 500)
+    # Rolled-up rows come first; the raw ones after them follow the same schema
+    groups = [parquet.read_row_group(i) for i in range(parquet.num_row_groups)]
+    assert all(group.schema == parquet.schema_arrow for group in groups)
+    df = parquet.read().to_pandas()
+    assert len(df) == len(store.window())
+    assert df['timestamp'].is_monotonic_increasing
+
+
+def test_export_endpoint_streams_chunks(server, store):
+    response = requests.get(server, params={'dataset': 'pool', 'start': '2025-06-03'}, timeout=10)
+    assert response.status_code == 200
+    assert response.headers['Transfer-Encoding'] == 'chunked'
+    assert 'qpool-pool-20250603.csv' in response.headers['Content-Disposition']
+    df = pd.read_csv(io.StringIO(response.text))
+    assert len(df) == len(store.window(start=pd.Timestamp('2025-06-03')))
+    burns = requests.get(server, params={'dataset': 'burns'}, timeout=10)
+    assert len(pd.read_csv(io.StringIO(burns.text))) == 5
+
+
+@pytest.mark.parametrize('params', [{'format': 'xlsx'}, {'dataset': 'trades'}, {'start': 'not a date'}])
+def test_export_endpoint_rejects_bad_requests(server, params):
+    response = requests.get(server, params=params, timeout=10)
+    assert response.status_code == 400
@@ -0,0 +1,141 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch
+
+CSV = b"timestamp,pool_hashrate\n2025-06-01 00:00:00,200000000\n"
+
+
+class FlakyServer:
+    """Local HTTP server answering from a script of (status, delay) steps, then 200s."""
+
+    def __init__(self):
+        self.script = []
+        self.hits = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.hits.append(self.path)
+                if not self.path.endswith('.csv'):
+                    self.send_error(404)
+                    return
+                status, delay = server.script.pop(0) if server.script else (200, 0)
+                time.sleep(delay)
+                body = CSV if status == 200 else b"upstream error"
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "text/csv")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/pool.csv"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def csv_hits(self):
+        return sum(p.endswith('.csv') for p in self.hits)
+
+
+@pytest.fixture
+def server():
+    s = FlakyServer()
+    yield s
+    s.httpd.shutdown()
+    s.httpd.server_close()
+
+
+def fetcher(url, **kw):
+    kw.setdefault('backoff', 0.01)
+    kw.setdefault('timeout', (1, 0.5))
+    return fetch.Fetcher(url, **kw)
+
+
+def test_retries_server_errors_then_succeeds(server):
+    server.script = [(503, 0), (500, 0)]
+    f = fetcher(server.url, negotiate=False)
+    assert len(f.read_frame()) == 1
+    assert server.csv_hits() == 3
+    assert f.breaker.state == "closed" and f.breaker.failures == 0
+
+
+def test_client_errors_are_not_retried(server):
+    server.script = [(403, 0)]
+    f = fetcher(server.url, negotiate=False)
+    with pytest.raises(fetch.FetchError):
+        f.get()
+    assert server.csv_hits() == 1
+    assert f.breaker.failures == 1
+
+
+def test_read_timeout_is_retried(server):
+    server.script = [(200, 1.5)]
+    assert len(fetcher(server.url, negotiate=False).read_frame()) == 1
+    assert server.csv_hits() == 2
+
+
+def test_breaker_opens_fails_fast_and_probes(server):
+    server.script = [(503, 0)] * 4
+    breaker = fetch.CircuitBreaker(threshold=2, reset_after=0.3)
+    f = fetcher(server.url, negotiate=False, retries=1, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(fetch.FetchError):
+            f.get()
+    assert breaker.state == "open"
+    hits = server.csv_hits()
+    with pytest.raises(fetch.CircuitOpenError):
+        f.get()
+    assert server.csv_hits() == hits
+    time.sleep(0.35)
+    assert breaker.state == "half-open"
+    # The probe goes through and a healthy upstream closes the breaker
+    assert f.get().status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_missing_compressed_siblings_are_dropped(server):
+    f = fetcher(server.url)
+    assert len(f.read_frame()) == 1
+    assert f.candidates == [server.url]
+    hits = len(server.hits)
+    f.read_frame()
+    assert len(server.hits) == hits + 1
+
+
+def test_stale_while_revalidate_serves_last_good_value(server):
+    f = fetcher(server.url, negotiate=False, retries=0)
+    feed = fetch.StaleWhileRevalidate(f.read_frame, ttl=0.05)
+    first = feed.get()
+    assert len(first) == 1
+    server.script = [(503, 0)]
+    time.sleep(0.06)
+    assert feed.get() is first  # stale value returned at once, refresh runs in the background
+    deadline = time.monotonic() + 2
+    while feed.last_error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert isinstance(feed.last_error, fetch.FetchError)
+    assert feed.get() is first
+    deadline = time.monotonic() + 2
+    while feed.value is first and time.monotonic() < deadline:
+        time.sleep(0.01)
+        feed.get()
+    assert feed.value is not first and feed.last_error is None
+
+
+def test_first_load_failure_raises(server):
+    server.script = [(503, 0)]
+    feed = fetch.StaleWhileRevalidate(fetcher(server.url, negotiate=False, retries=0).read_frame, ttl=1)
+    with pytest.raises(fetch.FetchError):
+        feed.get()
+    assert not feed.has_value
+    assert len(feed.get()) == 1
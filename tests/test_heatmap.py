@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import heatmap
+import history
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(11)
+    n = 12_000
+    step = rng.choice([20, 30, 60, 3600], size=n, p=[0.5, 0.3, 0.19, 0.01])  # a few outages
+    ts = pd.Timestamp('2025-06-01') + pd.to_timedelta(np.cumsum(step), unit='s')
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': ts.astype(str), 'pool_hashrate': rng.uniform(1e8, 3e8, n), 'network_hashrate': 5e9,
+        'pool_blocks_found': np.cumsum(rng.random(n) < 0.01),
+    }))
+
+
+def one_shot(pool):
+    """The same cells computed with a pandas groupby over the whole frame."""
+    seconds = pool['timestamp'].diff().fillna(pd.Timedelta(0)).clip(upper=pd.Timedelta(heatmap.MAX_STEP)).dt.total_seconds()
+    frame = pd.DataFrame({'day': pool['timestamp'].dt.dayofweek, 'hour': pool['timestamp'].dt.hour,
+                          'blocks': pool['blocks_delta'], 'seconds': seconds,
+                          'hashes': pool['pool_hashrate'] * seconds})
+    sums = frame.groupby(['day', 'hour'])[['blocks', 'seconds', 'hashes']].sum()
+    full = pd.MultiIndex.from_product([range(7), range(24)], names=['day', 'hour'])
+    return sums.reindex(full, fill_value=0.0)
+
+
+def test_bulk_and_live_updates_match_pandas(pool):
+    grid = heatmap.WeekHeatmap()
+    grid.on_ingest(pool.iloc[:5000], True)  # bincount path
+    for lo in range(5000, len(pool), 37):  # row-by-row path
+        grid.on_ingest(pool.iloc[lo:lo + 37], False)
+    expected = one_shot(pool)
+    np.testing.assert_allclose(grid.grid('blocks').to_numpy().ravel(), expected['blocks'])
+    np.testing.assert_allclose(grid.grid('hours').to_numpy().ravel(), expected['seconds'] / 3600)
+    hashrate = (expected['hashes'] / expected['seconds']).where(expected['seconds'] > 0)
+    np.testing.assert_allclose(grid.grid('hashrate').to_numpy().ravel(), hashrate, rtol=1e-9)
+
+
+def test_cells_match_pandas_weekday_and_hour(pool):
+    ts = pool['timestamp']
+    np.testing.assert_array_equal(heatmap.cells(ts.to_numpy().view('int64')), ts.dt.dayofweek * 24 + ts.dt.hour)
@@ -0,0 +1,81 @@
+import pandas as pd
+
+import history
+
+
+def pool_frame(n, start='2025-06-01', tag='pool-a', freq='s'):
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq=freq).astype(str),
+        'pool_hashrate': 2e8, 'network_hashrate': 5e9, 'pool_blocks_found': 10, 'qubic_epoch': 165,
+        'tag': [f'{tag}-{i % 7}' for i in range(n)],
+    }))
+
+
+def test_frame_bytes_counts_object_values():
+    df = pool_frame(100)
+    assert history.frame_bytes(df) > df.memory_usage(index=True, deep=False).sum()
+
+
+def test_frame_is_not_kept():
+    store = history.HistoryStore()
+    store.ingest(pool_frame(1000))
+    before = store.memory_bytes()
+    assert len(store.frame()) == 1000
+    assert store.memory_bytes() == before
+    assert len(store.window(start=store.last_timestamp - pd.Timedelta(seconds=9))) == 10
+    assert store.first_timestamp == pd.Timestamp('2025-06-01')
+
+
+def test_failing_listener_does_not_stop_the_others():
+    store = history.HistoryStore()
+    seen = []
+
+    def broken(df, initial):
+        raise RuntimeError("boom")
+    store.subscribe(broken)
+    store.subscribe(lambda df, initial: seen.append(len(df)))
+    assert store.ingest(pool_frame(10)) == 10
+    assert seen == [10]
+    assert store.listener_errors == 1
+
+
+def test_export_keeps_rows_an_eviction_would_move():
+    store = history.HistoryStore(raw_days=1)
+    store.ingest(pool_frame(3000))
+    chunks = store.iter_window(chunk_rows=500)
+    exported = len(next(chunks))
+    # A day later every held row is past the raw window
+    store.ingest(pool_frame(10, start='2025-06-02 00:10:00'))
+    assert store.raw_span() > pd.Timedelta(days=1)
+    exported += sum(len(chunk) for chunk in chunks)
+    assert exported == 3000
+    store.ingest(pool_frame(10, start='2025-06-02 02:00:00'))
+    assert store.raw_span() < pd.Timedelta(days=1)
+    assert not store.rollups.empty
+
+
+def test_closed_export_lets_evictions_resume():
+    store = history.HistoryStore(raw_days=1)
+    store.ingest(pool_frame(3000))
+    chunks = store.iter_window(chunk_rows=500)
+    next(chunks)
+    chunks.close()
+    store.ingest(pool_frame(10, start='2025-06-02 02:00:00'))
+    assert store.raw_span() < pd.Timedelta(days=1)
+
+
+def test_ceiling_waits_for_an_export_instead_of_dropping_rollups():
+    store = history.HistoryStore(raw_days=1)
+    store.ingest(pool_frame(3 * 1440, freq='min'))
+    rollups = len(store.rollups)
+    assert rollups > 1
+    held = len(store.window())
+    chunks = store.iter_window(chunk_rows=500)
+    exported = len(next(chunks))
+    store.ceiling_bytes = 1
+    store.ingest(pool_frame(10, start='2025-06-04'))
+    assert len(store.rollups) == rollups
+    exported += sum(len(chunk) for chunk in chunks)
+    assert exported == held
+    # The export is over, so the ceiling applies again
+    assert store.raw_span() < pd.Timedelta(days=1)
@@ -0,0 +1,88 @@
+import time
+
+import pandas as pd
+import pytest
+
+import ohlcv
+
+HOUR_MS = 3_600_000
+
+
+class StubExchange:
+    """Hourly candles from ``listed`` to ``now``, at most ``page`` per call."""
+
+    rateLimit = 50
+
+    def __init__(self, listed='2025-06-01', now='2025-06-10', page=100, enableRateLimit=False):
+        self.start = int(pd.Timestamp(listed, tz='UTC').timestamp() * 1000)
+        self.now = int(pd.Timestamp(now, tz='UTC').timestamp() * 1000)
+        self.page = page
+        self.enableRateLimit = enableRateLimit
+        self.calls = []
+
+    def parse_timeframe(self, timeframe):
+        return 3600
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((symbol, since, time.monotonic()))
+        ts = -(-max(since, self.start) // HOUR_MS) * HOUR_MS
+        out = []
+        while ts <= self.now and len(out) < min(limit, self.page):
+            price = 300 + ts / HOUR_MS % 10
+            out.append([ts, price, price + 1, price - 1, price, 10.0])
+            ts += HOUR_MS
+        return out
+
+
+@pytest.fixture
+def cache(tmp_path):
+    def make(exchange, **kw):
+        return ohlcv.OHLCVCache(str(tmp_path / 'ohlcv.sqlite'), exchange=exchange, backfill_from='2025-05-01', **kw)
+    return make
+
+
+def test_backfill_pages_through_capped_pages(cache):
+    exchange = StubExchange()
+    c = cache(exchange, page_limit=1000)
+    assert c.update('XMR/USDT') == 9 * 24 + 1
+    df = c.frame('XMR/USDT')
+    assert df['timestamp'].iloc[0] == pd.Timestamp('2025-06-01')
+    assert df['timestamp'].diff().dropna().eq(pd.Timedelta('1h')).all()
+    assert len(exchange.calls) > 2
+
+
+def test_update_refetches_only_from_the_last_candle(cache):
+    exchange = StubExchange()
+    c = cache(exchange)
+    c.update('XMR/USDT')
+    exchange.now += 3 * HOUR_MS
+    exchange.calls.clear()
+    assert c.update('XMR/USDT') == 4  # the last stored candle again, and three new ones
+    assert exchange.calls[0][1] == exchange.now - 3 * HOUR_MS
+    assert len(c.frame('XMR/USDT')) == 9 * 24 + 4
+
+
+def test_stub_exchange_requests_are_spaced(cache):
+    exchange = StubExchange(page=50)
+    cache(exchange).update('XMR/USDT')
+    gaps = [b[2] - a[2] for a, b in zip(exchange.calls, exchange.calls[1:])]
+    assert min(gaps) >= exchange.rateLimit / 1000 * 0.9
+
+
+def test_ccxt_rate_limit_is_not_slept_twice(cache, monkeypatch):
+    slept = []
+    monkeypatch.setattr(ohlcv.time, 'sleep', slept.append)
+    exchange = StubExchange(page=50, enableRateLimit=True)
+    cache(exchange).update('XMR/USDT')
+    assert len(exchange.calls) > 2
+    assert slept == []
+
+
+def test_frames_and_window(cache):
+    c = cache(StubExchange())
+    c.update_all(['XMR/USDT', 'QUBIC/USDT'])
+    frames = c.frames(['XMR/USDT', 'QUBIC/USDT'])
+    assert set(frames) == {'XMR/USDT', 'QUBIC/USDT'}
+    window = c.frame('XMR/USDT', start='2025-06-05', end='2025-06-05 05:00')
+    assert len(window) == 6
+    assert list(window.columns) == ohlcv.COLUMNS
@@ -0,0 +1,29 @@
+import os
+
+import profiling
+
+
+def test_query_param_profiles_one_rerun():
+    params = {'profile': '1'}
+    profiler = profiling.begin(params, sampled=False)
+    assert profiler is not None
+    profiler.disable()
+    assert 'profile' not in params
+    assert profiling.begin(params, sampled=False) is None
+
+
+def test_sampling_profiles_at_most_one_rerun_per_interval():
+    profiling._sampled_at = None
+    first = profiling.begin({}, sampled=True, every=3600)
+    assert first is not None
+    first.disable()
+    assert profiling.begin({}, sampled=True, every=3600) is None
+
+
+def test_finish_keeps_only_the_newest_files(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"old-{i}.pstats"
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+    path, top = profiling.finish(profiling.begin({'profile': '1'}, sampled=False), 'session', str(tmp_path), keep=3)
+    assert sorted(os.listdir(tmp_path)) == sorted(['old-3.pstats', 'old-4.pstats', os.path.basename(path)])
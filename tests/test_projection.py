@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import projection
+
+
+def share_series(days, hourly_swing=0.5, daily=None):
+    """Smoothed share sampled every 10 minutes: swinging within each day around that day's mean."""
+    ts = pd.date_range('2025-06-01', periods=days * 144, freq='10min')
+    hour = np.arange(len(ts)) // 6
+    day_mean = np.repeat(daily if daily is not None else np.full(days, 0.01), 144)
+    return pd.DataFrame({'timestamp': ts, 'share_kalman': day_mean * (1 + hourly_swing * np.where(hour % 2, 1, -1))})
+
+
+def test_dispersion_is_day_level_once_there_are_enough_days():
+    assert projection.share_dispersion(share_series(7)) < 1e-9
+    assert projection.share_dispersion(share_series(2)) > 0.4
+    assert projection.share_dispersion(share_series(7, daily=[0.01, 0.02] * 3 + [0.01])) > 0.3
+
+
+def test_card_totals_are_the_fan_end():
+    result = projection.project(0.01, 0.3, '2025-06-02 00:00', blocks_so_far=4, seed=1)
+    last = result['fan'].iloc[-1]
+    assert last['timestamp'] == result['end']
+    assert [result[q] for q in projection.QUANTILES] == [last[q] for q in projection.QUANTILES]
+    assert result['p10'] <= result['p50'] <= result['p90']
+    assert result['fan'].iloc[0][list(projection.QUANTILES)].tolist() == [4, 4, 4]
+
+
+def test_band_does_not_narrow_with_time_left():
+    # Persistent share: the spread of the expected total stays proportional to it
+    narrow = projection.project(0.01, 0.0, '2025-06-02 00:00', paths=20_000, seed=2)
+    wide = projection.project(0.01, 0.5, '2025-06-02 00:00', paths=20_000, seed=2)
+    assert wide['p90'] - wide['p10'] > 1.5 * (narrow['p90'] - narrow['p10'])
+
+
+def test_fan_paths_spread_their_totals_over_the_steps():
+    seconds = 7 * 86400
+    totals, cumulative = projection.simulate(0.01, 0.3, seconds, paths=50_000, fan_paths=50_000, seed=3)
+    np.testing.assert_array_equal(cumulative[:, -1], totals)
+    assert (np.diff(cumulative, axis=1) >= 0).all()
+    # Blocks arrive evenly in time: by the middle step, half of them on average
+    middle = cumulative.shape[1] // 2 - 1
+    elapsed = (middle + 1) * projection.STEP.total_seconds()
+    expected = 0.01 * elapsed / projection.MONERO_BLOCK_TIME
+    assert abs(cumulative[:, middle].mean() - expected) < 0.02 * expected
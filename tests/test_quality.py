@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+import history
+import quality
+
+
+def rows(counters, start='2025-06-01'):
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=len(counters), freq='10s').astype(str),
+        'pool_hashrate': 2e8, 'network_hashrate': 5e9, 'network_height': 3_000_000,
+        'pool_blocks_found': counters,
+    }))
+
+
+def kept_counters(gate, batches):
+    kept = []
+    for i, batch in enumerate(batches):
+        kept += gate(batch, i == 0)['pool_blocks_found'].tolist()
+    return kept
+
+
+def one_at_a_time(df):
+    return [df.iloc[i:i + 1] for i in range(len(df))]
+
+
+def test_up_jump_is_quarantined_not_the_row_after_it():
+    gate = quality.QualityGate()
+    df = rows([5, 5, 9, 5, 6, 6, 7])
+    kept = gate(df.iloc[:-1], True)
+    assert kept['pool_blocks_found'].tolist() == [5, 5, 5, 6, 6]
+    assert kept['blocks_delta'].tolist() == [0, 0, 0, 1, 0]
+    assert gate.recent()['pool_blocks_found'].tolist() == [9]
+    # A last row that rose waits for the next one to confirm it
+    assert gate(df, False).empty
+    assert gate.counts['rows'] == 6
+
+
+def test_up_jump_across_single_row_batches():
+    gate = quality.QualityGate()
+    kept = kept_counters(gate, one_at_a_time(rows([5, 9, 5, 5, 6, 6])))
+    assert kept == [5, 5, 5, 6, 6]
+    assert gate.recent()['reason'].tolist() == ['counter']
+
+
+def test_down_dip_is_compared_with_the_last_row_kept():
+    gate = quality.QualityGate()
+    kept = gate(rows([9, 9, 5, 6, 9, 9]), True)
+    assert kept['pool_blocks_found'].tolist() == [9, 9, 9, 9]
+    assert sorted(gate.recent()['pool_blocks_found']) == [5, 6]
+    assert not kept['block_found'].any()
+
+
+def test_down_dip_across_batches():
+    gate = quality.QualityGate()
+    kept = kept_counters(gate, one_at_a_time(rows([9, 9, 5, 6, 9, 10, 10])))
+    assert kept == [9, 9, 9, 10, 10]
+    assert gate.counts['counter'] == 2
+
+
+def test_lasting_fall_becomes_the_new_level():
+    gate = quality.QualityGate(counter_reset_rows=5)
+    kept = gate(rows([9, 9] + [0] * 10), True)
+    counters = kept['pool_blocks_found'].to_numpy()
+    np.testing.assert_array_equal(counters, [9, 9] + [0] * 6)
+    assert gate.counts['counter'] == 4
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import history
+import revenue
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(7)
+    n = 30_000
+    ts = pd.date_range('2025-06-01', periods=n, freq='20s')
+    close = np.where(np.arange(n) % 15 == 0, 300 + np.cumsum(rng.normal(0, 0.5, n)), np.nan)  # every 5 min
+    close[8000:9000] = np.nan  # a stretch with no pool price: candles fill it
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': ts.astype(str), 'pool_hashrate': 2e8, 'network_hashrate': 5e9,
+        'pool_blocks_found': np.cumsum(rng.random(n) < 0.01), 'qubic_epoch': 165 + np.arange(n) // 20_000,
+        'close': close,
+    }))
+
+
+@pytest.fixture
+def candles(pool):
+    hours = pd.date_range(pool['timestamp'].iloc[0].floor('h'), pool['timestamp'].iloc[-1], freq='h')
+    return pd.DataFrame({'timestamp': hours, 'close': np.linspace(290, 310, len(hours))})
+
+
+def one_shot(pool, candles, period):
+    """Every block priced at once: nearest pool price, else nearest candle, grouped by pandas."""
+    events = revenue.block_events(pool)
+    prices = pool[['timestamp', 'close']].rename(columns={'close': 'xmr_usd'}).dropna()
+    price = revenue.price_asof(events, prices, revenue.POOL_PRICE_TOLERANCE)
+    candle_prices = candles.rename(columns={'close': 'xmr_usd'})
+    price = price.fillna(revenue.price_asof(events, candle_prices, revenue.CANDLE_PRICE_TOLERANCE))
+    xmr = events['blocks'] * revenue.XMR_PER_BLOCK
+    valued = events.assign(xmr=xmr, usd=(xmr * price).fillna(0.0))
+    key = valued['qubic_epoch'] if period == 'epoch' else valued['timestamp'].dt.floor(revenue.PERIODS[period])
+    return valued.groupby(key.to_numpy())[['blocks', 'xmr', 'usd']].sum()
+
+
+@pytest.mark.parametrize('period', ['hour', 'day', 'epoch'])
+def test_batches_match_one_shot_pandas(pool, candles, period):
+    ledger = revenue.RevenueLedger()
+    ledger.on_ingest(pool.iloc[:7000], True)
+    # Candles arrive while the unpriced stretch is ingested, and blocks straddle batch edges
+    for lo in range(7000, len(pool), 997):
+        ledger.on_ingest(pool.iloc[lo:lo + 997], False)
+        if lo > 9000:
+            ledger.add_prices(candles)
+    got = ledger.series(period)
+    expected = one_shot(pool, candles, period)
+    np.testing.assert_array_equal(got.index.to_numpy(), expected.index.to_numpy())
+    np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-9)
+    assert ledger.totals_all()['unpriced_blocks'] == 0
+
+
+def test_initial_ingest_starts_over(pool):
+    ledger = revenue.RevenueLedger()
+    ledger.on_ingest(pool, True)
+    ledger.on_ingest(pool.iloc[-1000:], True)
+    assert ledger.totals_all()['blocks'] == pool['blocks_delta'].iloc[-1000:].clip(lower=0).sum()
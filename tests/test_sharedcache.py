@@ -0,0 +1,129 @@
+import multiprocessing
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import history
+import sharedcache
+
+pytestmark = pytest.mark.skipif(sharedcache.pa is None, reason="pyarrow not installed")
+fork = multiprocessing.get_context('fork')
+
+
+def pool_frame(n):
+    rng = np.random.default_rng(0)
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range('2025-06-01', periods=n, freq='s').astype(str),
+        'pool_hashrate': rng.normal(2e8, 1e7, n).round(-6), 'network_hashrate': 5e9,
+        'pool_blocks_found': 10 + np.arange(n) // 500, 'qubic_epoch': 165,
+    }))
+
+
+def writer(path, steps, done, release):
+    """Another replica: holds the writer lock and publishes the history in ``steps`` row counts."""
+    backend = sharedcache.open_backend(f"file://{path}")
+    assert backend.try_acquire()
+    store = history.HistoryStore()
+    channel = sharedcache.HistoryChannel(backend, store, base_interval=0 if len(steps) > 2 else 3600)
+    for n in steps:
+        store.ingest(pool_frame(n))
+        channel.publish()
+        done.put(n)
+        release.get(timeout=30)
+
+
+def start_writer(path, steps):
+    done, release = fork.Queue(), fork.Queue()
+    proc = fork.Process(target=writer, args=(path, steps, done, release))
+    proc.start()
+    return proc, done, release
+
+
+def test_follower_process_syncs_and_takes_over(tmp_path):
+    proc, done, release = start_writer(tmp_path, [1000, 1200])
+    try:
+        assert done.get(timeout=30) == 1000
+        backend = sharedcache.open_backend(f"file://{tmp_path}")
+        assert not backend.try_acquire()
+        store = history.HistoryStore()
+        channel = sharedcache.HistoryChannel(backend, store)
+        channel.sync()
+        pd.testing.assert_frame_equal(store.frame(), pool_frame(1000))
+        assert channel.restores == 1
+
+        release.put(True)
+        assert done.get(timeout=30) == 1200
+        # New rows arrive through the tail alone
+        assert channel.sync() == 200
+        assert channel.restores == 1
+        pd.testing.assert_frame_equal(store.frame(), pool_frame(1200))
+        release.put(True)
+        proc.join(timeout=30)
+        # The writer's lock went with its process
+        assert backend.try_acquire()
+    finally:
+        proc.kill()
+
+
+def test_tail_only_rewrites_recent_rows(tmp_path):
+    proc, done, release = start_writer(tmp_path, [5000, 5001])
+    try:
+        done.get(timeout=30)
+        base = (tmp_path / 'history.base.bin').stat().st_size
+        release.put(True)
+        done.get(timeout=30)
+        assert (tmp_path / 'history.tail.bin').stat().st_size < base / 4
+        assert (tmp_path / 'history.base.bin').stat().st_size == base
+        release.put(True)
+        proc.join(timeout=30)
+    finally:
+        proc.kill()
+
+
+def test_follower_behind_the_tail_restores_the_base(tmp_path):
+    proc, done, release = start_writer(tmp_path, [1000, 1100, 1200, 1300])
+    try:
+        backend = sharedcache.open_backend(f"file://{tmp_path}")
+        store = history.HistoryStore()
+        channel = sharedcache.HistoryChannel(backend, store)
+        done.get(timeout=30)
+        channel.sync()
+        for _ in range(3):
+            release.put(True)
+            done.get(timeout=30)
+        # Two bases went by since the follower last synced: its rows end before the tail starts
+        channel.sync()
+        assert channel.restores == 2
+        pd.testing.assert_frame_equal(store.frame(), pool_frame(1300))
+        release.put(True)
+        proc.join(timeout=30)
+    finally:
+        proc.kill()
+
+
+def test_concurrent_syncs_restore_the_base_once(tmp_path):
+    proc, done, release = start_writer(tmp_path, [1000, 1200])
+    try:
+        done.get(timeout=30)
+        backend = sharedcache.open_backend(f"file://{tmp_path}")
+        store = history.HistoryStore()
+        initial = []
+        store.subscribe(lambda df, is_initial: initial.append(is_initial))
+        channel = sharedcache.HistoryChannel(backend, store)
+        # Sessions rerunning together each call sync on the shared channel
+        threads = [threading.Thread(target=channel.sync) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        assert channel.restores == 1
+        assert initial.count(True) == 1
+        pd.testing.assert_frame_equal(store.frame(), pool_frame(1000))
+        release.put(True)
+        done.get(timeout=30)
+        release.put(True)
+        proc.join(timeout=30)
+    finally:
+        proc.kill()
@@ -0,0 +1,75 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import history
+import snapshot
+
+pytestmark = pytest.mark.skipif(snapshot.pa is None, reason="pyarrow not installed")
+
+
+def pool_frame(n, start='2025-06-01'):
+    rng = np.random.default_rng(0)
+    return history.prepare_frame(pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq='min').astype(str),
+        'pool_hashrate': np.where(rng.random(n) < 0.05, np.nan, rng.normal(2e8, 1e7, n).round(-6)),
+        'network_hashrate': 5e9, 'pool_blocks_found': 10 + np.arange(n) // 50, 'qubic_epoch': 165,
+        'pool_name': ['qpool'] * (n // 2) + ['qpool-eu'] * (n - n // 2),
+    }))
+
+
+def test_round_trip(tmp_path):
+    store = history.HistoryStore(raw_days=1)
+    store.ingest(pool_frame(3000))
+    burns = pd.DataFrame({'timestamp': pd.to_datetime(['2025-06-01', '2025-06-02']), 'tx': ['a', 'b'],
+                          'qubic_amount': [1e9, 2e9], 'usdt_value': [1.5, 3.0]})
+    path = tmp_path / 'snapshot.qps'
+    snapshot.save(path, store, {'burns': burns})
+    state = snapshot.load(path)
+    restored = history.HistoryStore(raw_days=1)
+    assert snapshot.restore(restored, state)
+    pd.testing.assert_frame_equal(restored.frame(), store.frame())
+    pd.testing.assert_frame_equal(state['extra']['burns'], burns)
+    assert restored.ath_row['pool_hashrate'].iloc[0] == store.ath_row['pool_hashrate'].iloc[0]
+    # Appends carry on where the snapshot left off
+    more = pool_frame(3010)
+    assert restored.ingest(more) == store.ingest(more) == 10
+    pd.testing.assert_frame_equal(restored.frame(), store.frame())
+
+
+def test_unreadable_files_are_ignored(tmp_path):
+    assert snapshot.load(tmp_path / 'missing.qps') is None
+    garbage = tmp_path / 'garbage.qps'
+    garbage.write_bytes(b'\x00' * 100)
+    assert snapshot.load(garbage) is None
+    truncated = tmp_path / 'truncated.qps'
+    store = history.HistoryStore()
+    store.ingest(pool_frame(100))
+    snapshot.save(truncated, store)
+    truncated.write_bytes(truncated.read_bytes()[:-50])
+    assert snapshot.load(truncated) is None
+
+
+class Payload:
+    ran = False
+
+    def __reduce__(self):
+        return (setattr, (Payload, 'ran', True))
+
+
+def test_pickles_are_never_unpickled(tmp_path):
+    path = tmp_path / 'snapshot.qps'
+    path.write_bytes(pickle.dumps({'format': snapshot.FORMAT_VERSION, 'x': Payload()}))
+    assert snapshot.load(path) is None
+    assert not Payload.ran
+
+
+def test_save_leaves_no_temporary_files(tmp_path):
+    store = history.HistoryStore()
+    store.ingest(pool_frame(100))
+    for _ in range(3):
+        snapshot.save(tmp_path / 'snapshot.qps', store)
+    assert os.listdir(tmp_path) == ['snapshot.qps']
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pandas as pd
+
+import history
+import sources
+
+
+def pool_csv(n, start='2025-06-01'):
+    return pd.DataFrame({'timestamp': pd.date_range(start, periods=n, freq='h').astype(str), 'pool_hashrate': 2e8,
+                         'network_hashrate': 5e9, 'pool_blocks_found': 10, 'qubic_epoch': 165})
+
+
+def test_store_backed_source_is_not_downloaded():
+    store = history.HistoryStore()
+    store.ingest(history.prepare_frame(pool_csv(48)))
+    fetched = []
+    registry = sources.SourceRegistry([sources.Source('main', 'http://main/pool.csv'), sources.Source('eu', 'http://eu/pool.csv')],
+                                      history.prepare_frame, fetch_frame=lambda s: fetched.append(s.name) or pool_csv(24 * 30),
+                                      stores={'http://main/pool.csv': store})
+    frames = registry.fetch_all(wait=5)
+    assert fetched == ['eu']
+    assert len(frames['main']) == 48
+    # Fetched frames keep only the last SOURCE_WINDOW of the drawn columns
+    assert list(frames['eu'].columns) == sources.SOURCE_COLUMNS
+    assert frames['eu']['timestamp'].iloc[-1] - frames['eu']['timestamp'].iloc[0] == sources.SOURCE_WINDOW
+
+
+def test_only_the_first_load_waits():
+    release = threading.Event()
+
+    def slow(source):
+        if registry.versions():
+            release.wait(5)
+        return pool_csv(3)
+    registry = sources.SourceRegistry([sources.Source('eu', 'http://eu/pool.csv', ttl=0)], history.prepare_frame, fetch_frame=slow)
+    assert len(registry.fetch_all(wait=5)['eu']) == 3
+    started = time.monotonic()
+    assert len(registry.fetch_all(wait=5)['eu']) == 3
+    assert time.monotonic() - started < 1
+    release.set()
+
+
+def test_versions_change_with_new_rows_only():
+    rows = [pool_csv(3)]
+    registry = sources.SourceRegistry([sources.Source('eu', 'http://eu/pool.csv', ttl=0)], history.prepare_frame,
+                                      fetch_frame=lambda s: rows[-1])
+    registry.fetch_all(wait=5)
+    first = registry.versions()
+    registry.fetch_all(wait=5)
+    registry._inflight['eu'].result()
+    assert registry.versions() == first
+    rows.append(pool_csv(4))
+    registry.fetch_all(wait=5)
+    registry._inflight['eu'].result()
+    assert registry.versions() != first
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+import requests
+
+import history
+import stream
+
+
+def pool_row(i):
+    return {'timestamp': str(pd.Timestamp('2025-06-01') + pd.Timedelta(seconds=i)), 'pool_hashrate': 2e8 + i,
+            'network_hashrate': 5e9, 'pool_blocks_found': 10 + i // 100, 'qubic_epoch': 165}
+
+
+def test_since_returns_rows_after_seq():
+    broker = stream.RowBroker(backlog=5)
+    for i in range(3):
+        broker.publish(pool_row(i))
+    assert [seq for seq, _ in broker.since(1)] == [2, 3]
+    assert broker.since(3) == []
+
+
+def test_feed_resyncs_after_falling_behind_the_backlog():
+    broker = stream.RowBroker(backlog=10)
+    store = history.HistoryStore()
+    upstream = [pool_row(i) for i in range(5)]
+
+    def resync():
+        store.ingest(history.prepare_frame(pd.DataFrame(upstream)))
+
+    resync()
+    feed = stream.LiveFeed(broker, store, history.prepare_frame, resync=resync)
+    for i in range(5, 40):
+        upstream.append(pool_row(i))
+        broker.publish(pool_row(i))
+    feed.pull()
+    df = store.frame()
+    assert feed.resyncs == 1
+    assert len(df) == 40
+    assert df['timestamp'].diff().dropna().eq(pd.Timedelta(seconds=1)).all()
+
+
+def test_feed_within_backlog_does_not_resync():
+    broker = stream.RowBroker(backlog=10)
+    store = history.HistoryStore()
+    calls = []
+    feed = stream.LiveFeed(broker, store, history.prepare_frame, resync=lambda: calls.append(1))
+    for i in range(10):
+        broker.publish(pool_row(i))
+    assert feed.pull() == 10
+    assert not calls
+
+
+def test_malformed_last_event_id_is_rejected():
+    server = stream.serve(stream.RowBroker(), host='127.0.0.1', port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/events"
+        resp = requests.get(url, headers={'Last-Event-ID': 'not-a-number'}, timeout=5)
+        assert resp.status_code == 400
+    finally:
+        server.shutdown()
+
+
+def test_publish_requires_the_shared_token():
+    broker = stream.RowBroker()
+    server = stream.serve(broker, port=0, token='s3cret')
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert server.server_address[0] == '127.0.0.1'
+        resp = requests.post(f"{url}/publish", json=pool_row(0), timeout=5)
+        assert resp.status_code == 401
+        with pytest.raises(requests.HTTPError):
+            stream.publish_row(url, pool_row(0), token='wrong')
+        assert stream.publish_row(url, pool_row(0), token='s3cret') == 1
+        assert broker.seq == 1
+    finally:
+        server.shutdown()
+
+
+def test_publish_is_refused_without_a_configured_token():
+    server = stream.serve(stream.RowBroker(), port=0, token='')
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/publish"
+        assert requests.post(url, json=pool_row(0), timeout=5).status_code == 403
+    finally:
+        server.shutdown()
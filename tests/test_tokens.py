@@ -0,0 +1,92 @@
+import tokens
+
+
+class BatchExchange:
+    """Exchange with a batch endpoint: records every fetch_tickers call."""
+
+    has = {'fetchTickers': True}
+
+    def __init__(self, known=None):
+        self.calls = []
+        self.known = known
+        self.fail = False
+
+    def fetch_tickers(self, markets):
+        self.calls.append(list(markets))
+        if self.fail:
+            raise RuntimeError("exchange down")
+        return {m: {'symbol': m, 'last': 1.5, 'percentage': 2.0, 'baseVolume': 10.0}
+                for m in markets if self.known is None or m in self.known}
+
+
+class SingleExchange:
+    """Exchange without fetchTickers: priced one market at a time."""
+
+    has = {'fetchTickers': False}
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_tickers(self, markets):
+        raise AssertionError("fetch_tickers used on an exchange without it")
+
+    def fetch_ticker(self, market):
+        self.calls.append(market)
+        return {'symbol': market, 'last': 3.0, 'quoteVolume': 99.0}
+
+
+def registry(specs, exchanges, batch_size=tokens.BATCH_SIZE):
+    return tokens.TokenRegistry([tokens.Token(**spec) for spec in specs], make_exchange=exchanges.__getitem__,
+                                batch_size=batch_size)
+
+
+def status(reg):
+    return reg.table().set_index('symbol')
+
+
+def test_tokens_are_priced_in_batches_per_exchange():
+    batch, single = BatchExchange(), SingleExchange()
+    specs = [{'symbol': f'T{i}', 'exchange': 'batch', 'market': f'T{i}/USDT'} for i in range(5)]
+    specs += [{'symbol': 'S', 'exchange': 'single', 'market': 'S/USDT'}, {'symbol': 'N', 'note': 'Airdrop pending'}]
+    reg = registry(specs, {'batch': batch, 'single': single}, batch_size=2)
+    reg.fetch_all()
+    assert [len(call) for call in batch.calls] == [2, 2, 1]
+    assert single.calls == ['S/USDT']
+    table = status(reg)
+    assert table.loc['T4', 'price'] == 1.5 and table.loc['T4', 'volume_24h'] == 15.0
+    assert table.loc['S', 'volume_24h'] == 99.0
+    assert table.loc['N', 'status'] == 'Airdrop pending'
+
+
+def test_each_token_keeps_its_own_ttl():
+    batch = BatchExchange()
+    reg = registry([{'symbol': 'FAST', 'exchange': 'batch', 'market': 'FAST/USDT', 'ttl': 0},
+                    {'symbol': 'SLOW', 'exchange': 'batch', 'market': 'SLOW/USDT', 'ttl': 3600}], {'batch': batch})
+    reg.fetch_all()
+    reg.fetch_all()
+    assert batch.calls == [['FAST/USDT', 'SLOW/USDT'], ['FAST/USDT']]
+
+
+def test_missing_market_is_reported_per_token():
+    batch = BatchExchange(known={'QUBIC/USDT'})
+    reg = registry([{'symbol': 'QUBIC', 'exchange': 'batch', 'market': 'QUBIC/USDT'},
+                    {'symbol': 'GONE', 'exchange': 'batch', 'market': 'GONE/USDT'}], {'batch': batch})
+    reg.fetch_all()
+    table = status(reg)
+    assert table.loc['QUBIC', 'status'] == 'ok'
+    assert table.loc['GONE', 'status'] == 'GONE/USDT not returned by batch'
+    assert table['price'].isna().tolist() == [False, True]
+
+
+def test_failed_batch_keeps_previous_tickers():
+    batch = BatchExchange()
+    reg = registry([{'symbol': 'QUBIC', 'exchange': 'batch', 'market': 'QUBIC/USDT', 'ttl': 0}], {'batch': batch})
+    version = reg.fetch_all()
+    batch.fail = True
+    assert reg.fetch_all() == version
+    table = status(reg)
+    assert table.loc['QUBIC', 'price'] == 1.5
+    assert table.loc['QUBIC', 'status'] == 'RuntimeError: exchange down'
+    batch.fail = False
+    reg.fetch_all()
+    assert status(reg).loc['QUBIC', 'status'] == 'ok'
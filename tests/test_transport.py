@@ -0,0 +1,119 @@
+import gzip
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fetch
+import transport
+
+
+def pool_frame(n):
+    return pd.DataFrame({'timestamp': pd.date_range('2025-06-01', periods=n, freq='min').strftime('%Y-%m-%d %H:%M:%S'),
+                         'pool_hashrate': np.arange(n) * 1000 + 2e8, 'pool_blocks_found': np.arange(n) // 10})
+
+
+class FileServer:
+    """Serves ``files`` ({path: (body, headers)}), with suffix Range requests."""
+
+    def __init__(self):
+        self.files = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, with_body):
+                if self.path not in server.files:
+                    self.send_error(404)
+                    return
+                body, headers = server.files[self.path]
+                wanted = self.headers.get('Range', '')
+                status = 200
+                if wanted.startswith('bytes=-'):
+                    body, status = body[-int(wanted[len('bytes=-'):]):], 206
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if with_body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._send(True)
+
+            def do_HEAD(self):
+                self._send(False)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def server():
+    s = FileServer()
+    yield s
+    s.httpd.shutdown()
+    s.httpd.server_close()
+
+
+def publish(server, csv_rows, gz_rows, gz_headers=None, csv_headers=None):
+    server.files['/pool.csv'] = (pool_frame(csv_rows).to_csv(index=False).encode(), csv_headers or {})
+    server.files['/pool.csv.gz'] = (gzip.compress(pool_frame(gz_rows).to_csv(index=False).encode()), gz_headers or {})
+
+
+def gz_only(url):
+    f = fetch.Fetcher(url, backoff=0.01)
+    f.candidates = [url + '.gz', url]
+    return f
+
+
+def test_gzip_content_encoding_sibling_is_accepted(server):
+    # requests undoes Content-Encoding, so the body arrives without the gzip magic
+    publish(server, 50, 50, gz_headers={'Content-Encoding': 'gzip'})
+    f = gz_only(server.base + '/pool.csv')
+    assert len(f.read_frame()) == 50
+    assert f.served.endswith('.gz') and f.candidates[0].endswith('.gz')
+    assert f.stale_siblings == 0
+
+
+def test_sibling_behind_the_csv_falls_back_to_it(server):
+    publish(server, 60, 50)
+    f = gz_only(server.base + '/pool.csv')
+    df = f.read_frame()
+    assert len(df) == 60
+    assert f.stale_siblings == 1
+    # The sibling is kept for when the collector catches it up
+    publish(server, 60, 60)
+    assert len(f.read_frame()) == 60
+    assert f.served.endswith('.gz') and f.stale_siblings == 1
+
+
+def test_last_modified_decides_when_both_have_it(server):
+    publish(server, 60, 50, gz_headers={'Last-Modified': formatdate(1_750_000_000, usegmt=True)},
+            csv_headers={'Last-Modified': formatdate(1_750_000_060, usegmt=True)})
+    f = gz_only(server.base + '/pool.csv')
+    assert len(f.read_frame()) == 60
+    publish(server, 60, 60, gz_headers={'Last-Modified': formatdate(1_750_000_060, usegmt=True)},
+            csv_headers={'Last-Modified': formatdate(1_750_000_060, usegmt=True)})
+    assert len(f.read_frame()) == 60 and f.served.endswith('.gz')
+
+
+def test_last_csv_timestamp_skips_the_partial_first_line():
+    tail = b"00:00,1,2\n2025-06-01 00:02:00,3,4\n2025-06-01 00:03:00,5,6\n"
+    assert transport.last_csv_timestamp(tail, ['timestamp', 'a', 'b']) == pd.Timestamp('2025-06-01 00:03:00')
+
+
+@pytest.mark.skipif(transport.pa is None, reason="pyarrow not installed")
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+def test_arrow_timestamps_keep_their_unit(unit):
+    ts = pd.Series(pd.date_range('2025-06-01', periods=5, freq='s')).astype(f'datetime64[{unit}]')
+    df = pd.DataFrame({'timestamp': ts, 'pool_blocks_found': np.arange(5)})
+    out = transport.decode_arrow(transport.encode_arrow(df))
+    pd.testing.assert_series_equal(out['timestamp'], df['timestamp'])
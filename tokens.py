@@ -0,0 +1,174 @@
+"""Registry of Qubic ecosystem tokens and their markets, priced in batches.
+
+Tokens come from the JSON file named by ``QPOOL_TOKENS`` (``DEFAULT_TOKENS``
+otherwise)::
+
+    [{"symbol": "MATILDA", "exchange": "mexc", "market": "MATILDA/USDT", "ttl": 30},
+     {"symbol": "QXMR", "note": "Airdrop pending"}]
+
+``TokenRegistry.refresh()`` groups the tokens last fetched longer ago than
+their own ``ttl`` by exchange and prices each group with one
+``fetch_tickers(markets)`` call per ``BATCH_SIZE`` markets, so a registry of
+hundreds of tokens costs a handful of requests, not one per token.
+Exchanges are fetched in parallel on a background pool; a failed batch
+keeps the previous tickers and records the error. Tokens without a market
+(not listed yet, or on a venue ccxt doesn't cover) stay in the table with
+their note.
+
+Any object with ``fetch_tickers(symbols)`` works as an exchange, so a stub
+can stand in for ccxt; exchanges whose ``has['fetchTickers']`` is false
+are priced one ``fetch_ticker`` call per market instead.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import pandas as pd
+
+import ohlcv
+
+DEFAULT_TTL = 60  # seconds
+BATCH_SIZE = 100  # markets per fetch_tickers call
+DEFAULT_TOKENS = [
+    {"symbol": "QUBIC", "name": "Qubic", "exchange": "mexc", "market": "QUBIC/USDT"},
+    {"symbol": "XMR", "name": "Monero", "exchange": "mexc", "market": "XMR/USDT"},
+    {"symbol": "MATILDA", "name": "Matilda", "note": "Safe.Trade and qx.qubic.org; no ccxt market"},
+    {"symbol": "CFB", "name": "CFB", "note": "Safe.Trade and qx.qubic.org; no ccxt market"},
+    {"symbol": "QXMR", "name": "QXMR", "note": "Airdrop pending"},
+    {"symbol": "CODED", "name": "CODED", "note": "Airdrop pending"},
+]
+COLUMNS = ['symbol', 'name', 'exchange', 'market', 'price', 'change_24h_pct', 'volume_24h', 'age_s', 'status']
+
+
+class Token:
+    def __init__(self, symbol, name=None, exchange=None, market=None, ttl=DEFAULT_TTL, note=""):
+        self.symbol = symbol
+        self.name = name or symbol
+        self.exchange = exchange
+        self.market = market
+        self.ttl = ttl
+        self.note = note
+
+    @property
+    def listed(self):
+        return bool(self.exchange and self.market)
+
+    def __repr__(self):
+        return f"Token({self.symbol!r}, {self.exchange!r}, {self.market!r})"
+
+
+def load_tokens(path=None):
+    """Tokens from ``QPOOL_TOKENS`` (or ``path``); ``DEFAULT_TOKENS`` otherwise."""
+    path = path or os.environ.get("QPOOL_TOKENS")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return [Token(**spec) for spec in json.load(f)]
+    return [Token(**spec) for spec in DEFAULT_TOKENS]
+
+
+def volume_of(ticker):
+    """24h volume in the quote currency, computed from base volume when the exchange omits it."""
+    if ticker.get("quoteVolume") is not None:
+        return ticker["quoteVolume"]
+    if ticker.get("baseVolume") is not None and ticker.get("last") is not None:
+        return ticker["baseVolume"] * ticker["last"]
+    return None
+
+
+class TokenRegistry:
+    """Per-token cached tickers, refreshed per exchange in batched ``fetch_tickers`` calls."""
+
+    def __init__(self, tokens, make_exchange=ohlcv.make_exchange, batch_size=BATCH_SIZE, max_workers=4):
+        self.tokens = {t.symbol: t for t in tokens}
+        self.make_exchange = make_exchange
+        self.batch_size = batch_size
+        self._exchanges = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tokens")
+        self._lock = threading.Lock()
+        self._tickers = {}     # symbol -> last ticker
+        self._fetched_at = {}  # symbol -> monotonic time of that ticker
+        self._tried_at = {}    # symbol -> monotonic time of the last attempt, good or not
+        self._errors = {}      # symbol -> last error message
+        self._inflight = {}    # exchange id -> Future
+        self.version = 0       # bumped whenever a ticker changes; keys cached tables
+
+    def exchange(self, exchange_id):
+        # Created on first use; only from the fetch pool, one thread per exchange at a time
+        if exchange_id not in self._exchanges:
+            self._exchanges[exchange_id] = self.make_exchange(exchange_id)
+        return self._exchanges[exchange_id]
+
+    def _load(self, exchange_id, tokens):
+        for i in range(0, len(tokens), self.batch_size):
+            batch = tokens[i:i + self.batch_size]
+            markets = [t.market for t in batch]
+            try:
+                exchange = self.exchange(exchange_id)
+                if getattr(exchange, "has", {}).get("fetchTickers", True):
+                    tickers = exchange.fetch_tickers(markets)
+                else:
+                    # Venues without a batch endpoint: one request per market
+                    tickers = {m: exchange.fetch_ticker(m) for m in markets}
+            except Exception as e:
+                with self._lock:
+                    for token in batch:
+                        self._errors[token.symbol] = f"{e.__class__.__name__}: {e}"
+                        self._tried_at[token.symbol] = time.monotonic()
+                continue
+            now = time.monotonic()
+            with self._lock:
+                for token in batch:
+                    self._tried_at[token.symbol] = now
+                    ticker = tickers.get(token.market)
+                    if ticker is None:
+                        self._errors[token.symbol] = f"{token.market} not returned by {exchange_id}"
+                        continue
+                    self._tickers[token.symbol] = ticker
+                    self._fetched_at[token.symbol] = now
+                    self._errors.pop(token.symbol, None)
+                self.version += 1
+
+    def refresh(self):
+        """Start one batched fetch per exchange for its stale tokens, unless one is already running."""
+        now = time.monotonic()
+        with self._lock:
+            stale = defaultdict(list)
+            for symbol, token in self.tokens.items():
+                if token.listed and now - self._tried_at.get(symbol, float("-inf")) >= token.ttl:
+                    stale[token.exchange].append(token)
+            for exchange_id, tokens in stale.items():
+                running = exchange_id in self._inflight and not self._inflight[exchange_id].done()
+                if not running:
+                    self._inflight[exchange_id] = self._pool.submit(self._load, exchange_id, tokens)
+            return [f for f in self._inflight.values() if not f.done()]
+
+    def fetch_all(self, wait=None):
+        """Refresh stale tokens, waiting at most ``wait`` seconds (None: until done); returns the version."""
+        pending = self.refresh()
+        if pending:
+            wait_futures(pending, timeout=wait)
+        return self.version
+
+    def table(self):
+        """One row per token: price, 24h change and volume, cache age and status."""
+        now = time.monotonic()
+        with self._lock:
+            rows = []
+            for symbol, token in self.tokens.items():
+                ticker = self._tickers.get(symbol, {})
+                fetched = self._fetched_at.get(symbol)
+                rows.append({
+                    'symbol': symbol,
+                    'name': token.name,
+                    'exchange': token.exchange,
+                    'market': token.market,
+                    'price': ticker.get('last'),
+                    'change_24h_pct': ticker.get('percentage'),
+                    'volume_24h': volume_of(ticker) if ticker else None,
+                    'age_s': round(now - fetched, 1) if fetched is not None else None,
+                    'status': self._errors.get(symbol) or (token.note if not token.listed else ("ok" if ticker else "loading")),
+                })
+        return pd.DataFrame(rows, columns=COLUMNS)
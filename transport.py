@@ -0,0 +1,187 @@
+"""Compact encodings for the pool history feed.
+
+The collector writes compressed siblings next to the plain CSV with
+``python transport.py data/qpool_V1.csv``:
+
+- ``qpool_V1.arrow``: Arrow IPC stream with delta-encoded counters and
+  timestamps, dictionary-encoded constant columns and zstd-compressed
+  buffers (needs pyarrow)
+- ``qpool_V1.csv.zst`` (needs zstandard) and ``qpool_V1.csv.gz``
+
+The loader (``fetch.Fetcher``) asks for these first, advertising what it can
+decode, and falls back to the plain CSV when none is available or when the
+CSV's last row is newer than the sibling's (the collector rewrites the CSV
+first). pyarrow and zstandard are optional on both sides.
+"""
+import argparse
+import gzip
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"  # IPC continuation marker
+DICTIONARY_MAX_RATIO = 0.01  # dictionary-encode columns with fewer distinct values than this share of rows
+
+
+def accept_header():
+    types = ([ARROW_MIME] if pa is not None else []) + ["text/csv;q=0.9", "*/*;q=0.1"]
+    return ", ".join(types)
+
+
+def variant_urls(url):
+    """Compressed sibling URLs to try before ``url``, best first, limited to what we can decode."""
+    if not url.endswith(".csv"):
+        return []
+    base = url[:-len(".csv")]
+    variants = []
+    if pa is not None:
+        variants.append(base + ".arrow")
+    if zstandard is not None:
+        variants.append(url + ".zst")
+    variants.append(url + ".gz")
+    return variants
+
+
+def is_variant_body(url, content, content_encoding=""):
+    """Whether a sibling URL really returned that format (not, say, a catch-all HTML page).
+
+    A ``.gz``/``.zst`` served with the matching ``Content-Encoding`` arrives
+    already decompressed by requests, so its magic bytes are gone.
+    """
+    encodings = {e.strip() for e in (content_encoding or "").lower().split(",")}
+    if url.endswith(".arrow"):
+        return content[:4] == ARROW_STREAM_MAGIC
+    if url.endswith(".zst"):
+        return content[:4] == ZSTD_MAGIC or "zstd" in encodings
+    if url.endswith(".gz"):
+        return content[:2] == GZIP_MAGIC or bool(encodings & {"gzip", "x-gzip"})
+    return True
+
+
+def last_csv_timestamp(tail, columns):
+    """Timestamp of the last complete row in ``tail`` (the end of a CSV with ``columns``); None if not found."""
+    if "timestamp" not in columns:
+        return None
+    lines = [line for line in tail.decode(errors="replace").splitlines() if line.strip()]
+    for line in reversed(lines[1:] if len(lines) > 1 else lines):
+        fields = line.split(",")
+        if len(fields) == len(columns):
+            try:
+                return pd.Timestamp(fields[list(columns).index("timestamp")])
+            except ValueError:
+                return None
+    return None
+
+
+def encode_arrow(df):
+    """Arrow IPC stream bytes.
+
+    Non-decreasing integer and timestamp columns are delta-encoded (listed in
+    the schema metadata), low-cardinality columns are dictionary-encoded, and
+    the buffers are zstd-compressed.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for the Arrow transport")
+    columns, deltas = {}, []
+    for name in df.columns:
+        values = df[name]
+        if len(values) > 1 and not values.isna().any() and (
+                pd.api.types.is_integer_dtype(values) or pd.api.types.is_datetime64_dtype(values)):
+            ints = values.to_numpy().view('int64') if pd.api.types.is_datetime64_dtype(values) else values.to_numpy('int64')
+            diffs = np.diff(ints, prepend=0)
+            if (diffs[1:] >= 0).all():
+                columns[name] = pa.array(diffs)
+                deltas.append(f"{name}:{values.dtype}")
+                continue
+        column = pa.array(values)
+        if len(df) and values.nunique(dropna=False) <= max(1, DICTIONARY_MAX_RATIO * len(df)):
+            column = column.dictionary_encode()
+        columns[name] = column
+    table = pa.table(columns).replace_schema_metadata({"qpool.delta": ",".join(deltas)})
+    sink = io.BytesIO()
+    options = pa.ipc.IpcWriteOptions(compression=pa.Codec("zstd", compression_level=9))
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_arrow(data):
+    table = pa.ipc.open_stream(io.BytesIO(data)).read_all()
+    meta = (table.schema.metadata or {}).get(b"qpool.delta", b"").decode()
+    df = table.to_pandas()
+    for spec in filter(None, meta.split(",")):
+        name, dtype = spec.rsplit(":", 1)
+        # Datetimes come back in the unit they were written in, not always ns
+        df[name] = np.cumsum(df[name].to_numpy('int64')).view(np.dtype(dtype) if dtype.startswith('datetime64') else 'int64')
+        if not dtype.startswith('datetime64'):
+            df[name] = df[name].astype(dtype)
+    for name in df.columns:
+        # Dictionary columns come back as categoricals; restore the value dtype
+        if isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].astype(df[name].cat.categories.dtype)
+    return df
+
+
+def decode(content, content_type="", url=""):
+    """DataFrame from a response body.
+
+    Compressed bodies are recognised by their magic bytes rather than the URL,
+    since some servers already undo the compression via Content-Encoding.
+    """
+    content_type = (content_type or "").split(";")[0].strip()
+    if content_type == ARROW_MIME or url.endswith(".arrow"):
+        return decode_arrow(content)
+    if content[:4] == ZSTD_MAGIC:
+        content = zstandard.ZstdDecompressor().decompressobj().decompress(content)
+    elif content[:2] == GZIP_MAGIC:
+        content = gzip.decompress(content)
+    return pd.read_csv(io.BytesIO(content))
+
+
+def write_variants(df, csv_path):
+    """Collector side: write every available compressed sibling of ``csv_path``; returns their paths."""
+    base = csv_path[:-len(".csv")] if csv_path.endswith(".csv") else csv_path
+    raw = df.to_csv(index=False).encode()
+    written = []
+
+    def atomic_write(path, data):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        written.append(path)
+
+    atomic_write(csv_path + ".gz", gzip.compress(raw, compresslevel=6))
+    if zstandard is not None:
+        atomic_write(csv_path + ".zst", zstandard.ZstdCompressor(level=9).compress(raw))
+    if pa is not None:
+        typed = df.copy()
+        typed["timestamp"] = pd.to_datetime(typed["timestamp"])
+        atomic_write(base + ".arrow", encode_arrow(typed))
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write compressed siblings of a pool history CSV.")
+    parser.add_argument("csv")
+    args = parser.parse_args()
+    size = os.path.getsize(args.csv)
+    print(f"{args.csv}: {size:,} bytes")
+    for path in write_variants(pd.read_csv(args.csv), args.csv):
+        print(f"{path}: {os.path.getsize(path):,} bytes ({size / os.path.getsize(path):.1f}x smaller)")